@@ -0,0 +1,329 @@
+import argparse
+import contextlib
+import time
+import traceback
+import warnings
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from performance_tracker.core.worker import RESULT_FILES, run_report
+from performance_tracker.latex.compose import COMPARISON_FIELDS, MAX_FETCH_WORKERS
+from performance_tracker.services.exchange_rate import ExchangeRateService
+from performance_tracker.services.history_store import get_history_store
+from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.market_data import (
+    FIXTURE_DIR,
+    MARKET_DATA_MODES,
+    REPLAY_LATENCY,
+    create_provider,
+    set_provider,
+)
+from performance_tracker.services.ticker import (
+    SNAPSHOT_FIELDS,
+    get_snapshot,
+    get_tickers,
+    pin_snapshots,
+)
+from performance_tracker.utils.cache import cache_table
+from performance_tracker.utils.maps import (
+    COUNTRY_MAP,
+    CURRENCY_MAP,
+    DEFAULT_COLUMN_VALUES,
+    OUTPUT_MAP,
+    PERIOD_MAP,
+)
+from performance_tracker.utils.memory import MemoryProfiler
+from performance_tracker.utils.paths import CACHE_DIR
+from performance_tracker.utils.profiling import Profiler
+
+BATCH_OUTPUT_DIR = CACHE_DIR / "batch"
+DEFAULT_BATCH_WORKERS = 2
+DEFAULT_COMPARISON_TICKER = "EUNL.DE"
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult:
+    portfolio: Path
+    output_dir: Path
+    seconds: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def find_portfolios(sources: list[str]) -> list[Path]:
+    """CSV files of directories, files and glob patterns, in a stable order."""
+    paths: dict[Path, None] = dict()
+
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            matches = sorted(path.glob("*.csv"))
+        elif path.exists():
+            matches = [path]
+        elif path.is_absolute():
+            matches = sorted(Path(path.anchor).glob(str(path.relative_to(path.anchor))))
+        else:
+            matches = sorted(Path().glob(source))
+
+        if not matches:
+            warnings.warn(f"No portfolios found at {source}", stacklevel=2)
+
+        paths.update(dict.fromkeys(match for match in matches if match.is_file()))
+
+    return list(paths)
+
+
+def read_portfolio(path: Path) -> pd.DataFrame:
+    df = pd.read_csv(path)
+
+    missing_cols = [col for col in DEFAULT_COLUMN_VALUES if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing columns in {path}: {missing_cols}")
+
+    df = df.loc[:, list(DEFAULT_COLUMN_VALUES)].fillna(DEFAULT_COLUMN_VALUES)
+    for col in ("Purchase Date", "Sell Date"):
+        df[col] = pd.to_datetime(df[col])
+
+    return df
+
+
+def prefetch_market_data(
+    portfolios: list[pd.DataFrame],
+    config_dict: dict,
+    max_workers: int = MAX_FETCH_WORKERS,
+) -> int:
+    """Loads every symbol of the batch once, the reports read from the caches."""
+    symbols = list(
+        dict.fromkeys(
+            symbol
+            for df in portfolios
+            for symbol in df["Ticker"]
+            if isinstance(symbol, str) and symbol
+        )
+    )
+    if not symbols:
+        return 0
+
+    comparison_symbol = config_dict.get("comparison_ticker", DEFAULT_COMPARISON_TICKER)
+
+    def load(symbol: str) -> str | None:
+        tickers = [ticker for ticker in get_tickers(symbol) if ticker]
+        if not tickers:
+            return None
+
+        # the same snapshots the composer asks for
+        fields = (
+            COMPARISON_FIELDS if symbol == comparison_symbol else tuple(SNAPSHOT_FIELDS)
+        )
+        return get_snapshot(tickers[0], fields).info.get("currency")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        currencies = list(executor.map(load, [*symbols, comparison_symbol]))
+
+    history_store = get_history_store()
+    history_store.prefetch(
+        [*symbols, comparison_symbol], period=config_dict.get("period", "10y")
+    )
+    ExchangeRateService(history_store).prefetch(
+        [currency for currency in currencies if currency]
+        + [config_dict.get("currency", "EUR")]
+    )
+    InflationService().get_inflation_rate(config_dict.get("country", ""))
+
+    return len(symbols)
+
+
+def run_batch(
+    paths: list[Path],
+    config_dict: dict,
+    *,
+    output_root: Path = BATCH_OUTPUT_DIR,
+    output: str = "pdf",
+    max_workers: int = DEFAULT_BATCH_WORKERS,
+    runner: Callable[[pd.DataFrame, dict, Path, str], None] | None = None,
+) -> list[BatchResult]:
+    runner = runner or run_report
+    output_dirs = output_dirs_for(paths, output_root)
+    portfolios: dict[Path, pd.DataFrame] = dict()
+    results: dict[Path, BatchResult] = dict()
+
+    for path in paths:
+        try:
+            portfolios[path] = read_portfolio(path)
+        except Exception as e:
+            results[path] = BatchResult(path, output_dirs[path], 0.0, str(e))
+
+    def generate(path: Path) -> BatchResult:
+        output_dir = output_dirs[path]
+        start = time.perf_counter()
+        try:
+            runner(portfolios[path], config_dict, output_dir, output)
+            if not (output_dir / RESULT_FILES[output]).exists():
+                raise RuntimeError("the report was not created")
+        except Exception as e:
+            traceback.print_exc()
+            return BatchResult(path, output_dir, time.perf_counter() - start, str(e))
+
+        return BatchResult(path, output_dir, time.perf_counter() - start)
+
+    # snapshots outlive the bounds of their cache, each symbol is fetched once
+    with pin_snapshots():
+        start = time.perf_counter()
+        try:
+            symbol_count = prefetch_market_data(list(portfolios.values()), config_dict)
+        except Exception as e:
+            # every report fetches what it needs itself
+            warnings.warn(f"Couldn't prefetch the market data: {e}", stacklevel=2)
+        else:
+            print(
+                f"fetched {symbol_count} symbols of {len(portfolios)} portfolios "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            for result in executor.map(generate, list(portfolios)):
+                results[result.portfolio] = result
+
+    return [results[path] for path in paths]
+
+
+def output_dirs_for(paths: list[Path], output_root: Path) -> dict[Path, Path]:
+    """One output directory per portfolio, named after its file."""
+    output_dirs: dict[Path, Path] = dict()
+    taken: set[str] = set()
+
+    for path in paths:
+        name = path.stem
+        suffix = 1
+        while name in taken:
+            suffix += 1
+            name = f"{path.stem}-{suffix}"
+
+        taken.add(name)
+        output_dirs[path] = output_root / name
+
+    return output_dirs
+
+
+def summarize(results: list[BatchResult], seconds: float) -> str:
+    succeeded = [result for result in results if result.ok]
+    failed = [result for result in results if not result.ok]
+
+    lines = [
+        f"{len(succeeded)} of {len(results)} reports in {seconds:.1f}s "
+        f"({len(succeeded) / seconds * 60 if seconds else 0.0:.1f} reports/min)"
+    ]
+    if succeeded:
+        durations = pd.Series([result.seconds for result in succeeded])
+        lines.append(
+            f"per report: median {durations.median():.1f}s, max {durations.max():.1f}s"
+        )
+    lines += [f"failed {result.portfolio}: {result.error}" for result in failed]
+
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="performance-tracker-batch",
+        description="Generate the reports of many portfolio CSVs",
+    )
+    parser.add_argument(
+        "portfolios",
+        nargs="+",
+        help="directories, CSV files or glob patterns of portfolios",
+    )
+    parser.add_argument(
+        "--currency", choices=sorted(CURRENCY_MAP.values()), default="EUR"
+    )
+    parser.add_argument(
+        "--country", choices=sorted(COUNTRY_MAP.values()), default="DEU"
+    )
+    parser.add_argument("--period", choices=list(PERIOD_MAP.values()), default="1y")
+    parser.add_argument("--output", choices=list(OUTPUT_MAP.values()), default="pdf")
+    parser.add_argument("--output-dir", type=Path, default=BATCH_OUTPUT_DIR)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_BATCH_WORKERS,
+        help="reports generated at the same time",
+    )
+    parser.add_argument(
+        "--market-data",
+        choices=MARKET_DATA_MODES,
+        help="fetch live, record the responses or replay recorded ones",
+    )
+    parser.add_argument("--fixture-dir", type=Path, default=FIXTURE_DIR)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=REPLAY_LATENCY,
+        help="seconds added to every replayed response",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        help="write a Chrome trace of the batch to this file",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace peak and retained memory per stage and position",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+
+    if args.market_data is not None:
+        set_provider(create_provider(args.market_data, args.fixture_dir, args.latency))
+
+    paths = find_portfolios(args.portfolios)
+    if not paths:
+        return 1
+
+    profiler = Profiler()
+    memory = MemoryProfiler()
+    start = time.perf_counter()
+    with (
+        profiler.activate() if args.profile else contextlib.nullcontext(),
+        memory.activate() if args.memory else contextlib.nullcontext(),
+    ):
+        results = run_batch(
+            paths,
+            {
+                "currency": args.currency,
+                "country": args.country,
+                "period": args.period,
+            },
+            output_root=args.output_dir,
+            output=args.output,
+            max_workers=args.workers,
+        )
+    print(summarize(results, time.perf_counter() - start))
+
+    if args.profile:
+        profiler.write_chrome_trace(args.profile)
+        print(profiler.summary_table())
+        print(f"trace written to {args.profile}")
+
+    if args.memory:
+        print(memory.report())
+        print(cache_table())
+
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
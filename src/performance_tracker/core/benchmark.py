@@ -0,0 +1,594 @@
+import argparse
+import functools
+import json
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from performance_tracker.core.worker import report_factories
+from performance_tracker.latex.compose import LaTeXComposer
+from performance_tracker.latex.engine import LATEX_ENGINE, LaTeXEngine
+from performance_tracker.latex.factories.chart_graph_factory import (
+    CHART_PRECISION,
+    ChartGraphFactory,
+)
+from performance_tracker.latex.sidebar import Sidebar
+from performance_tracker.services.exchange_rate import ExchangeRateService
+from performance_tracker.services.history_store import HistoryStore
+from performance_tracker.services.inflation import INFLATION_PARAMS, InflationService
+from performance_tracker.services.market_data import (
+    FixtureStore,
+    ReplayProvider,
+    get_provider,
+    request_key,
+    set_provider,
+    ticker_symbol,
+)
+from performance_tracker.services.ticker import (
+    SNAPSHOT_FIELDS,
+    get_snapshot,
+    get_tickers,
+)
+from performance_tracker.utils.fill_df import fill_missing_dates
+from performance_tracker.utils.join import build_benchmark_context, join_all_df
+from performance_tracker.utils.memory import MemoryProfiler
+from performance_tracker.utils.profiling import Profiler
+
+BENCHMARK_SIZES = (1, 10, 30, 100, 500)
+BENCHMARK_PERIODS = ("1y", "5y", "10y")
+BENCHMARK_STAGES = (
+    "fill_missing_dates",
+    "join_all_df",
+    "get_datapoints",
+    "sidebar",
+    "generate",
+    "compile",
+)
+DEFAULT_REPEAT = 3
+REGRESSION_THRESHOLD = 0.2
+# slower by less than this is timer noise
+MIN_REGRESSION_SECONDS = 0.005
+
+BENCHMARK_CONFIG = {"currency": "EUR", "country": "DEU"}
+COMPARISON_SYMBOL = "EUNL.DE"
+CHART_COLUMNS = (
+    "Close_Adjusted",
+    "Close_Comparison_Adjusted",
+    "interpolated_inflation_adjusted",
+)
+# the spans of the TeX runs, everything else of a report is generation
+RENDER_SPANS = ("LaTeXComposer.render_parts", "LaTeXComposer.render_latex")
+SYNTHETIC_YEARS = 11
+
+
+@dataclass(frozen=True, slots=True)
+class Measurement:
+    stage: str
+    positions: int
+    period: str
+    # median and fastest of the repeats
+    seconds: float
+    best: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.stage}/{self.positions}/{self.period}"
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    key: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return self.current / self.baseline - 1
+
+
+class GenerateOnlyComposer(LaTeXComposer):
+    """Writes every TeX file of a report without compiling it."""
+
+    def render_parts(self, part_names: list[str], output_dir: Path) -> bool:
+        return False
+
+    def render_latex(self, output_dir: Path) -> bool:
+        return False
+
+
+def synthetic_symbols(count: int) -> list[str]:
+    return [f"SYN{i:03d}" for i in range(count)]
+
+
+def write_synthetic_fixtures(
+    store: FixtureStore,
+    symbols: list[str],
+    now: pd.Timestamp | None = None,
+    seed: int = 0,
+) -> None:
+    """Random walks and plausible fundamentals, replayed like recorded data."""
+    rng = np.random.default_rng(seed)
+    today = (now if now is not None else pd.Timestamp.now()).normalize()
+    dates = pd.bdate_range(today - pd.DateOffset(years=SYNTHETIC_YEARS), today)
+
+    def history(start: float, volatility: float) -> pd.DataFrame:
+        returns = rng.normal(0.0002, volatility, len(dates))
+        return pd.DataFrame(
+            {
+                "Close": start * np.exp(np.cumsum(returns)),
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+            },
+            index=dates,
+        )
+
+    store.save("history", "EUR=X", value=history(0.9, 0.003))
+
+    comparison = history(60.0, 0.01)
+    store.save("history", COMPARISON_SYMBOL, value=comparison)
+    store.save(
+        "fields",
+        COMPARISON_SYMBOL,
+        "info",
+        value={"symbol": COMPARISON_SYMBOL, "currency": "EUR"},
+    )
+
+    for i, symbol in enumerate(symbols):
+        prices = history(rng.uniform(10, 500), 0.015)
+        prices.loc[prices.index[::63], "Dividends"] = (
+            prices["Close"].iloc[::63].to_numpy() * 0.005
+        )
+        store.save("history", symbol, value=prices)
+
+        close = float(prices["Close"].iloc[-1])
+        fields = {
+            "info": {
+                "symbol": symbol,
+                "longName": f"Synthetic {symbol} AG",
+                "quoteType": "EQUITY",
+                "country": "Germany",
+                "sector": "Technology",
+                "currency": "EUR" if i % 2 else "USD",
+                "previousClose": close,
+                "dividendYield": 1.2,
+                "dividendRate": close * 0.012,
+                "operatingCashflow": 6_000_000_000,
+                "enterpriseValue": 100_000_000_000,
+                "fullTimeEmployees": 10_000,
+                "overallRisk": 3,
+                "fiveYearAvgDividendYield": 1.1,
+                "beta": 1.05,
+            },
+            "dividends": prices.loc[prices["Dividends"] > 0, "Dividends"],
+            "recommendations": pd.DataFrame(
+                [{"strongBuy": 5, "buy": 10, "hold": 7, "sell": 1, "strongSell": 0}]
+            ),
+            "analyst_price_targets": {
+                "current": close,
+                "high": close * 1.3,
+                "low": close * 0.8,
+                "mean": close * 1.1,
+                "median": close * 1.08,
+            },
+            "growth_estimates": pd.DataFrame(
+                {"stockTrend": [0.1, 0.12]}, index=pd.Index(["0y", "+1y"])
+            ),
+            "cashflow": pd.DataFrame(
+                {"2024-12-31": [5e9, 6e9]},
+                index=pd.Index(["Free Cash Flow", "Operating Cash Flow"]),
+            ),
+        }
+        for field in SNAPSHOT_FIELDS:
+            store.save("fields", symbol, field, value=fields[field])
+
+    inflation = [
+        {"date": str(year), "value": 2.0}
+        for year in range(today.year - SYNTHETIC_YEARS, today.year)
+    ]
+    store.save(
+        "json",
+        request_key(
+            InflationService.url(BENCHMARK_CONFIG["country"]), INFLATION_PARAMS
+        ),
+        value=[{"page": 1, "pages": 1}, inflation],
+    )
+
+
+def measure(func: Callable[[], object], repeat: int) -> tuple[float, float]:
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings), min(timings)
+
+
+class BenchmarkSuite:
+    """Times the report pipeline on replayed market data, without network."""
+
+    def __init__(
+        self,
+        work_dir: Path,
+        fixture_dir: Path | None = None,
+        repeat: int = DEFAULT_REPEAT,
+        latency: float = 0.0,
+        memory: MemoryProfiler | None = None,
+    ) -> None:
+        self._work_dir = work_dir
+        self._fixture_dir = fixture_dir
+        self._repeat = max(1, repeat)
+        self._latency = latency
+        # traced in a second pass, tracemalloc slows down every allocation
+        self._memory = memory
+        self._history_store = HistoryStore(work_dir / "history.sqlite")
+        self._exchanger = ExchangeRateService(self._history_store)
+        self._inflation_service = InflationService(work_dir / "inflation")
+
+    def run(
+        self,
+        sizes: tuple[int, ...] = BENCHMARK_SIZES,
+        periods: tuple[str, ...] = BENCHMARK_PERIODS,
+        stages: tuple[str, ...] = BENCHMARK_STAGES,
+    ) -> list[Measurement]:
+        if "compile" in stages and shutil.which(LATEX_ENGINE) is None:
+            print(f"{LATEX_ENGINE} not found, skipping the compile stage")
+            stages = tuple(stage for stage in stages if stage != "compile")
+
+        store, symbols = self._fixtures(max(sizes))
+        previous = get_provider()
+        set_provider(ReplayProvider(store, self._latency))
+
+        measurements = list()
+        try:
+            for period in periods:
+                for size in sizes:
+                    portfolio = [symbols[i % len(symbols)] for i in range(size)]
+                    measurements += self._run_case(portfolio, period, stages)
+
+            if self._memory is not None:
+                with self._memory.activate():
+                    for period in periods:
+                        for size in sizes:
+                            portfolio = [symbols[i % len(symbols)] for i in range(size)]
+                            self._trace_case(self._memory, portfolio, period, stages)
+        finally:
+            set_provider(previous)
+
+        return measurements
+
+    def _fixtures(self, count: int) -> tuple[FixtureStore, list[str]]:
+        if self._fixture_dir is None:
+            store = FixtureStore(self._work_dir / "fixtures")
+            symbols = synthetic_symbols(count)
+            write_synthetic_fixtures(store, symbols)
+            return store, symbols
+
+        store = FixtureStore(self._fixture_dir)
+        symbols = [
+            symbol
+            for symbol in store.symbols()
+            if symbol != COMPARISON_SYMBOL and not symbol.endswith("=X")
+        ]
+        if not symbols:
+            raise ValueError(f"no recorded histories in {self._fixture_dir}")
+
+        return store, symbols
+
+    def _run_case(
+        self, portfolio: list[str], period: str, stages: tuple[str, ...]
+    ) -> list[Measurement]:
+        size = len(portfolio)
+        print(f"benchmarking {size} positions over {period}")
+        stage_funcs, compose = self._prepare(portfolio, period)
+
+        measurements = [
+            Measurement(stage, size, period, *measure(func, self._repeat))
+            for stage, func in stage_funcs.items()
+            if stage in stages
+        ]
+
+        if "generate" in stages or "compile" in stages:
+            runs = [compose("compile" in stages) for _ in range(self._repeat)]
+            for stage, timings in zip(
+                ("generate", "compile"), zip(*runs, strict=True), strict=True
+            ):
+                if stage in stages:
+                    measurements.append(
+                        Measurement(
+                            stage,
+                            size,
+                            period,
+                            statistics.median(timings),
+                            min(timings),
+                        )
+                    )
+
+        return measurements
+
+    def _trace_case(
+        self,
+        memory: MemoryProfiler,
+        portfolio: list[str],
+        period: str,
+        stages: tuple[str, ...],
+    ) -> None:
+        size = len(portfolio)
+        print(f"tracing memory of {size} positions over {period}")
+        stage_funcs, compose = self._prepare(portfolio, period)
+
+        for stage, func in stage_funcs.items():
+            if stage in stages:
+                with memory.stage(f"{stage}/{size}/{period}"):
+                    func()
+
+        # compiling runs in subprocesses, out of reach of tracemalloc
+        if "generate" in stages:
+            with memory.stage(f"generate/{size}/{period}"):
+                compose(False)
+
+    def _prepare(
+        self, portfolio: list[str], period: str
+    ) -> tuple[dict[str, Callable[[], object]], Callable[[bool], tuple[float, float]]]:
+        size = len(portfolio)
+        config_dict = {**BENCHMARK_CONFIG, "period": period}
+
+        tickers = get_tickers(portfolio)
+        comparison_ticker = get_tickers(COMPARISON_SYMBOL)[0]
+        snapshots = {ticker_symbol(ticker): get_snapshot(ticker) for ticker in tickers}
+        self._history_store.prefetch([*portfolio, COMPARISON_SYMBOL], period=period)
+        histories = [
+            self._history_store.get_history(ticker, period=period) for ticker in tickers
+        ]
+
+        benchmark = build_benchmark_context(
+            get_snapshot(comparison_ticker, ("info",)).info.get("currency", "USD"),
+            comparison_ticker,
+            config_dict,
+            self._exchanger,
+            self._inflation_service,
+            config_dict["currency"],
+            self._history_store,
+        )
+
+        def join() -> list[pd.DataFrame]:
+            return [
+                join_all_df(
+                    benchmark,
+                    config_dict,
+                    snapshots[ticker_symbol(ticker)].info.get("currency", "USD"),
+                    self._exchanger,
+                    ticker,
+                    config_dict["currency"],
+                    self._history_store,
+                )
+                for ticker in tickers
+            ]
+
+        combined_dfs = join()
+        df = pd.DataFrame(
+            {
+                "Ticker": portfolio,
+                "Quantity": np.arange(1, size + 1),
+                "Purchase Date": pd.NaT,
+                "Purchase Price": 0.0,
+                "Sell Date": pd.NaT,
+                "Sell Price": 0.0,
+            }
+        )
+
+        def sidebar() -> list[str]:
+            table = Sidebar(df, self._exchanger, config_dict, snapshots)
+            return [table(i) for i in range(size)]
+
+        stage_funcs: dict[str, Callable[[], object]] = {
+            "fill_missing_dates": lambda: [
+                fill_missing_dates(history, val_col="Close", until="today")
+                for history in histories
+            ],
+            "join_all_df": join,
+            "get_datapoints": lambda: [
+                ChartGraphFactory.get_datapoints(combined_df, col, CHART_PRECISION)
+                for combined_df in combined_dfs
+                for col in CHART_COLUMNS
+            ],
+            "sidebar": sidebar,
+        }
+
+        return stage_funcs, functools.partial(self._compose, df, config_dict)
+
+    def _compose(
+        self, df: pd.DataFrame, config_dict: dict, compile_pages: bool
+    ) -> tuple[float, float]:
+        # nothing of an earlier run is reused, except the LaTeX format
+        build_dir = Path(tempfile.mkdtemp(dir=self._work_dir))
+        if compile_pages:
+            self._copy_format(build_dir)
+
+        composer_class = LaTeXComposer if compile_pages else GenerateOnlyComposer
+        composer = composer_class(
+            report_factories(build_dir),
+            build_dir=build_dir,
+            parallel_pages=True,
+            history_store=self._history_store,
+            inflation_service=self._inflation_service,
+        )
+
+        profiler = Profiler()
+        start = time.perf_counter()
+        with profiler.activate():
+            composer(df, config_dict, build_dir / "output")
+        seconds = time.perf_counter() - start
+
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+        compile_seconds = sum(
+            span.wall for span in profiler.spans if span.name in RENDER_SPANS
+        )
+        return seconds - compile_seconds, compile_seconds
+
+    def _copy_format(self, build_dir: Path) -> None:
+        format_dir = self._work_dir / "format"
+        format_name = LaTeXEngine(format_dir).format_name()
+        if format_name is not None:
+            shutil.copy2(format_dir / f"{format_name}.fmt", build_dir)
+
+
+def save_results(path: Path, measurements: list[Measurement], repeat: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(
+            {
+                "created_at": pd.Timestamp.now().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "repeat": repeat,
+                "results": {
+                    measurement.key: {
+                        "seconds": measurement.seconds,
+                        "best": measurement.best,
+                    }
+                    for measurement in measurements
+                },
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+
+def load_results(path: Path) -> dict[str, float]:
+    results = json.loads(path.read_text(encoding="utf-8"))["results"]
+
+    return {key: result["seconds"] for key, result in results.items()}
+
+
+def compare(
+    measurements: list[Measurement],
+    baseline: dict[str, float],
+    threshold: float = REGRESSION_THRESHOLD,
+) -> list[Regression]:
+    regressions = list()
+    for measurement in measurements:
+        previous = baseline.get(measurement.key)
+        if previous is None or previous <= 0:
+            continue
+
+        if (
+            measurement.seconds > previous * (1 + threshold)
+            and measurement.seconds - previous > MIN_REGRESSION_SECONDS
+        ):
+            regressions.append(
+                Regression(measurement.key, previous, measurement.seconds)
+            )
+
+    return regressions
+
+
+def format_results(
+    measurements: list[Measurement], baseline: dict[str, float] | None = None
+) -> str:
+    table = pd.DataFrame(
+        {
+            "stage": [measurement.stage for measurement in measurements],
+            "positions": [measurement.positions for measurement in measurements],
+            "period": [measurement.period for measurement in measurements],
+            "seconds": [measurement.seconds for measurement in measurements],
+            "best": [measurement.best for measurement in measurements],
+        }
+    )
+    if baseline is not None:
+        table["baseline"] = [
+            baseline.get(measurement.key, np.nan) for measurement in measurements
+        ]
+        table["change"] = (table["seconds"] / table["baseline"] - 1).map(
+            lambda change: "" if pd.isna(change) else f"{change:+.0%}"
+        )
+
+    return table.round(4).to_string(index=False)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="performance-tracker-benchmark",
+        description="Time the report pipeline on recorded or synthetic market data",
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCHMARK_SIZES))
+    parser.add_argument(
+        "--periods", nargs="+", choices=BENCHMARK_PERIODS, default=BENCHMARK_PERIODS
+    )
+    parser.add_argument(
+        "--stages", nargs="+", choices=BENCHMARK_STAGES, default=BENCHMARK_STAGES
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--fixture-dir",
+        type=Path,
+        help="recorded market data, synthetic data is generated without it",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds added to every replayed response",
+    )
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="trace peak and retained memory per stage and position",
+    )
+    parser.add_argument("--save", type=Path, help="write the results as a baseline")
+    parser.add_argument(
+        "--compare", type=Path, help="flag regressions against this baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=REGRESSION_THRESHOLD,
+        help="relative slowdown reported as a regression",
+    )
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    memory = MemoryProfiler() if args.memory else None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        measurements = BenchmarkSuite(
+            Path(work_dir), args.fixture_dir, args.repeat, args.latency, memory
+        ).run(tuple(args.sizes), tuple(args.periods), tuple(args.stages))
+
+    baseline = load_results(args.compare) if args.compare else None
+    print(format_results(measurements, baseline))
+    if memory is not None:
+        print(memory.report())
+
+    if args.save:
+        save_results(args.save, measurements, args.repeat)
+        print(f"results written to {args.save}")
+
+    if baseline is None:
+        return 0
+
+    regressions = compare(measurements, baseline, args.threshold)
+    for regression in regressions:
+        print(
+            f"regression {regression.key}: {regression.baseline:.4f}s -> "
+            f"{regression.current:.4f}s ({regression.change:+.0%})"
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
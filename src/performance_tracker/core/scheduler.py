@@ -0,0 +1,510 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import traceback
+import uuid
+import warnings
+from collections.abc import Callable
+from contextlib import closing
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import lru_cache
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+from performance_tracker.core.worker import RESULT_FILES, run_report
+from performance_tracker.latex.engine import digest
+from performance_tracker.utils.paths import CACHE_DIR
+from performance_tracker.utils.progress import ProgressCallback, ProgressEvent
+
+JOB_DB_PATH = CACHE_DIR / "jobs.sqlite"
+JOB_OUTPUT_DIR = CACHE_DIR / "output"
+
+# reports share the network and the TeX processes, so only a few run at once
+MAX_CONCURRENT_JOBS = 2
+POLL_INTERVAL = 1.0
+# output directories of finished jobs are evicted, least recently used first
+MAX_RESULT_BYTES = 2 * 1024**3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_key TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    input TEXT NOT NULL,
+    config TEXT NOT NULL,
+    output TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_text TEXT NOT NULL DEFAULT '',
+    eta REAL,
+    timings TEXT,
+    owner INTEGER,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    last_used_at TEXT,
+    output_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, created_at);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (job_key, status);
+"""
+# columns added to existing databases
+JOB_MIGRATIONS = {
+    "eta": "REAL",
+    "timings": "TEXT",
+    "last_used_at": "TEXT",
+    "output_bytes": "INTEGER",
+}
+
+JOB_COLUMNS = (
+    "job_id, job_key, priority, status, output, output_dir, progress, "
+    "progress_text, error, created_at, started_at, finished_at, eta, timings"
+)
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    # done, but the output was removed to free space
+    EVICTED = "evicted"
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    job_id: str
+    job_key: str
+    priority: int
+    status: JobStatus
+    output: str
+    output_dir: Path
+    progress: float
+    progress_text: str
+    error: str | None
+    created_at: pd.Timestamp
+    started_at: pd.Timestamp | None
+    finished_at: pd.Timestamp | None
+    # seconds left, estimated from the progress so far
+    eta: float | None
+    # seconds per stage and per factory
+    timings: dict[str, float]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in {JobStatus.DONE, JobStatus.FAILED, JobStatus.EVICTED}
+
+    @property
+    def result_path(self) -> Path:
+        return self.output_dir / RESULT_FILES[self.output]
+
+    @property
+    def elapsed(self) -> float | None:
+        if self.started_at is None:
+            return None
+
+        end = self.finished_at if self.finished_at is not None else pd.Timestamp.now()
+        return (end - self.started_at).total_seconds()
+
+
+ReportRunner = Callable[[pd.DataFrame, dict, Path, str, ProgressCallback], None]
+
+
+class JobScheduler:
+    """Persistent priority queue of report jobs, run by a bounded worker pool."""
+
+    def __init__(
+        self,
+        db_path: Path = JOB_DB_PATH,
+        output_root: Path = JOB_OUTPUT_DIR,
+        max_workers: int = MAX_CONCURRENT_JOBS,
+        runner: ReportRunner = run_report,
+        max_result_bytes: int = MAX_RESULT_BYTES,
+    ) -> None:
+        self._db_path = db_path
+        self._output_root = output_root
+        self._max_result_bytes = max_result_bytes
+        self._runner = runner
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._dispatcher: threading.Thread | None = None
+        self._job_threads: set[threading.Thread] = set()
+        self._initialized = False
+
+    def submit(
+        self,
+        df: pd.DataFrame,
+        config_dict: dict,
+        output: str = "pdf",
+        priority: int = 0,
+    ) -> str:
+        input_json = df.to_json(orient="table", date_format="iso", index=False) or ""
+        config_json = json.dumps(config_dict, sort_keys=True)
+        # market data is refreshed daily, results of an earlier day are stale
+        as_of = pd.Timestamp.now().strftime("%Y-%m-%d")
+        job_key = digest(input_json + config_json + output + as_of)
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute("BEGIN IMMEDIATE")
+
+            # an identical job that is pending or done is shared
+            for job_id, status, output_dir in connection.execute(
+                "SELECT job_id, status, output_dir FROM jobs "
+                "WHERE job_key = ? AND status IN (?, ?, ?) ORDER BY created_at DESC",
+                (job_key, JobStatus.QUEUED, JobStatus.RUNNING, JobStatus.DONE),
+            ).fetchall():
+                if status == JobStatus.DONE:
+                    if not (Path(output_dir) / RESULT_FILES[output]).exists():
+                        continue
+
+                    connection.execute(
+                        "UPDATE jobs SET last_used_at = ? WHERE job_id = ?",
+                        (pd.Timestamp.now().isoformat(), job_id),
+                    )
+
+                return job_id
+
+            job_id = uuid.uuid4().hex
+            connection.execute(
+                "INSERT INTO jobs (job_id, job_key, priority, status, input, config, "
+                "output, output_dir, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    job_key,
+                    priority,
+                    JobStatus.QUEUED,
+                    input_json,
+                    config_json,
+                    output,
+                    str(self._output_root / job_id),
+                    pd.Timestamp.now().isoformat(),
+                ),
+            )
+
+        self._wakeup.set()
+
+        return job_id
+
+    def status(self, job_id: str) -> Job | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+        return self._to_job(row) if row is not None else None
+
+    def queue_position(self, job_id: str) -> int | None:
+        """Jobs that run before this one, None once it has started."""
+        job = self.status(job_id)
+        if job is None or job.status != JobStatus.QUEUED:
+            return None
+
+        with closing(self._connect()) as connection:
+            (ahead,) = connection.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND "
+                "(priority > ? OR (priority = ? AND created_at < ?))",
+                (
+                    JobStatus.QUEUED,
+                    job.priority,
+                    job.priority,
+                    job.created_at.isoformat(),
+                ),
+            ).fetchone()
+
+        return ahead
+
+    def update_progress(self, job_id: str, progress: float, text: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE jobs SET progress = ?, progress_text = ? WHERE job_id = ?",
+                (progress, text, job_id),
+            )
+
+    def report_progress(self, job_id: str, event: ProgressEvent) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE jobs SET progress = ?, progress_text = ?, eta = ?, timings = ? "
+                "WHERE job_id = ?",
+                (
+                    event.progress,
+                    event.text,
+                    event.eta,
+                    json.dumps(event.timings),
+                    job_id,
+                ),
+            )
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._dispatcher is not None:
+                return
+
+            self._requeue_orphans()
+            self._dispatcher = threading.Thread(
+                target=self._dispatch, name="job-dispatcher", daemon=True
+            )
+            self._dispatcher.start()
+
+    def stop(self) -> None:
+        """Stops taking jobs and waits for the running ones."""
+        with self._start_lock:
+            if self._dispatcher is None:
+                return
+
+            self._stopping.set()
+            self._wakeup.set()
+            self._dispatcher.join()
+            self._dispatcher = None
+            self._stopping.clear()
+
+        for thread in list(self._job_threads):
+            thread.join()
+
+    def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            if not self._slots.acquire(timeout=POLL_INTERVAL):
+                continue
+
+            try:
+                job_id = self._claim()
+            except sqlite3.Error as e:
+                warnings.warn(f"Couldn't read the job queue: {e}", stacklevel=1)
+                job_id = None
+
+            if job_id is None:
+                self._slots.release()
+                # other processes may queue jobs in the same database
+                self._wakeup.wait(POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            thread = threading.Thread(
+                target=self._run, args=(job_id,), name=f"job-{job_id}", daemon=True
+            )
+            self._job_threads.add(thread)
+            thread.start()
+
+    def _claim(self) -> str | None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT job_id FROM jobs WHERE status = ? "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (JobStatus.QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute(
+                "UPDATE jobs SET status = ?, owner = ?, started_at = ? "
+                "WHERE job_id = ?",
+                (
+                    JobStatus.RUNNING,
+                    os.getpid(),
+                    pd.Timestamp.now().isoformat(),
+                    row[0],
+                ),
+            )
+
+        return row[0]
+
+    def _run(self, job_id: str) -> None:
+        try:
+            with closing(self._connect()) as connection:
+                input_json, config_json, output, output_dir = connection.execute(
+                    "SELECT input, config, output, output_dir FROM jobs "
+                    "WHERE job_id = ?",
+                    (job_id,),
+                ).fetchone()
+
+            df = pd.read_json(StringIO(input_json), orient="table")
+            self.update_progress(job_id, 0.0, "starting...")
+            self._runner(
+                df,
+                json.loads(config_json),
+                Path(output_dir),
+                output,
+                lambda event: self.report_progress(job_id, event),
+            )
+            if not (Path(output_dir) / RESULT_FILES[output]).exists():
+                raise RuntimeError(f"job {job_id} did not create its result")
+        except Exception:
+            warnings.warn(f"Job {job_id} failed", stacklevel=1)
+            self._finish(job_id, JobStatus.FAILED, traceback.format_exc())
+        else:
+            self._finish(job_id, JobStatus.DONE)
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+        try:
+            self.evict_results()
+        finally:
+            self._job_threads.discard(threading.current_thread())
+
+    def _finish(self, job_id: str, status: JobStatus, error: str | None = None) -> None:
+        with closing(self._connect()) as connection:
+            (output_dir,) = connection.execute(
+                "SELECT output_dir FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+        output_dir = Path(output_dir)
+        output_bytes = (
+            sum(path.stat().st_size for path in output_dir.rglob("*") if path.is_file())
+            if output_dir.exists()
+            else 0
+        )
+        now = pd.Timestamp.now().isoformat()
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, eta = NULL, "
+                "last_used_at = ?, output_bytes = ?, "
+                "progress = CASE WHEN ? THEN 1 ELSE progress END WHERE job_id = ?",
+                (
+                    status,
+                    error,
+                    now,
+                    now,
+                    output_bytes,
+                    status == JobStatus.DONE,
+                    job_id,
+                ),
+            )
+
+    def evict_results(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("BEGIN IMMEDIATE")
+            finished = connection.execute(
+                "SELECT job_id, output_dir, output_bytes FROM jobs "
+                "WHERE status IN (?, ?) AND output_bytes > 0 "
+                "ORDER BY last_used_at DESC",
+                (JobStatus.DONE, JobStatus.FAILED),
+            ).fetchall()
+
+            used = 0
+            evicted = list()
+            for i, (job_id, output_dir, output_bytes) in enumerate(finished):
+                used += output_bytes or 0
+                # the most recent result is kept even when it is too large
+                if i > 0 and used > self._max_result_bytes:
+                    evicted.append((job_id, output_dir))
+
+            connection.executemany(
+                "UPDATE jobs SET output_bytes = 0, "
+                "status = CASE WHEN status = ? THEN ? ELSE status END WHERE job_id = ?",
+                [(JobStatus.DONE, JobStatus.EVICTED, job_id) for job_id, _ in evicted],
+            )
+
+        for _, output_dir in evicted:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    def _requeue_orphans(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            running = connection.execute(
+                "SELECT job_id, owner FROM jobs WHERE status = ?",
+                (JobStatus.RUNNING,),
+            ).fetchall()
+
+            # jobs of a process that is gone are run again, a restarted container
+            # may get the same pid, and there is one scheduler per process
+            orphans = [
+                (JobStatus.QUEUED, job_id)
+                for job_id, owner in running
+                if owner == os.getpid() or not self._is_alive(owner)
+            ]
+            connection.executemany(
+                "UPDATE jobs SET status = ?, owner = NULL WHERE job_id = ?", orphans
+            )
+
+        if orphans:
+            warnings.warn(f"Requeued {len(orphans)} interrupted jobs", stacklevel=3)
+
+    @classmethod
+    def _is_alive(cls, pid: int | None) -> bool:
+        if pid is None:
+            return False
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+
+        return True
+
+    @classmethod
+    def _to_job(cls, row: tuple) -> Job:
+        (
+            job_id,
+            job_key,
+            priority,
+            status,
+            output,
+            output_dir,
+            progress,
+            progress_text,
+            error,
+            created_at,
+            started_at,
+            finished_at,
+            eta,
+            timings,
+        ) = row
+
+        return Job(
+            job_id=job_id,
+            job_key=job_key,
+            priority=priority,
+            status=JobStatus(status),
+            output=output,
+            output_dir=Path(output_dir),
+            progress=progress,
+            progress_text=progress_text,
+            error=error,
+            created_at=pd.Timestamp.fromisoformat(created_at),
+            started_at=pd.Timestamp.fromisoformat(started_at) if started_at else None,
+            finished_at=(
+                pd.Timestamp.fromisoformat(finished_at) if finished_at else None
+            ),
+            eta=eta,
+            timings=json.loads(timings) if timings else {},
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                with closing(sqlite3.connect(self._db_path)) as connection:
+                    connection.executescript(SCHEMA)
+                    columns = {
+                        row[1] for row in connection.execute("PRAGMA table_info(jobs)")
+                    }
+                    for column, column_type in JOB_MIGRATIONS.items():
+                        if column not in columns:
+                            connection.execute(
+                                f"ALTER TABLE jobs ADD COLUMN {column} {column_type}"
+                            )
+                self._initialized = True
+
+        # transactions are opened explicitly, BEGIN IMMEDIATE serializes claims
+        return sqlite3.connect(self._db_path, timeout=30, isolation_level=None)
+
+
+@lru_cache(maxsize=1)
+def get_scheduler() -> JobScheduler:
+    scheduler = JobScheduler()
+    scheduler.start()
+
+    return scheduler
@@ -1,9 +1,8 @@
-import threading
 from pathlib import Path
 
 import pandas as pd
 
-from performance_tracker.latex.compose import LaTeXComposer
+from performance_tracker.latex.compose import LATEX_BUILD_DIR, LaTeXComposer
 from performance_tracker.latex.factories.chart_graph_factory import ChartGraphFactory
 from performance_tracker.latex.factories.data_and_recommendations import (
     DataAndRecommendationsFactory,
@@ -11,42 +10,44 @@ from performance_tracker.latex.factories.data_and_recommendations import (
 from performance_tracker.latex.factories.full_width_rule_factory import (
     FullWidthRuleFactory,
 )
+from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.latex.factories.new_page_factory import NewPageFactory
 from performance_tracker.latex.factories.price_target_factory import PriceTargetFactory
 from performance_tracker.latex.factories.section_heading_factory import (
     SectionHeadingFactory,
 )
+from performance_tracker.preview.compose import PREVIEW_FILE_NAME, PreviewComposer
+from performance_tracker.utils.progress import ProgressCallback
 
+RESULT_FILES = {"pdf": "main.pdf", "html": PREVIEW_FILE_NAME}
 
-class Worker:
-    def __init__(
-        self, df: pd.DataFrame, config_dict: dict, output_dir: Path, shared_data: dict
-    ) -> None:
-        self.df = df
-        self.config_dict: dict = config_dict
-        self.output_dir = output_dir
-        self.shared_data = shared_data
-
-    def __call__(self) -> None:
-        self._thread = threading.Thread(target=self.run_task, daemon=True)
-        self._thread.start()
-
-    def run_task(self) -> None:
-        composer = LaTeXComposer(
-            [
-                SectionHeadingFactory(),
-                ChartGraphFactory(),
-                DataAndRecommendationsFactory(),
-                PriceTargetFactory(),
-                FullWidthRuleFactory(),
-                NewPageFactory(),
-            ]
-        )
-
-        composer(self.df, self.config_dict, self.output_dir)
-
-        self.shared_data["done"] = True
-        self.shared_data["is_running"] = False
-        self.shared_data["reloaded"] = False
-
-        print("...done!")
+
+def report_factories(build_dir: Path = LATEX_BUILD_DIR) -> list[LaTeXFactoryBase]:
+    return [
+        SectionHeadingFactory(),
+        ChartGraphFactory(data_dir=build_dir),
+        DataAndRecommendationsFactory(),
+        PriceTargetFactory(),
+        FullWidthRuleFactory(),
+        NewPageFactory(),
+    ]
+
+
+def create_composer(
+    output: str, progress: ProgressCallback | None = None
+) -> LaTeXComposer:
+    if output == "html":
+        return PreviewComposer(progress=progress)
+
+    return LaTeXComposer(report_factories(), parallel_pages=True, progress=progress)
+
+
+def run_report(
+    df: pd.DataFrame,
+    config_dict: dict,
+    output_dir: Path,
+    output: str = "pdf",
+    progress: ProgressCallback | None = None,
+) -> None:
+    composer = create_composer(output, progress)
+    composer(df, config_dict, output_dir)
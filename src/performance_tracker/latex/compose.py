@@ -1,112 +1,414 @@
-import random
+import json
+import os
+import re
 import shutil
-import subprocess
 import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 import pandas as pd
 import yfinance as yf
 
-from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
-from performance_tracker.latex.factories.section_heading_factory import (
-    SectionHeadingFactory,
+from performance_tracker.latex.engine import (
+    EXTERNALIZE_PREAMBLE,
+    LATEX_BUILD_DIR,
+    LATEX_RESOURCE_PATH,
+    LaTeXEngine,
+    digest,
+    name_figures,
 )
+from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.latex.sidebar import Sidebar
 from performance_tracker.services.exchange_rate import ExchangeRateService
+from performance_tracker.services.history_store import (
+    HistoryStore,
+    get_history_store,
+)
 from performance_tracker.services.inflation import InflationService
-from performance_tracker.services.ticker import get_tickers
-from performance_tracker.utils.join import join_all_df
+from performance_tracker.services.ticker import (
+    TickerSnapshot,
+    get_snapshot,
+    get_tickers,
+)
+from performance_tracker.utils.join import (
+    BenchmarkContext,
+    build_benchmark_context,
+    join_all_df,
+)
+from performance_tracker.utils.memory import track_memory
+from performance_tracker.utils.profiling import profile, profiled
+from performance_tracker.utils.progress import ProgressCallback, ProgressTracker
+
+BUILD_FILE_TTL = 60 * 60 * 24 * 7
+# chart series the pages read from the build directory
+DATA_TABLE_PATTERN = re.compile(r"chart-[0-9a-f]+\.dat")
+
+# relative duration of the stages of a report, compiling dominates
+LATEX_STAGES = {"fetch": 3, "generate": 1, "compile": 6}
+
+MAX_FETCH_WORKERS = 8
 
-LATEX_RESOURCE_PATH = Path(__file__).parent / "resources"
+# the factories only read the symbol of the comparison ticker
+COMPARISON_FIELDS = ("info",)
+
+
+@dataclass(frozen=True, slots=True)
+class PrefetchedPosition:
+    ticker_info: dict
+    ticker: yf.Ticker
+    snapshot: TickerSnapshot
+    comparison_ticker: yf.Ticker
+    comparison: TickerSnapshot
+    combined_df: pd.DataFrame | None = None
 
 
 class LaTeXComposer:
-    def __init__(self, factories: list[LaTeXFactoryBase]) -> None:
+    _stages = LATEX_STAGES
+
+    def __init__(
+        self,
+        factories: list[LaTeXFactoryBase],
+        max_workers: int = MAX_FETCH_WORKERS,
+        build_dir: Path = LATEX_BUILD_DIR,
+        parallel_pages: bool = False,
+        max_render_workers: int | None = None,
+        *,
+        progress: ProgressCallback | None = None,
+        history_store: HistoryStore | None = None,
+        inflation_service: InflationService | None = None,
+    ) -> None:
         self._factories = factories
-        self._exchange_rate_service = ExchangeRateService()
-        self._inflation_service = InflationService()
+        self._max_workers = max_workers
+        self._build_dir = build_dir
+        self._parallel_pages = parallel_pages
+        self._max_render_workers = max_render_workers or os.cpu_count() or 1
+        self._engine = LaTeXEngine(build_dir)
+        self._history_store = history_store or get_history_store()
+        self._exchange_rate_service = ExchangeRateService(self._history_store)
+        self._inflation_service = inflation_service or InflationService()
+        self._progress = progress
+        self._tracker = ProgressTracker(self._stages, progress)
 
     def __call__(self, df: pd.DataFrame, config_dict: dict, output_dir: Path) -> None:
-        file_names = list()
-        sidebar = Sidebar(df, self._exchange_rate_service, config_dict)
-
-        for i in range(len(df)):
-            row = df.iloc[i]
-            ticker_info = {
-                "symbol": row["Ticker"],
-                "quantity": row["Quantity"],
-                "buy_date": row["Purchase Date"],
-                "sell_date": row["Sell Date"],
-                "buy_price": row["Purchase Date"],
-                "sell_price": row["Sell Price"],
-            }
+        self.prune_build_dir()
+
+        as_of = pd.Timestamp.now().strftime("%Y-%m-%d")
+        page_names = [
+            self.page_name(df.iloc[i], config_dict, as_of) for i in range(len(df))
+        ]
+        pending = {
+            i
+            for i, page_name in enumerate(page_names)
+            if not self._reuse_page(page_name)
+        }
+
+        self._tracker = ProgressTracker(self._stages, self._progress)
+
+        pages = list()
+        with self._tracker.stage("fetch", len(pending)), track_memory("fetch"):
+            positions = self._prefetch(df, config_dict, pending)
+            sidebar = Sidebar(
+                df,
+                self._exchange_rate_service,
+                config_dict,
+                {
+                    position.ticker_info["symbol"]: position.snapshot
+                    for position in positions
+                    if position is not None
+                },
+            )
+
+        with self._tracker.stage("generate", len(pending)), track_memory("generate"):
+            for i, position in enumerate(positions):
+                if position is None:
+                    continue
+
+                if i in pending:
+                    with track_memory("page", position.ticker_info["symbol"]):
+                        latex_output = self._iterate_factories(
+                            position.ticker_info,
+                            position.combined_df,
+                            position.snapshot,
+                            position.comparison,
+                            config_dict,
+                        )
+
+                        page = name_figures(
+                            "\n".join(
+                                "\n" if output is None else output
+                                for output in latex_output
+                            )
+                        )
+                        if None in latex_output:
+                            # not stored under its inputs, so the next report
+                            # generates the page again
+                            page_names[i] = self.save_content_addressed("page", page)
+                        else:
+                            self.save_output(page, page_names[i], self._build_dir)
+                    self._tracker.advance("generate", position.ticker_info["symbol"])
+
+                pages.append(
+                    [self.save_content_addressed("sidebar", sidebar(i)), page_names[i]]
+                )
+
+        self.copy_latex_cls(output_dir)
+
+        file_names = [name for page in pages for name in page]
+        if self._parallel_pages:
+            part_names = self.create_part_texs(pages, output_dir)
+            self.create_merge_tex(part_names, output_dir)
+        else:
+            self.create_main_tex(file_names, output_dir)
+
+        with self._tracker.stage("compile"), track_memory("compile"):
+            if self.restore_document(output_dir):
+                return
+
+            rendered = None
+            if self._parallel_pages:
+                rendered = self.render_parts(part_names, output_dir)
+
+            if rendered is None:
+                # a position spans several pages, which only a single document
+                # numbers correctly
+                self.create_main_tex(file_names, output_dir)
+                if self.restore_document(output_dir):
+                    return
+
+                rendered = self.render_latex(output_dir)
+
+            if rendered:
+                self.store_document(output_dir)
+
+    def page_name(self, row: pd.Series, config_dict: dict, as_of: str) -> str:
+        inputs = json.dumps(
+            {
+                "position": row.to_dict(),
+                "config": config_dict,
+                "as_of": as_of,
+                "factories": [factory.cache_key() for factory in self._factories],
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+        return f"page-{digest(inputs)}.tex"
+
+    def save_content_addressed(self, prefix: str, content: str) -> str:
+        file_name = f"{prefix}-{digest(content)}.tex"
+
+        if not self._reuse(self._build_dir / file_name):
+            self.save_output(content, file_name, self._build_dir)
+
+        return file_name
+
+    def restore_document(self, output_dir: Path) -> bool:
+        cached_pdf = self._build_dir / self.document_name(output_dir)
+        if not self._reuse(cached_pdf):
+            return False
+
+        shutil.copy2(cached_pdf, output_dir / "main.pdf")
+
+        return True
+
+    def store_document(self, output_dir: Path) -> None:
+        pdf_path = output_dir / "main.pdf"
+        if pdf_path.exists():
+            self._build_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(pdf_path, self._build_dir / self.document_name(output_dir))
+
+    def document_name(self, output_dir: Path) -> str:
+        main_tex = (output_dir / "main.tex").read_text(encoding="utf-8")
+        latex_cls = (LATEX_RESOURCE_PATH / "perftracker.cls").read_text(
+            encoding="utf-8"
+        )
+
+        return f"document-{digest(main_tex + latex_cls)}.pdf"
+
+    def prune_build_dir(self) -> None:
+        if not self._build_dir.exists():
+            return
+
+        expired = time.time() - BUILD_FILE_TTL
+        for path in self._build_dir.iterdir():
+            if path.is_file() and path.stat().st_mtime < expired:
+                path.unlink(missing_ok=True)
+
+    def _reuse_page(self, page_name: str) -> bool:
+        page_path = self._build_dir / page_name
+        if not self._reuse(page_path):
+            return False
+
+        # the chart tables of the page are pruned as well
+        return all(
+            self._reuse(self._build_dir / table)
+            for table in DATA_TABLE_PATTERN.findall(
+                page_path.read_text(encoding="utf-8")
+            )
+        )
+
+    @classmethod
+    def _reuse(cls, path: Path) -> bool:
+        if not path.exists():
+            return False
+
+        # keep files that are still in use from being pruned
+        path.touch()
+
+        return True
+
+    def _prefetch(
+        self, df: pd.DataFrame, config_dict: dict, pending: set[int] | None = None
+    ) -> list[PrefetchedPosition | None]:
+        rows = [df.iloc[i] for i in range(len(df))]
+        comparison_ticker = get_tickers(
+            config_dict.get("comparison_ticker", "EUNL.DE")
+        )[0]
+        comparison = get_snapshot(comparison_ticker, COMPARISON_FIELDS)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self._max_workers, len(rows)))
+        ) as executor:
+            positions = list(
+                executor.map(
+                    lambda row: self._resolve_position(
+                        row, comparison_ticker, comparison
+                    ),
+                    rows,
+                )
+            )
 
-            if not ticker_info["symbol"]:
-                continue
+            # positions with a generated page only need their snapshot
+            selected = {
+                i: position
+                for i, position in enumerate(positions)
+                if position is not None and (pending is None or i in pending)
+            }
+            if not selected:
+                return positions
 
-            file_name = ticker_info["symbol"] + str(random.randint(0, 2**32)) + ".tex"
+            resolved = list(selected.values())
+            self._prefetch_histories(resolved, config_dict)
+            benchmark = self._build_benchmark(resolved[0], config_dict)
 
-            tickers = get_tickers(
-                names=[
-                    ticker_info["symbol"],
-                    config_dict.get("comparison_ticker", "EUNL.DE"),
-                ]
+            joined = executor.map(
+                lambda position: self._join_position(position, config_dict, benchmark),
+                resolved,
             )
-            ticker, comparison_ticker = tickers[0], tickers[1]
+            for i, position in zip(selected, joined, strict=True):
+                positions[i] = position
 
-            if not ticker:
-                continue
+            return positions
 
+    def _resolve_position(
+        self,
+        row: pd.Series,
+        comparison_ticker: yf.Ticker,
+        comparison: TickerSnapshot,
+    ) -> PrefetchedPosition | None:
+        ticker_info: dict = {
+            "symbol": row["Ticker"],
+            "quantity": row["Quantity"],
+            "buy_date": row["Purchase Date"],
+            "sell_date": row["Sell Date"],
+            "buy_price": row["Purchase Date"],
+            "sell_price": row["Sell Price"],
+        }
+
+        if not ticker_info["symbol"]:
+            return None
+
+        ticker = get_tickers(names=ticker_info["symbol"])[0]
+
+        if not ticker:
+            return None
+
+        return PrefetchedPosition(
+            ticker_info,
+            ticker,
+            get_snapshot(ticker),
+            comparison_ticker,
+            comparison,
+        )
+
+    def _prefetch_histories(
+        self, positions: list[PrefetchedPosition], config_dict: dict
+    ) -> None:
+        to_currency = config_dict.get("currency", "EUR")
+        comparison = positions[0].comparison
+
+        self._history_store.prefetch(
+            [position.snapshot.symbol for position in positions] + [comparison.symbol],
+            period=config_dict.get("period", "10y"),
+        )
+        self._exchange_rate_service.prefetch(
+            [position.snapshot.info.get("currency", "USD") for position in positions]
+            + [comparison.info.get("currency", "USD"), to_currency]
+        )
+
+    def _build_benchmark(
+        self, position: PrefetchedPosition, config_dict: dict
+    ) -> BenchmarkContext:
+        return build_benchmark_context(
+            position.comparison.info.get("currency", "USD"),
+            position.comparison_ticker,
+            config_dict,
+            self._exchange_rate_service,
+            self._inflation_service,
+            config_dict.get("currency", "EUR"),
+            self._history_store,
+        )
+
+    def _join_position(
+        self,
+        position: PrefetchedPosition | None,
+        config_dict: dict,
+        benchmark: BenchmarkContext,
+    ) -> PrefetchedPosition | None:
+        if position is None:
+            return None
+
+        with track_memory("join", position.ticker_info["symbol"]):
             combined_df = join_all_df(
-                comparison_ticker.info.get("currency"),
-                comparison_ticker,
+                benchmark,
                 config_dict,
-                ticker.info.get("currency"),
+                position.snapshot.info.get("currency", "USD"),
                 self._exchange_rate_service,
-                self._inflation_service,
-                ticker,
+                position.ticker,
                 config_dict.get("currency", "EUR"),
+                self._history_store,
             )
 
-            latex_output = self._iterate_factories(
-                ticker_info,
-                combined_df,
-                ticker,
-                comparison_ticker,
-                config_dict,
-                i,
-                sidebar,
-            )
-
-            self.save_output(
-                "\n".join(latex_output),
-                file_name,
-                output_dir,
-            )
+        self._tracker.advance("fetch", position.ticker_info["symbol"])
 
-            file_names.append(file_name)
+        return replace(position, combined_df=combined_df)
 
-        self.copy_latex_cls(output_dir)
-        self.create_main_tex(file_names, output_dir)
-        self.render_latex(output_dir)
-
-    def _generate(self, factory: LaTeXFactoryBase, **kwargs: object) -> str:
-        print(f"at {factory}")
+    def _generate(self, factory: LaTeXFactoryBase, **kwargs: object) -> str | None:
+        start = time.perf_counter()
         try:
-            return factory(**kwargs)
+            with profile(type(factory).__name__, "factory") as span:
+                output = factory(**kwargs)
+                span.output_bytes = len(output.encode("utf-8"))
+                return output
         except Exception:
-            return "\n"
+            return None
+        finally:
+            self._tracker.record(
+                f"generate {type(factory).__name__}", time.perf_counter() - start
+            )
 
     def _iterate_factories(
         self,
         ticker_info: dict,
-        combined_df: pd.DataFrame,
-        ticker: yf.Ticker,
-        comparison_ticker: yf.Ticker,
+        combined_df: pd.DataFrame | None,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         config_dict: dict,
-        index: int,
-        sidebar: Sidebar,
-    ) -> list[str]:
+    ) -> list[str | None]:
+        """The output of every factory, None where it failed."""
         latex_output = list()
 
         for factory in self._factories:
@@ -122,9 +424,6 @@ class LaTeXComposer:
             )
             latex_output.append(output)
 
-            if type(factory) is SectionHeadingFactory:
-                latex_output.append(sidebar(index))
-
         return latex_output
 
     def save_output(self, output: str, filename: str, output_dir: Path) -> None:
@@ -141,6 +440,7 @@ class LaTeXComposer:
     def create_main_tex(self, file_names: list, output_dir: Path) -> None:
         content = textwrap.dedent(rf"""
         \documentclass{{perftracker}}
+        {EXTERNALIZE_PREAMBLE}
 
         \begin{{document}}
 
@@ -152,22 +452,105 @@ class LaTeXComposer:
         main_tex_path = output_dir / "main.tex"
         main_tex_path.write_text(content, encoding="utf-8")
 
-    def render_latex(self, output_dir: Path) -> None:
-        main_tex_path = output_dir / "main.tex"
+    def create_part_texs(self, pages: list[list[str]], output_dir: Path) -> list[str]:
+        part_names = list()
 
-        print(f"main_tex_path: {main_tex_path}")
+        for page_number, file_names in enumerate(pages, start=1):
+            # every position is a single page, render_part checks it
+            content = textwrap.dedent(rf"""
+            \documentclass{{perftracker}}
+            {EXTERNALIZE_PREAMBLE}
+            \setpagetotal{{{len(pages)}}}
 
-        command = ["latexmk", "-pdf", "-interaction=nonstopmode", main_tex_path.name]
+            \begin{{document}}
+            \setcounter{{page}}{{{page_number}}}
 
-        try:
-            subprocess.run(
-                command,
-                cwd=str(main_tex_path.parent),
-                # capture_output=True,
-                # text=True,
-                check=True,
+            {"\n".join([rf"\input{{{f}}}" for f in file_names])}
+
+            \end{{document}}
+            """)
+
+            # compiled parts are stale once the class or the engine changes
+            part_name = f"part-{digest(content + self._engine.format_id())}"
+            self.save_output(content, f"{part_name}.tex", output_dir / "parts")
+            part_names.append(part_name)
+
+        return part_names
+
+    def create_merge_tex(self, part_names: list[str], output_dir: Path) -> None:
+        # pdfpages places the pages as pictures, the links of the class footer
+        # are lost in the merged document
+        content = textwrap.dedent(rf"""
+        \documentclass[a4paper]{{article}}
+        \usepackage{{pdfpages}}
+
+        \begin{{document}}
+
+        {"\n".join([rf"\includepdf[pages=-, fitpaper]{{{p}.pdf}}" for p in part_names])}
+
+        \end{{document}}
+        """)
+
+        main_tex_path = output_dir / "main.tex"
+        main_tex_path.write_text(content, encoding="utf-8")
+
+    @profiled("render")
+    def render_parts(self, part_names: list[str], output_dir: Path) -> bool | None:
+        """Renders the pages separately, None if one does not fit on a page."""
+        missing = [
+            part_name
+            for part_name in part_names
+            if not self._reuse(self._build_dir / f"{part_name}.pdf")
+        ]
+
+        # every missing page and the merge
+        self._tracker.set_total("compile", len(missing) + 1)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self._max_render_workers, len(missing)))
+        ) as executor:
+            rendered = list(
+                executor.map(
+                    lambda part_name: self.render_part(part_name, output_dir / "parts"),
+                    missing,
+                )
             )
-        except subprocess.CalledProcessError as e:
-            print("Failed to render")
-            print(f"STDOUT: {e.stdout}\n\n\n\n")
-            print(f"STDERR: {e.stderr}")
+
+        if None in rendered:
+            return None
+
+        if not all(rendered):
+            return False
+
+        # pdfpages only places the finished pages
+        return self._engine.compile(
+            "main.tex", output_dir, max_passes=1, use_format=False
+        )
+
+    @profiled("render")
+    def render_part(self, part_name: str, parts_dir: Path) -> bool | None:
+        if not self._engine.compile(f"{part_name}.tex", parts_dir):
+            return False
+
+        # the numbering of create_part_texs is off if a position overflows
+        pages = self._engine.page_count(parts_dir / f"{part_name}.log")
+        if pages is not None and pages != 1:
+            return None
+
+        self._build_dir.mkdir(parents=True, exist_ok=True)
+        # write next to the target first, concurrent reports may share parts
+        tmp_path = (
+            self._build_dir
+            / f"{part_name}.pdf.{os.getpid()}-{threading.get_ident()}.tmp"
+        )
+        shutil.copy2(parts_dir / f"{part_name}.pdf", tmp_path)
+        tmp_path.replace(self._build_dir / f"{part_name}.pdf")
+        self._tracker.advance("compile", part_name)
+
+        return True
+
+    @profiled("render")
+    def render_latex(self, output_dir: Path) -> bool:
+        main_tex_path = output_dir / "main.tex"
+
+        return self._engine.compile(main_tex_path.name, main_tex_path.parent)
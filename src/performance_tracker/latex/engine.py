@@ -0,0 +1,279 @@
+import hashlib
+import os
+import re
+import subprocess
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from cachetools import TTLCache
+
+from performance_tracker.utils.cache import SharedCache
+from performance_tracker.utils.paths import CACHE_DIR
+
+LATEX_RESOURCE_PATH = Path(__file__).parent / "resources"
+
+# pages, sidebars, chart tables and documents are named after their inputs,
+# so they are shared between reports and runs
+LATEX_BUILD_DIR = CACHE_DIR / "latex"
+
+LATEX_ENGINE = "pdflatex"
+# TeX processes of all reports in this process
+MAX_LATEX_PROCESSES = os.cpu_count() or 1
+MAX_LATEX_PASSES = 3
+RERUN_PATTERN = re.compile(r"Rerun to get|Label\(s\) may have changed|Rerun LaTeX")
+PAGES_PATTERN = re.compile(r"Output written on .+? \((\d+) pages?,", re.DOTALL)
+FIGURE_PATTERN = re.compile(r"\\begin\{tikzpicture\}.*?\\end\{tikzpicture\}", re.DOTALL)
+
+# only pictures named by name_figures are externalized, the page decoration
+# of the class is drawn in place; the engine builds the missing ones itself
+EXTERNALIZE_PREAMBLE = (
+    r"\usetikzlibrary{external}"
+    r"\tikzexternalize[mode=list and make, only named=true]"
+)
+
+FORMAT_PREAMBLE = r"""
+\documentclass{perftracker}
+% documents keep their \documentclass line, the class is already in the format
+\renewcommand{\documentclass}[2][]{}
+\dump
+"""
+
+
+def digest(content: str) -> str:
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+
+def name_figures(latex: str) -> str:
+    # the class sets fonts and colours of every figure
+    latex_cls = (LATEX_RESOURCE_PATH / "perftracker.cls").read_text(encoding="utf-8")
+
+    return FIGURE_PATTERN.sub(
+        lambda figure: (
+            rf"\tikzsetnextfilename{{fig-{digest(latex_cls + figure.group(0))}}}"
+            + "\n"
+            + figure.group(0)
+        ),
+        latex,
+    )
+
+
+@lru_cache(maxsize=1)
+def engine_version() -> str:
+    try:
+        result = subprocess.run(
+            [LATEX_ENGINE, "--version"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+class LaTeXEngine:
+    _format_lock = threading.Lock()
+    _process_slots = threading.BoundedSemaphore(MAX_LATEX_PROCESSES)
+    # a figure shared by concurrent documents is built once
+    _figure_builds = SharedCache("latex_figures", TTLCache(maxsize=1024, ttl=60))
+
+    def __init__(
+        self, build_dir: Path = LATEX_BUILD_DIR, use_format: bool = True
+    ) -> None:
+        self._build_dir = build_dir
+        self._use_format = use_format
+        self._format_failed = False
+
+    def compile(
+        self,
+        tex_name: str,
+        cwd: Path,
+        max_passes: int = MAX_LATEX_PASSES,
+        use_format: bool = True,
+    ) -> bool:
+        command = [LATEX_ENGINE, "-interaction=nonstopmode"]
+
+        format_name = self.format_name() if use_format else None
+        if format_name is not None:
+            command.append(f"-fmt={format_name}")
+
+        command.append(tex_name)
+
+        job = Path(tex_name).stem
+        aux_path = cwd / f"{job}.aux"
+
+        for pass_number in range(max_passes):
+            previous_aux = aux_path.read_bytes() if aux_path.exists() else None
+
+            if not self._run(command, cwd):
+                return False
+
+            # the first pass only lists the figures, place them in the next one
+            if pass_number == 0 and self.build_figures(job, cwd, format_name):
+                continue
+
+            if not self.needs_rerun(cwd / f"{job}.log", aux_path, previous_aux):
+                break
+
+        return True
+
+    def build_figures(self, job: str, cwd: Path, format_name: str | None) -> bool:
+        figlist_path = cwd / f"{job}.figlist"
+        if not figlist_path.exists():
+            return False
+
+        missing = list()
+        for figure in figlist_path.read_text(encoding="utf-8").split():
+            figure_path = self._build_dir / f"{figure}.pdf"
+            if figure_path.exists():
+                figure_path.touch()
+            else:
+                missing.append(figure)
+
+        if not missing:
+            return False
+
+        # more threads would only wait for the process slots
+        with ThreadPoolExecutor(
+            max_workers=min(len(missing), MAX_LATEX_PROCESSES)
+        ) as executor:
+            list(
+                executor.map(
+                    lambda figure: self._figure_builds.get_or_load(
+                        (self._build_dir, figure),
+                        lambda: self._build_figure(figure, job, cwd, format_name),
+                    ),
+                    missing,
+                )
+            )
+
+        return True
+
+    def _build_figure(
+        self, figure: str, job: str, cwd: Path, format_name: str | None
+    ) -> bool:
+        command = [LATEX_ENGINE, "-halt-on-error", "-interaction=batchmode"]
+        if format_name is not None:
+            command.append(f"-fmt={format_name}")
+        command += [
+            f"-jobname={figure}",
+            rf"\def\tikzexternalrealjob{{{job}}}\input{{{job}}}",
+        ]
+
+        if not self._run(command, cwd):
+            return False
+
+        self._build_dir.mkdir(parents=True, exist_ok=True)
+
+        # the depth file moves first, figures are only reused once the pdf exists
+        for suffix in (".dpth", ".pdf"):
+            built_path = cwd / f"{figure}{suffix}"
+            if not built_path.exists():
+                continue
+
+            # write next to the target first, concurrent reports share figures
+            tmp_path = (
+                self._build_dir
+                / f"{figure}{suffix}.{os.getpid()}-{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_bytes(built_path.read_bytes())
+            tmp_path.replace(self._build_dir / f"{figure}{suffix}")
+
+        return True
+
+    @classmethod
+    def format_id(cls) -> str:
+        """Names the class, the format and the engine that outputs depend on."""
+        latex_cls = (LATEX_RESOURCE_PATH / "perftracker.cls").read_text(
+            encoding="utf-8"
+        )
+
+        return f"perftracker-{digest(latex_cls + FORMAT_PREAMBLE + engine_version())}"
+
+    def format_name(self) -> str | None:
+        if not self._use_format or self._format_failed:
+            return None
+
+        format_name = self.format_id()
+        format_path = self._build_dir / f"{format_name}.fmt"
+
+        with self._format_lock:
+            if format_path.exists():
+                format_path.touch()
+                return format_name
+
+            # other processes and threads may share the build directory
+            job_name = f"{format_name}-{os.getpid()}-{threading.get_ident()}"
+            self._build_dir.mkdir(parents=True, exist_ok=True)
+            (self._build_dir / f"{job_name}.tex").write_text(
+                FORMAT_PREAMBLE, encoding="utf-8"
+            )
+
+            built = (
+                self._run(
+                    [
+                        LATEX_ENGINE,
+                        "-ini",
+                        "-interaction=nonstopmode",
+                        f"-jobname={job_name}",
+                        f"&{LATEX_ENGINE}",
+                        f"{job_name}.tex",
+                    ],
+                    self._build_dir,
+                )
+                and (self._build_dir / f"{job_name}.fmt").exists()
+            )
+
+            if built:
+                (self._build_dir / f"{job_name}.fmt").replace(format_path)
+
+        if not built:
+            # compile with the class as before
+            warnings.warn(
+                f"Couldn't build the LaTeX format {format_name}", stacklevel=2
+            )
+            self._format_failed = True
+            return None
+
+        return format_name
+
+    @classmethod
+    def needs_rerun(
+        cls, log_path: Path, aux_path: Path, previous_aux: bytes | None
+    ) -> bool:
+        if aux_path.exists() and aux_path.read_bytes() != previous_aux:
+            return True
+
+        return log_path.exists() and bool(
+            RERUN_PATTERN.search(log_path.read_text(encoding="latin-1"))
+        )
+
+    @classmethod
+    def page_count(cls, log_path: Path) -> int | None:
+        """The pages of the last output written to the log, if it is known."""
+        if not log_path.exists():
+            return None
+
+        pages = PAGES_PATTERN.findall(log_path.read_text(encoding="latin-1"))
+
+        return int(pages[-1]) if pages else None
+
+    def _run(self, command: list[str], cwd: Path) -> bool:
+        search_path = [str(self._build_dir), str(LATEX_RESOURCE_PATH), ""]
+
+        env = {
+            **os.environ,
+            # the trailing separator keeps the default search path
+            "TEXINPUTS": os.pathsep.join(search_path),
+            "TEXFORMATS": os.pathsep.join([str(self._build_dir), ""]),
+        }
+
+        try:
+            with self._process_slots:
+                subprocess.run(command, cwd=str(cwd), env=env, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            warnings.warn(f"Failed to render {command[-1]} in {cwd}: {e}", stacklevel=3)
+            return False
+
+        return True
@@ -1,25 +1,58 @@
+import hashlib
 import textwrap
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 from performance_tracker.utils.calc_df import total_minmax
+from performance_tracker.utils.downsample import downsample_positions
 from performance_tracker.utils.maps import currency_to_latex_symbol
 
 BASE_LEVEL = 100
 
+# points per series, a 10y chart has about 3650 daily values
+MAX_CHART_POINTS = 400
+CHART_PRECISION = 2
+
+# plotted columns and their names in external data tables
+CHART_SERIES = {
+    "interpolated_inflation_adjusted": "inflation",
+    "Close_Comparison_Adjusted": "comparison",
+    "Close_Adjusted": "close",
+}
+DATAPOINT_SEPARATOR = "\n\t\t\t\t\t"
+
 
 class ChartGraphFactory(LaTeXFactoryBase):
+    def __init__(
+        self,
+        max_points: int | None = MAX_CHART_POINTS,
+        precision: int | None = CHART_PRECISION,
+        data_dir: Path | None = None,
+    ) -> None:
+        """Chart of the position against its comparison and inflation.
+        :param max_points: points per series, None plots every day
+        :param precision: decimals of the values, None writes them unrounded
+        :param data_dir: LaTeX working directory to write the series to as
+            data tables instead of inlining them
+        """
+        self._max_points = max_points
+        self._precision = precision
+        self._data_dir = data_dir
+
     def generate(
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
@@ -42,6 +75,7 @@ class ChartGraphFactory(LaTeXFactoryBase):
         )
         graph_min = f"{min_val - 0.05 * (max_val - min_val):.2f}"
         graph_max = f"{max_val + 0.05 * (max_val - min_val):.2f}"
+        plots = self.get_plots(combined_df, self.get_dividend_dates(ticker.dividends))
 
         return textwrap.dedent(rf"""
         \begin{{center}}
@@ -92,23 +126,17 @@ class ChartGraphFactory(LaTeXFactoryBase):
                 \addplot[
                     red,
                     thin,
-                    ] coordinates {{
-                    {self.get_datapoints(combined_df, "interpolated_inflation_adjusted")}
-                }};
+                    ] {plots["interpolated_inflation_adjusted"]};
                 \addlegendentry{{Inflation}}
                 \addplot[
                     green,
                     thin,
-                    ] coordinates {{
-                    {self.get_datapoints(combined_df, "Close_Comparison_Adjusted")}
-                }};
+                    ] {plots["Close_Comparison_Adjusted"]};
                 \addlegendentry{{ {comparison_ticker.info.get("symbol", "Reference")} }}
                 \addplot[
                     mainColour,
                     thick,
-                    ] coordinates {{
-                    {self.get_datapoints(combined_df, "Close_Adjusted")}
-                }};
+                    ] {plots["Close_Adjusted"]};
                 %\addlegendentry{{Adjusted Value}}
                 \node[anchor=south east] at (axis description cs:1, 1.025)
                     {{ \textcolor{{mainColour}}{{ \textbf{{ {last_price:.2f} {currency_to_latex_symbol.get(ticker.info["currency"], "")} }} }} on {end_date.strftime("%d.%m.%Y")} }};
@@ -164,13 +192,119 @@ class ChartGraphFactory(LaTeXFactoryBase):
 
         return ",\n".join([ticks, labels])
 
+    def cache_key(self) -> str:
+        data_tables = self._data_dir is not None
+        return (
+            f"{super().cache_key()}:{self._max_points}:{self._precision}:{data_tables}"
+        )
+
+    def get_plots(
+        self, combined_df: pd.DataFrame, keep: pd.DatetimeIndex | None = None
+    ) -> dict[str, str]:
+        dates = self.get_iso_dates(combined_df.index)
+        positions = {
+            col: downsample_positions(combined_df.loc[:, col], self._max_points, keep)
+            for col in CHART_SERIES
+        }
+
+        if self._data_dir is None:
+            return {
+                col: "coordinates {"
+                + DATAPOINT_SEPARATOR
+                + self.format_datapoints(
+                    dates[rows],
+                    combined_df[col].to_numpy(dtype=float)[rows],
+                    self._precision,
+                )
+                + "\n}"
+                for col, rows in positions.items()
+            }
+
+        rows = np.unique(np.concatenate(list(positions.values())))
+        file_name = self.save_table(
+            self._data_dir,
+            dates[rows],
+            {
+                name: combined_df[col].to_numpy(dtype=float)[rows]
+                for col, name in CHART_SERIES.items()
+            },
+        )
+
+        return {
+            col: f"table[x=date, y={name}] {{{file_name}}}"
+            for col, name in CHART_SERIES.items()
+        }
+
+    def save_table(
+        self, data_dir: Path, dates: np.ndarray, columns: dict[str, np.ndarray]
+    ) -> str:
+        lines = dates.astype(object)
+        for values in columns.values():
+            lines = lines + " " + self.format_values(values, self._precision)
+
+        content = "\n".join(["date " + " ".join(columns), *lines]) + "\n"
+
+        # equal series share a file, so unchanged charts keep their name
+        digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+        file_name = f"chart-{digest}.dat"
+
+        data_dir.mkdir(parents=True, exist_ok=True)
+        file_path = data_dir / file_name
+        if file_path.exists():
+            # keep tables of new pages from being pruned
+            file_path.touch()
+        else:
+            file_path.write_text(content, encoding="utf-8")
+
+        return file_name
+
     @classmethod
-    def get_datapoints(cls, df: pd.DataFrame, val_col: str) -> str:
-        datapoints = [
-            f"({dt.strftime("%Y-%m-%d")}, {val})" for dt, val in df[val_col].items()
-        ]
+    def get_dividend_dates(cls, dividends: pd.Series) -> pd.DatetimeIndex:
+        if dividends.empty or not isinstance(dividends.index, pd.DatetimeIndex):
+            return pd.DatetimeIndex([])
 
-        return "\n\t\t\t\t\t".join(datapoints)
+        return pd.DatetimeIndex(
+            dividends.index.tz_localize(None).to_numpy(dtype="datetime64[D]")
+        )
+
+    @classmethod
+    def get_datapoints(
+        cls, df: pd.DataFrame, val_col: str, precision: int | None = None
+    ) -> str:
+        return cls.format_datapoints(
+            cls.get_iso_dates(df.index),
+            df[val_col].to_numpy(dtype=float),
+            precision,
+        )
+
+    @classmethod
+    def format_datapoints(
+        cls, dates: np.ndarray, values: np.ndarray, precision: int | None
+    ) -> str:
+        values = cls.format_values(values, precision)
+        datapoints = "(" + dates.astype(object) + ", " + values + ")"
+
+        return DATAPOINT_SEPARATOR.join(datapoints)
+
+    @classmethod
+    def format_values(cls, values: np.ndarray, precision: int | None) -> np.ndarray:
+        if precision is None:
+            return values.astype(str).astype(object)
+
+        return np.char.mod(f"%.{precision}f", values).astype(object)
+
+    @classmethod
+    def get_iso_dates(cls, index: pd.Index) -> np.ndarray:
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+
+        # every position of a report shares the same daily calendar
+        if len(index) and (index[-1] - index[0]).days == len(index) - 1:
+            start = index[:1].to_numpy(dtype="datetime64[D]")[0]
+            return _daily_iso_dates(start, len(index))
+
+        return np.datetime_as_string(index.to_numpy(dtype="datetime64[D]"), unit="D")
 
     @classmethod
     def get_percent_performance(cls, df: pd.DataFrame, val_col: str) -> str:
@@ -180,3 +314,11 @@ class ChartGraphFactory(LaTeXFactoryBase):
             return rf"\textcolor{{green!70!black}}{{ \textbf{{ +{last_performance - BASE_LEVEL:.2f}\% }}}}"
         else:
             return rf"\textcolor{{red!70!black}}{{ \textbf{{ -{BASE_LEVEL - last_performance:.2f}\% }}}}"
+
+
+@lru_cache(maxsize=32)
+def _daily_iso_dates(start: np.datetime64, periods: int) -> np.ndarray:
+    dates = np.datetime_as_string(start + np.arange(periods), unit="D")
+    dates.flags.writeable = False
+
+    return dates
@@ -1,15 +1,16 @@
 import textwrap
 
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 from performance_tracker.utils.maps import currency_to_latex_symbol
 from performance_tracker.utils.short_number_rep import short_rep
 
 PERFORMANCE_THRESHOLD = 50
+RECOMMENDATION_COLUMNS = ["strongBuy", "buy", "hold", "sell", "strongSell"]
 
 
 class DataAndRecommendationsFactory(LaTeXFactoryBase):
@@ -17,8 +18,8 @@ class DataAndRecommendationsFactory(LaTeXFactoryBase):
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
@@ -53,9 +54,7 @@ class DataAndRecommendationsFactory(LaTeXFactoryBase):
         if recommendations.empty:
             return "No recommendations available"
 
-        current_recommendations = recommendations.iloc[0]
-        cols = ["strongBuy", "buy", "hold", "sell", "strongSell"]
-        value_counts = {col: current_recommendations.get(col, 0) for col in cols}
+        value_counts = cls.get_recommendation_counts(recommendations)
         legend_entries = {
             "hold": f"Hold ({value_counts["hold"]})",
             "buy": f"Buy ({value_counts["buy"]})",
@@ -125,30 +124,34 @@ class DataAndRecommendationsFactory(LaTeXFactoryBase):
 
     @classmethod
     def get_data_table(
-        cls, ticker: Ticker, combined_df: pd.DataFrame, currency: str
+        cls, ticker: TickerSnapshot, combined_df: pd.DataFrame, currency: str
     ) -> str:
-        growth_estimate = ticker.growth_estimates
-        cashflow = ticker.cashflow
-        ticker_info = ticker.info
-
-        cashflow.columns = pd.to_datetime(cashflow.columns)
-        latest_date = cashflow.columns.max()
+        figures = cls.get_key_figures(ticker)
+        currency_symbol = currency_to_latex_symbol.get(currency, "USD")
 
         growth = ""
         free_cash_flow = ""
 
-        if not growth_estimate.empty:
-            growth = rf"{growth_estimate.loc["+1y", "stockTrend"] * 100:.1f}\%"
+        if figures["growth"] is not None:
+            growth = rf"{figures['growth'] * 100:.1f}\%"
 
-        if not cashflow.empty:
-            free_cash_flow = rf"{short_rep(cashflow.loc["Free Cash Flow", latest_date])} {currency_to_latex_symbol.get(currency, "USD")}"
+        if figures["free_cash_flow"] is not None:
+            free_cash_flow = (
+                rf"{short_rep(figures['free_cash_flow'])} {currency_symbol}"
+            )
 
-        operating_cash_flow = rf"{short_rep(ticker_info.get("operatingCashflow", None))} {currency_to_latex_symbol.get(currency, "USD")}"
-        enterprise_value = rf"{short_rep(ticker_info.get("enterpriseValue", None))} {currency_to_latex_symbol.get(currency, "USD")}"
-        employees = rf"{short_rep(ticker_info.get("fullTimeEmployees", None))}"
-        overall_risk = rf"{ticker_info.get("overallRisk", None)}"
-        five_year_avg_dividend = rf"{short_rep(ticker_info.get("fiveYearAvgDividendYield", None))} {currency_to_latex_symbol.get(currency, "USD")}"
-        beta = rf"{ticker_info.get("beta", None):.3f}"
+        operating_cash_flow = (
+            rf"{short_rep(figures['operating_cash_flow'])} {currency_symbol}"
+        )
+        enterprise_value = (
+            rf"{short_rep(figures['enterprise_value'])} {currency_symbol}"
+        )
+        employees = rf"{short_rep(figures['employees'])}"
+        overall_risk = rf"{figures['overall_risk']}"
+        five_year_avg_dividend = (
+            rf"{short_rep(figures['five_year_avg_dividend'])} {currency_symbol}"
+        )
+        beta = rf"{figures['beta']:.3f}"
 
         larger_than_reference_text = cls.get_percentage_larger(
             combined_df,
@@ -190,6 +193,18 @@ class DataAndRecommendationsFactory(LaTeXFactoryBase):
     def get_percentage_larger(
         cls, df: pd.DataFrame, first_col: str, second_col: str
     ) -> str:
+        percentage_larger_than = cls.get_share_larger(df, first_col, second_col)
+        larger_than_color = (
+            "mainColour" if percentage_larger_than >= PERFORMANCE_THRESHOLD else "red"
+        )
+        larger_than_textform = rf"\textcolor{{{larger_than_color}}}{{\textbf{{ {percentage_larger_than:.1f}\% }}}}"
+
+        return larger_than_textform
+
+    @classmethod
+    def get_share_larger(
+        cls, df: pd.DataFrame, first_col: str, second_col: str
+    ) -> float:
         df_comp = df.dropna(subset=[first_col, second_col])
 
         count_larger_than = (df_comp[first_col] > df_comp[second_col]).sum()
@@ -197,10 +212,42 @@ class DataAndRecommendationsFactory(LaTeXFactoryBase):
         print(len(df_comp))
 
         total_comp = len(df_comp)
-        percentage_larger_than = (count_larger_than / total_comp) * 100
-        larger_than_color = (
-            "mainColour" if percentage_larger_than >= PERFORMANCE_THRESHOLD else "red"
+        return (count_larger_than / total_comp) * 100
+
+    @classmethod
+    def get_recommendation_counts(cls, recommendations: pd.DataFrame) -> dict:
+        if recommendations.empty:
+            return {col: 0 for col in RECOMMENDATION_COLUMNS}
+
+        current_recommendations = recommendations.iloc[0]
+        return {
+            col: current_recommendations.get(col, 0) for col in RECOMMENDATION_COLUMNS
+        }
+
+    @classmethod
+    def get_key_figures(cls, ticker: TickerSnapshot) -> dict:
+        growth_estimate = ticker.growth_estimates
+        cashflow = ticker.cashflow.set_axis(
+            pd.to_datetime(ticker.cashflow.columns), axis=1
         )
-        larger_than_textform = rf"\textcolor{{{larger_than_color}}}{{\textbf{{ {percentage_larger_than:.1f}\% }}}}"
+        ticker_info = ticker.info
 
-        return larger_than_textform
+        growth = None
+        free_cash_flow = None
+
+        if not growth_estimate.empty:
+            growth = growth_estimate.loc["+1y", "stockTrend"]
+
+        if not cashflow.empty:
+            free_cash_flow = cashflow.loc["Free Cash Flow", cashflow.columns.max()]
+
+        return {
+            "growth": growth,
+            "free_cash_flow": free_cash_flow,
+            "operating_cash_flow": ticker_info.get("operatingCashflow", None),
+            "enterprise_value": ticker_info.get("enterpriseValue", None),
+            "employees": ticker_info.get("fullTimeEmployees", None),
+            "overall_risk": ticker_info.get("overallRisk", None),
+            "five_year_avg_dividend": ticker_info.get("fiveYearAvgDividendYield", None),
+            "beta": ticker_info.get("beta", None),
+        }
@@ -1,9 +1,9 @@
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 
 
 class EndPageFactory(LaTeXFactoryBase):
@@ -11,8 +11,8 @@ class EndPageFactory(LaTeXFactoryBase):
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
@@ -1,11 +1,11 @@
 import textwrap
 
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 
 
 class FullWidthRuleFactory(LaTeXFactoryBase):
@@ -13,8 +13,8 @@ class FullWidthRuleFactory(LaTeXFactoryBase):
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
@@ -1,22 +1,25 @@
 from abc import ABC, abstractmethod
 
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 
 
 class LaTeXFactoryBase(ABC):
     """Base Factory to generate LaTeX code."""
 
+    # bump when the generated code changes, so cached pages are regenerated
+    version = 1
+
     @abstractmethod
     def generate(
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
@@ -26,7 +29,7 @@ class LaTeXFactoryBase(ABC):
         :param combined_df:
         :param inflation_service:
         :param comparison_ticker:
-        :param ticker: yfinance ticker of isin
+        :param ticker: snapshot of the ticker of isin
         :param exchanger:
         :param configdict: configdict of input
         """
@@ -34,3 +37,6 @@ class LaTeXFactoryBase(ABC):
 
     def __call__(self, **kwargs) -> str:
         return self.generate(**kwargs)
+
+    def cache_key(self) -> str:
+        return f"{type(self).__qualname__}:{self.version}"
@@ -1,45 +1,47 @@
 import textwrap
+from dataclasses import dataclass
 
 import pandas as pd
-from yfinance import Ticker
 
 from performance_tracker.latex.factories.latex_factory_base import LaTeXFactoryBase
 from performance_tracker.services.exchange_rate import ExchangeRateService
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.services.ticker import TickerSnapshot
 from performance_tracker.utils.maps import currency_to_latex_symbol
 
 
+@dataclass(frozen=True, slots=True)
+class PriceRange:
+    current: float
+    minimum: float
+    maximum: float
+    mean: float | None
+    median: float | None
+    # shown span of prices, starting at offset
+    display_width: float
+    offset: float
+
+
 class PriceTargetFactory(LaTeXFactoryBase):
     def generate(
         self,
         ticker_info: dict,
         combined_df: pd.DataFrame,
-        ticker: Ticker,
-        comparison_ticker: Ticker,
+        ticker: TickerSnapshot,
+        comparison_ticker: TickerSnapshot,
         inflation_service: InflationService,
         exchanger: ExchangeRateService,
         configdict: dict | None = None,
     ) -> str:
         currency = ticker.info.get("currency", "USD")
-        price_targets = ticker.analyst_price_targets
-        current = ticker.info.get("previousClose", 0)
-        high = price_targets.get("high", None)
-        low = price_targets.get("low", None)
-        mean = price_targets.get("mean", None)
-        median = price_targets.get("median", None)
-
-        maximum = max([x for x in [current, high, low] if x is not None], default=0)
-        minimum = max(
-            min([x for x in [current, high, low] if x is not None], default=0), 0
-        )
-        width = maximum - minimum
-
-        if width == 0:
-            display_width = 1
-            offset = current - display_width / 2
-        else:
-            display_width = 1.25 * width
-            offset = minimum - 0.125 * width
+        price_range = self.get_price_range(ticker)
+        current = price_range.current
+        minimum = price_range.minimum
+        maximum = price_range.maximum
+        mean = price_range.mean
+        median = price_range.median
+        display_width = price_range.display_width
+        offset = price_range.offset
 
         min_draw = self.get_target_rep(
             current,
@@ -90,6 +92,36 @@ class PriceTargetFactory(LaTeXFactoryBase):
             \end{{tikzpicture}}
             """)
 
+    @classmethod
+    def get_price_range(cls, ticker: TickerSnapshot) -> PriceRange:
+        price_targets = ticker.analyst_price_targets
+        current = ticker.info.get("previousClose", 0)
+        high = price_targets.get("high", None)
+        low = price_targets.get("low", None)
+
+        maximum = max([x for x in [current, high, low] if x is not None], default=0)
+        minimum = max(
+            min([x for x in [current, high, low] if x is not None], default=0), 0
+        )
+        width = maximum - minimum
+
+        if width == 0:
+            display_width = 1
+            offset = current - display_width / 2
+        else:
+            display_width = 1.25 * width
+            offset = minimum - 0.125 * width
+
+        return PriceRange(
+            current=current,
+            minimum=minimum,
+            maximum=maximum,
+            mean=price_targets.get("mean", None),
+            median=price_targets.get("median", None),
+            display_width=display_width,
+            offset=offset,
+        )
+
     @classmethod
     def get_target_rep(
         cls,
@@ -4,63 +4,80 @@ import textwrap
 import pandas as pd
 
 from performance_tracker.services.exchange_rate import ExchangeRateService
-from performance_tracker.services.ticker import get_tickers
+from performance_tracker.services.ticker import TickerSnapshot, get_snapshots
 from performance_tracker.utils.maps import (
     currency_to_latex_symbol_table,
 )
+from performance_tracker.utils.profiling import profiled
 from performance_tracker.utils.short_number_rep import short_rep
 
 
 class Sidebar:
+    @profiled("sidebar")
     def __init__(
         self,
         df: pd.DataFrame,
         exchange_rate_service: ExchangeRateService,
         config_dict: dict,
+        snapshots: dict[str, TickerSnapshot] | None = None,
     ) -> None:
         self._df = df
         self._exchange_rate_service = exchange_rate_service
         self._config_dict = config_dict
+        self._snapshots: dict[str, TickerSnapshot | None] = dict(snapshots or {})
         self._overview_table: list[tuple[int, str, float, float]] = list()
         self._generated = f"Generated: {datetime.datetime.now().strftime("%d.%m.%Y")}"
 
         self._prepare_overview_table()
 
+    @profiled("sidebar")
     def __call__(self, index: int) -> str:
+        details = self.details(index)
+
+        return self._latex_template(
+            details["name"].replace("&", r"\&"),
+            details["position_type"],
+            details["country"],
+            details["symbol"],
+            details["sector"],
+            details["currency"],
+            details["quantity"],
+            details["close"],
+            details["dividend_yield"],
+            details["dividend"],
+            index,
+        )
+
+    def details(self, index: int) -> dict:
         row = self._df.iloc[index]
         ticker_data = {
             "symbol": row["Ticker"],
             "quantity": row["Quantity"],
         }
 
-        ticker = get_tickers(ticker_data["symbol"])[0]
-        ticker_info = ticker.info
+        snapshot = self._snapshot(ticker_data["symbol"])
+        ticker_info = snapshot.info if snapshot is not None else {}
+
+        return {
+            "name": ticker_info.get("longName", ""),
+            "position_type": ticker_info.get("quoteType", "Equity"),
+            "country": ticker_info.get("country", ""),
+            "symbol": ticker_info.get("symbol", ""),
+            "sector": ticker_info.get("sector", ""),
+            "currency": ticker_info.get("currency", "USD"),
+            "quantity": ticker_data["quantity"],
+            "close": ticker_info.get("previousClose", ""),
+            "dividend_yield": ticker_info.get("dividendYield", 0.0),
+            "dividend": ticker_info.get("dividendRate", 0.0),
+        }
 
-        name = ticker_info.get("longName", "").replace("&", r"\&")
-        position_type = ticker_info.get("quoteType", "Equity")
-        country = ticker_info.get("country", "")
-        symbol = ticker_info.get("symbol", "")
-        sector = ticker_info.get("sector", "")
-        currency = ticker_info.get("currency", "USD")
-        quantity = ticker_data["quantity"]
-        close = ticker_info.get("previousClose", "")
+    def overview(self) -> list[tuple[int, str, float, float]]:
+        """Index, symbol, share and value of every position with a symbol."""
+        return [entry for entry in self._overview_table if entry[1]]
 
-        dividend_yield = ticker_info.get("dividendYield", 0.0)
-        dividend = ticker_info.get("dividendRate", 0.0)
-
-        return self._latex_template(
-            name,
-            position_type,
-            country,
-            symbol,
-            sector,
-            currency,
-            quantity,
-            close,
-            dividend_yield,
-            dividend,
-            index,
-        )
+    @property
+    def total_value(self) -> float:
+        return self._total_value
 
     def _prepare_overview_table(self) -> None:
         self._total_value = 0
@@ -72,12 +89,13 @@ class Sidebar:
                 "quantity": row["Quantity"],
             }
 
-            if not ticker_data["symbol"]:
+            snapshot = self._snapshot(ticker_data["symbol"])
+            # the composer skips positions without data as well
+            if not ticker_data["symbol"] or snapshot is None:
                 self._overview_table.append((i, "", 0.0, 0))
                 continue
 
-            ticker = get_tickers(ticker_data["symbol"])[0]
-            ticker_info = ticker.info
+            ticker_info = snapshot.info
 
             value = (
                 ticker_data["quantity"]
@@ -91,10 +109,26 @@ class Sidebar:
             self._overview_table.append((i, ticker_data["symbol"], 0.0, value))
 
         self._overview_table = [
-            (index, name, value / self._total_value, value)
+            (
+                index,
+                name,
+                value / self._total_value if self._total_value else 0.0,
+                value,
+            )
             for index, name, percentage, value in self._overview_table
         ]
 
+    def _snapshot(self, symbol: str) -> TickerSnapshot | None:
+        if not symbol:
+            return None
+
+        if symbol not in self._snapshots:
+            # None for symbols that cannot be resolved
+            snapshots = get_snapshots(symbol, fields=("info",))
+            self._snapshots[symbol] = snapshots[0] if snapshots else None
+
+        return self._snapshots[symbol]
+
     def _table_for_index(self, index: int) -> str:
         to_currency_symbol = currency_to_latex_symbol_table.get(
             self._config_dict.get("currency", ""), "USD"
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import pandas as pd
+
+from performance_tracker.latex.compose import MAX_FETCH_WORKERS, LaTeXComposer
+from performance_tracker.latex.factories.chart_graph_factory import MAX_CHART_POINTS
+from performance_tracker.latex.sidebar import Sidebar
+from performance_tracker.preview.page import HTMLPage
+from performance_tracker.utils.progress import ProgressCallback, ProgressTracker
+
+PREVIEW_FILE_NAME = "preview.html"
+
+PREVIEW_STAGES = {"fetch": 3, "generate": 1}
+
+
+class PreviewComposer(LaTeXComposer):
+    """Renders the report pages as a single HTML file, without TeX."""
+
+    _stages = PREVIEW_STAGES
+
+    def __init__(
+        self,
+        max_workers: int = MAX_FETCH_WORKERS,
+        max_points: int | None = MAX_CHART_POINTS,
+        *,
+        progress: ProgressCallback | None = None,
+    ) -> None:
+        super().__init__([], max_workers, progress=progress)
+        self._page = HTMLPage(max_points)
+
+    def __call__(self, df: pd.DataFrame, config_dict: dict, output_dir: Path) -> None:
+        self._tracker = ProgressTracker(self._stages, self._progress)
+
+        with self._tracker.stage("fetch", len(df)):
+            positions = self._prefetch(df, config_dict)
+            sidebar = Sidebar(
+                df,
+                self._exchange_rate_service,
+                config_dict,
+                {
+                    position.ticker_info["symbol"]: position.snapshot
+                    for position in positions
+                    if position is not None
+                },
+            )
+
+        pages = list()
+        with self._tracker.stage("generate", len(positions)):
+            for i, position in enumerate(positions):
+                if position is None:
+                    continue
+
+                pages.append(
+                    self._page(position, sidebar, i, config_dict, self._tracker)
+                )
+                self._tracker.advance("generate", position.ticker_info["symbol"])
+
+        self.save_output(HTMLPage.document(pages), PREVIEW_FILE_NAME, output_dir)
@@ -0,0 +1,449 @@
+import functools
+import html
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from performance_tracker.latex.compose import PrefetchedPosition
+from performance_tracker.latex.factories.chart_graph_factory import (
+    BASE_LEVEL,
+    CHART_SERIES,
+    MAX_CHART_POINTS,
+    ChartGraphFactory,
+)
+from performance_tracker.latex.factories.data_and_recommendations import (
+    PERFORMANCE_THRESHOLD,
+    DataAndRecommendationsFactory,
+)
+from performance_tracker.latex.factories.price_target_factory import PriceTargetFactory
+from performance_tracker.latex.sidebar import Sidebar
+from performance_tracker.services.ticker import TickerSnapshot
+from performance_tracker.utils.calc_df import total_minmax
+from performance_tracker.utils.downsample import downsample_positions
+from performance_tracker.utils.maps import currency_to_symbol
+from performance_tracker.utils.profiling import profiled
+from performance_tracker.utils.progress import ProgressTracker
+from performance_tracker.utils.short_number_rep import short_rep
+
+MAIN_COLOUR = "#0064a4"
+SERIES_STYLES = {
+    "interpolated_inflation_adjusted": ("#e00000", 1),
+    "Close_Comparison_Adjusted": ("#00b000", 1),
+    "Close_Adjusted": (MAIN_COLOUR, 2),
+}
+RECOMMENDATION_COLOURS = {
+    "strongSell": "#e00000",
+    "sell": "#700000",
+    "hold": "#b0b0b0",
+    "buy": "#003252",
+    "strongBuy": MAIN_COLOUR,
+}
+RECOMMENDATION_LABELS = {
+    "sell": "Sell",
+    "buy": "Buy",
+    "strongSell": "Strong Sell",
+    "strongBuy": "Strong Buy",
+}
+
+CHART_WIDTH = 800
+CHART_HEIGHT = 320
+# left, right, top and bottom margin around the plot area
+CHART_MARGIN = (50, 80, 30, 30)
+CHART_Y_TICKS = 5
+BAR_WIDTH = 600
+BAR_HEIGHT = 110
+
+PAGE_STYLE = f"""
+body {{ font-family: sans-serif; margin: 0; background: #eee; }}
+.page {{ display: flex; gap: 2em; background: #fff; margin: 1em auto;
+    max-width: 1200px; padding: 2em; box-shadow: 0 0 4px #aaa; }}
+.page aside {{ flex: 0 0 260px; font-size: 0.85em; }}
+.page main {{ flex: 1; min-width: 0; }}
+h2, .highlight {{ color: {MAIN_COLOUR}; }}
+table {{ width: 100%; border-collapse: collapse; margin-bottom: 1em; }}
+td {{ padding: 1px 4px; }}
+td.number {{ text-align: right; }}
+tr.current {{ font-weight: bold; }}
+.columns {{ display: flex; gap: 2em; }}
+.columns > div {{ flex: 1; }}
+svg {{ width: 100%; height: auto; font-size: 12px; }}
+"""
+
+
+class HTMLPage:
+    def __init__(self, max_points: int | None = MAX_CHART_POINTS) -> None:
+        """Page of a position as HTML with inline SVG figures.
+        :param max_points: points per chart series, None plots every day
+        """
+        self._max_points = max_points
+
+    @profiled("page")
+    def __call__(
+        self,
+        position: PrefetchedPosition,
+        sidebar: Sidebar,
+        index: int,
+        config_dict: dict,
+        tracker: ProgressTracker | None = None,
+    ) -> str:
+        render = functools.partial(self._render, tracker)
+        combined_df = position.combined_df
+        ticker = position.snapshot
+        comparison_ticker = position.comparison
+        currency = config_dict.get("currency", "USD")
+        name = html.escape(ticker.info.get("longName", "<Unknown Name>")[:75])
+
+        chart = render(
+            self.get_chart,
+            combined_df,
+            ticker,
+            comparison_ticker.info.get("symbol", "Reference"),
+        )
+        data_table = render(self.get_data_table, ticker, combined_df, currency)
+        recommendations = render(self.get_recommendations_bar, ticker.recommendations)
+        price_targets = render(self.get_price_target_bar, ticker)
+
+        return f"""
+<section class="page">
+<aside>{render(self.get_sidebar, sidebar, index, currency)}</aside>
+<main>
+<h2>{name}</h2>
+{chart}
+<div class="columns"><div>{data_table}</div><div>{recommendations}</div></div>
+{price_targets}
+</main>
+</section>
+"""
+
+    @classmethod
+    def document(cls, pages: list[str]) -> str:
+        return (
+            "<!DOCTYPE html>\n"
+            '<html><head><meta charset="utf-8"><title>Performance Report</title>'
+            f"<style>{PAGE_STYLE}</style></head>\n"
+            f"<body>{''.join(pages)}</body></html>\n"
+        )
+
+    def _render(
+        self,
+        tracker: ProgressTracker | None,
+        section: Callable[..., str],
+        *args: object,
+    ) -> str:
+        start = time.perf_counter()
+        try:
+            return section(*args)
+        except Exception:
+            return ""
+        finally:
+            if tracker is not None:
+                tracker.record(
+                    f"generate {section.__name__}", time.perf_counter() - start
+                )
+
+    def get_chart(
+        self, combined_df: pd.DataFrame, ticker: TickerSnapshot, comparison: str
+    ) -> str:
+        left, right, top, bottom = CHART_MARGIN
+        plot_width = CHART_WIDTH - left - right
+        plot_height = CHART_HEIGHT - top - bottom
+
+        dates = pd.DatetimeIndex(combined_df.index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        start_date, end_date = dates[[0, -1]]
+
+        min_val, max_val = total_minmax(combined_df.loc[:, list(CHART_SERIES)])
+        graph_min = min_val - 0.05 * (max_val - min_val)
+        graph_max = max_val + 0.05 * (max_val - min_val)
+
+        days = max((end_date - start_date).days, 1)
+        xs = left + (dates - start_date).days.to_numpy() / days * plot_width
+
+        def to_y(values: np.ndarray) -> np.ndarray:
+            return top + (graph_max - values) / (graph_max - graph_min) * plot_height
+
+        elements = list()
+
+        for value in np.linspace(graph_min, graph_max, CHART_Y_TICKS):
+            y = to_y(value)
+            elements.append(
+                f'<line x1="{left}" x2="{left + plot_width}" y1="{y:.1f}" '
+                f'y2="{y:.1f}" stroke="#999" stroke-dasharray="1 3"/>'
+                f'<text x="{left - 6}" y="{y + 4:.1f}" text-anchor="end">'
+                f"{value:.0f}%</text>"
+            )
+
+        for year_start in pd.date_range(start_date, end_date, freq="YS"):
+            x = left + (year_start - start_date).days / days * plot_width
+            elements.append(
+                f'<text x="{x:.1f}" y="{CHART_HEIGHT - 8}" text-anchor="middle">'
+                f"{year_start.strftime('Jan %Y')}</text>"
+            )
+
+        dividend_dates = ChartGraphFactory.get_dividend_dates(ticker.dividends)
+        for dividend_date in dividend_dates[dividend_dates >= start_date]:
+            x = left + (dividend_date - start_date).days / days * plot_width
+            elements.append(
+                f'<line x1="{x:.1f}" x2="{x:.1f}" y1="{top + plot_height}" '
+                f'y2="{top + plot_height + 5}" stroke="#00a000" stroke-width="2"/>'
+            )
+
+        for col, (colour, width) in SERIES_STYLES.items():
+            rows = downsample_positions(
+                combined_df.loc[:, col], self._max_points, dividend_dates
+            )
+            ys = to_y(combined_df[col].to_numpy(dtype=float)[rows])
+            points = " ".join(
+                np.char.add(
+                    np.char.add(np.char.mod("%.1f", xs[rows]), ","),
+                    np.char.mod("%.1f", ys),
+                )
+            )
+            elements.append(
+                f'<polyline points="{points}" fill="none" stroke="{colour}" '
+                f'stroke-width="{width}"/>'
+            )
+
+        performance = combined_df["Close_Adjusted"].iloc[-1] - BASE_LEVEL
+        performance_colour = "#00a000" if performance >= 0 else "#a00000"
+        elements.append(
+            f'<text x="{left + plot_width + 6}" '
+            f'y="{to_y(performance + BASE_LEVEL) + 4:.1f}" '
+            f'fill="{performance_colour}" font-weight="bold">{performance:+.2f}%</text>'
+        )
+
+        inflation_colour = SERIES_STYLES["interpolated_inflation_adjusted"][0]
+        comparison_colour = SERIES_STYLES["Close_Comparison_Adjusted"][0]
+        currency = currency_to_symbol.get(ticker.info.get("currency", ""), "")
+        last_price = ticker.info.get("previousClose", None)
+        elements.append(
+            f'<text x="{left}" y="{top - 10}">'
+            f'<tspan fill="{inflation_colour}">&#9644; Inflation</tspan> '
+            f'<tspan fill="{comparison_colour}">&#9644; {html.escape(comparison)}'
+            "</tspan></text>"
+            f'<text x="{left + plot_width}" y="{top - 10}" text-anchor="end">'
+            f'<tspan fill="{MAIN_COLOUR}" font-weight="bold">'
+            f"{last_price:.2f} {currency}</tspan> on "
+            f"{end_date.strftime('%d.%m.%Y')}</text>"
+        )
+
+        return (
+            f'<svg viewBox="0 0 {CHART_WIDTH} {CHART_HEIGHT}" '
+            'xmlns="http://www.w3.org/2000/svg">' + "".join(elements) + "</svg>"
+        )
+
+    @classmethod
+    def get_sidebar(cls, sidebar: Sidebar, index: int, currency: str) -> str:
+        details = sidebar.details(index)
+        position_currency = currency_to_symbol.get(details["currency"], "USD")
+        report_currency = currency_to_symbol.get(currency, "USD")
+
+        rows = [
+            ("Type:", details["position_type"]),
+            ("Country", details["country"]),
+            ("Symbol:", details["symbol"]),
+            ("Sector:", details["sector"]),
+            ("Currency:", details["currency"]),
+            ("Quantity:", details["quantity"]),
+            ("Close:", f"{details['close']:.2f} {position_currency}"),
+            ("Dividend Yield:", f"{details['dividend_yield']}% p.a."),
+            ("Dividend:", f"{details['dividend']:.2f} {position_currency}"),
+        ]
+        overview = [
+            ('<tr class="current">' if i == index else "<tr>")
+            + f"<td>{html.escape(symbol[:7])}</td>"
+            + f'<td class="number">{100 * share:.2f}</td>'
+            + f'<td class="number">{short_rep(value)} {report_currency}</td></tr>'
+            for i, symbol, share, value in sidebar.overview()
+        ]
+
+        return (
+            "<p><b>Current Position:</b><br>"
+            f'<b class="highlight">{html.escape(details["name"])}</b></p>'
+            f"<table>{cls._rows(rows)}</table><hr>"
+            '<table><tr class="highlight"><th>Position</th><th>%</th>'
+            f"<th>Value</th></tr>{''.join(overview)}"
+            f'<tr><td>Total:</td><td class="number" colspan="2">'
+            f"{short_rep(sidebar.total_value)} {report_currency}</td></tr></table>"
+        )
+
+    @classmethod
+    def get_data_table(
+        cls, ticker: TickerSnapshot, combined_df: pd.DataFrame, currency: str
+    ) -> str:
+        figures = DataAndRecommendationsFactory.get_key_figures(ticker)
+        currency_symbol = currency_to_symbol.get(currency, "USD")
+
+        shares = [
+            (
+                label,
+                DataAndRecommendationsFactory.get_share_larger(
+                    combined_df, "Close_Adjusted", col
+                ),
+            )
+            for label, col in [
+                ("Better than inflation:", "interpolated_inflation_adjusted"),
+                ("Better than reference:", "Close_Comparison_Adjusted"),
+            ]
+        ]
+        growth = figures["growth"]
+        free_cash_flow = figures["free_cash_flow"]
+
+        rows = [
+            ("Growth Estimate:", "" if growth is None else f"{growth * 100:.1f}%"),
+            (
+                "Free Cash Flow:",
+                ""
+                if free_cash_flow is None
+                else f"{short_rep(free_cash_flow)} {currency_symbol}",
+            ),
+            (
+                "Operating Cash Flow:",
+                f"{short_rep(figures['operating_cash_flow'])} {currency_symbol}",
+            ),
+            (
+                "Enterprise Value:",
+                f"{short_rep(figures['enterprise_value'])} {currency_symbol}",
+            ),
+            ("Employees:", short_rep(figures["employees"])),
+            ("Overall Risk:", figures["overall_risk"]),
+            (
+                "5-year &#8960; Dividend:",
+                f"{short_rep(figures['five_year_avg_dividend'])} {currency_symbol}",
+            ),
+            ("Beta:", f"{figures['beta']:.3f}" if figures["beta"] else ""),
+        ]
+
+        share_rows = "".join(
+            f'<tr><td class="highlight"><b>{label}</b></td><td class="number" '
+            f'style="color: {MAIN_COLOUR if share >= PERFORMANCE_THRESHOLD else "red"}">'
+            f"<b>{share:.1f}%</b></td></tr>"
+            for label, share in shares
+        )
+
+        return f"<table>{share_rows}</table><table>{cls._rows(rows)}</table>"
+
+    @classmethod
+    def get_recommendations_bar(cls, recommendations: pd.DataFrame) -> str:
+        counts = DataAndRecommendationsFactory.get_recommendation_counts(
+            recommendations
+        )
+        total = sum(counts.values())
+        if total == 0:
+            return "<p>No recommendations available</p>"
+
+        # hold is split around the middle, buys grow to the right and sells to the left
+        extent = max(
+            counts["hold"] / 2 + counts["buy"] + counts["strongBuy"],
+            counts["hold"] / 2 + counts["sell"] + counts["strongSell"],
+        )
+        scale = BAR_WIDTH / 2 / extent
+        middle = BAR_WIDTH / 2
+
+        segments = [
+            ("hold", middle - counts["hold"] / 2 * scale, counts["hold"] * scale)
+        ]
+        for side, cols in [(1, ["buy", "strongBuy"]), (-1, ["sell", "strongSell"])]:
+            offset = counts["hold"] / 2 * scale
+            for col in cols:
+                width = counts[col] * scale
+                x = middle + offset if side > 0 else middle - offset - width
+                segments.append((col, x, width))
+                offset += width
+
+        bars = "".join(
+            f'<rect x="{x:.1f}" y="30" width="{width:.1f}" height="40" '
+            f'fill="{RECOMMENDATION_COLOURS[col]}"/>'
+            for col, x, width in segments
+        )
+        legend = "".join(
+            f'<text x="{BAR_WIDTH / 4 + (i % 2) * BAR_WIDTH / 2:.0f}" '
+            f'y="{88 + (i // 2) * 16}" text-anchor="middle" '
+            f'fill="{RECOMMENDATION_COLOURS[col]}">'
+            f"&#9632; {label} ({counts[col]})</text>"
+            for i, (col, label) in enumerate(RECOMMENDATION_LABELS.items())
+        )
+
+        return (
+            f'<svg viewBox="0 0 {BAR_WIDTH} {BAR_HEIGHT + 10}" '
+            'xmlns="http://www.w3.org/2000/svg">'
+            f'<text x="{middle}" y="18" text-anchor="middle" fill="{MAIN_COLOUR}" '
+            f'font-weight="bold">Recommendations ({total})</text>'
+            f'{bars}<line x1="{middle}" x2="{middle}" y1="26" y2="74" '
+            f'stroke="#999" stroke-width="2"/>{legend}</svg>'
+        )
+
+    @classmethod
+    def get_price_target_bar(cls, ticker: TickerSnapshot) -> str:
+        price_range = PriceTargetFactory.get_price_range(ticker)
+        currency = currency_to_symbol.get(ticker.info.get("currency", "USD"), "$")
+
+        def to_x(price: float) -> float:
+            return (price - price_range.offset) / price_range.display_width * BAR_WIDTH
+
+        markers = [
+            (
+                price_range.current,
+                MAIN_COLOUR,
+                20,
+                f"Currently: {price_range.current:.2f} {currency}",
+            ),
+            (
+                price_range.minimum,
+                "black",
+                78,
+                f"Min: {price_range.minimum:.2f} {currency}",
+            ),
+            (
+                price_range.maximum,
+                "black",
+                78,
+                f"Max: {price_range.maximum:.2f} {currency}",
+            ),
+            (price_range.mean, "#e00000", None, ""),
+            (price_range.median, "#003252", None, ""),
+        ]
+
+        elements = [
+            f'<rect x="0" y="40" width="{BAR_WIDTH}" height="12" fill="#b0b0b0"/>'
+        ]
+        for i, (price, colour, label_y, text) in enumerate(markers):
+            # labels of equal prices are only drawn once
+            if not price or (i and price == price_range.current):
+                continue
+
+            x = to_x(price)
+            elements.append(
+                f'<line x1="{x:.1f}" x2="{x:.1f}" y1="32" y2="58" '
+                f'stroke="{colour}" stroke-width="4"/>'
+            )
+            if label_y is not None:
+                elements.append(
+                    f'<text x="{x:.1f}" y="{label_y}" text-anchor="middle" '
+                    f'fill="{colour}">{text}</text>'
+                )
+
+        if price_range.mean:
+            elements.append(
+                f'<text x="0" y="{BAR_HEIGHT - 6}"><tspan fill="#e00000">&#9644;</tspan> '
+                "Mean Analyst Price Target "
+                '<tspan fill="#003252">&#9644;</tspan> Median Analyst Price Target'
+                "</text>"
+            )
+
+        return (
+            f'<svg viewBox="0 0 {BAR_WIDTH} {BAR_HEIGHT}" '
+            'xmlns="http://www.w3.org/2000/svg" overflow="visible">'
+            + "".join(elements)
+            + "</svg>"
+        )
+
+    @classmethod
+    def _rows(cls, rows: list[tuple[str, object]]) -> str:
+        return "".join(
+            f'<tr><td>{label}</td><td class="number">{html.escape(str(value))}</td></tr>'
+            for label, value in rows
+        )
@@ -1,20 +1,116 @@
+import numpy as np
 import pandas as pd
-from cachetools import TTLCache, cached
+from cachetools import TTLCache
+from cachetools.keys import hashkey
 
+from performance_tracker.services.history_store import (
+    HistoryStore,
+    get_history_store,
+)
 from performance_tracker.services.ticker import get_tickers
+from performance_tracker.utils.cache import SharedCache, shared_cached
 from performance_tracker.utils.fill_df import fill_missing_dates, fill_unit
+from performance_tracker.utils.profiling import profiled
+
+EXCHANGE_RATE_PERIOD = "10y"
+EXCHANGE_RATE_TTL = 60 * 60
+BASE_CURRENCY = "USD"
+
+# yahoo quotes some exchanges in minor units, e.g. LSE prices in pence
+CURRENCY_SUBUNITS = {"GBp": ("GBP", 100), "GBX": ("GBP", 100), "ZAc": ("ZAR", 100)}
+
+_exchange_rate_cache = SharedCache(
+    "exchange_rates", TTLCache(maxsize=128, ttl=EXCHANGE_RATE_TTL)
+)
+_base_rate_cache = SharedCache(
+    "base_rates", TTLCache(maxsize=64, ttl=EXCHANGE_RATE_TTL)
+)
+
+
+def _store_key(service: "ExchangeRateService", *args: str) -> tuple:
+    # shared by every service reading from the same history store
+    return hashkey(service._history_store, *args)
 
 
 class ExchangeRateService:
-    @cached(cache=TTLCache(maxsize=128, ttl=60 * 60))
+    def __init__(self, history_store: HistoryStore | None = None) -> None:
+        self._history_store = history_store or get_history_store()
+
+    @profiled("service")
+    @shared_cached(_exchange_rate_cache, key=_store_key)
     def get_exchange_rate(self, from_symbol: str, to_symbol: str) -> pd.DataFrame:
         if from_symbol == to_symbol:
             return fill_unit("Close")
 
-        ticker = get_tickers(f"{from_symbol}{to_symbol}=X")[0]
-        history = ticker.history(period="10y")
+        base_rates = self.get_base_rates([from_symbol, to_symbol])
 
-        return fill_missing_dates(history, val_col="Close", until="today")
+        return pd.DataFrame(
+            {"Close": base_rates[to_symbol] / base_rates[from_symbol]}
+        ).dropna()
 
     def get_latest_exchange_rate(self, from_symbol: str, to_symbol: str) -> float:
         return self.get_exchange_rate(from_symbol, to_symbol)["Close"].iloc[-1]
+
+    def get_base_rates(self, currencies: list[str]) -> pd.DataFrame:
+        """Units of each currency per base currency, on one daily calendar."""
+        currencies = list(dict.fromkeys(currencies))
+        rates = {currency: self._base_rate(currency) for currency in currencies}
+        quoted = {
+            currency: rate for currency, rate in rates.items() if rate is not None
+        }
+
+        if not quoted:
+            return fill_unit("Close").rename(columns={"Close": currencies[0]})
+
+        base_rates = pd.concat(quoted, axis=1).ffill()
+        for currency in currencies:
+            if currency not in quoted:
+                base_rates[currency] = 1.0
+
+        return base_rates.loc[:, currencies]
+
+    def get_conversion_matrix(self, currencies: list[str]) -> pd.DataFrame:
+        """Latest rates with one row per source and one column per target."""
+        latest = self.get_base_rates(currencies).iloc[-1]
+
+        return pd.DataFrame(
+            np.outer(1 / latest.to_numpy(), latest.to_numpy()),
+            index=latest.index,
+            columns=latest.index,
+        )
+
+    @profiled("service")
+    def prefetch(self, currencies: list[str]) -> None:
+        currencies = [currency for currency in currencies if currency]
+
+        self._history_store.prefetch(
+            list(
+                dict.fromkeys(
+                    self.base_symbol(currency)
+                    for currency in currencies
+                    if self._quoted_currency(currency) != BASE_CURRENCY
+                )
+            ),
+            period=EXCHANGE_RATE_PERIOD,
+        )
+        self.get_base_rates(currencies)
+
+    @shared_cached(_base_rate_cache, key=_store_key)
+    def _base_rate(self, currency: str) -> pd.Series | None:
+        quoted_currency = self._quoted_currency(currency)
+        if quoted_currency == BASE_CURRENCY:
+            return None
+
+        ticker = get_tickers(self.base_symbol(currency))[0]
+        history = self._history_store.get_history(ticker, period=EXCHANGE_RATE_PERIOD)
+        rate = fill_missing_dates(history, val_col="Close", until="today")["Close"]
+
+        return rate * CURRENCY_SUBUNITS.get(currency, (currency, 1))[1]
+
+    @classmethod
+    def base_symbol(cls, currency: str) -> str:
+        return f"{cls._quoted_currency(currency)}=X"
+
+    @classmethod
+    def _quoted_currency(cls, currency: str) -> str:
+        return CURRENCY_SUBUNITS.get(currency, (currency.upper(), 1))[0]
@@ -0,0 +1,316 @@
+import datetime
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from yfinance import Ticker
+
+from performance_tracker.services.market_data import get_provider, ticker_symbol
+from performance_tracker.services.ticker import get_histories
+from performance_tracker.utils.paths import CACHE_DIR
+from performance_tracker.utils.profiling import profiled
+
+HISTORY_DB_PATH = CACHE_DIR / "history.sqlite"
+REFRESH_INTERVAL = datetime.timedelta(hours=1)
+DATE_FORMAT = "%Y-%m-%d"
+
+PERIOD_OFFSETS = {
+    "d": lambda n: pd.DateOffset(days=n),
+    "wk": lambda n: pd.DateOffset(weeks=n),
+    "mo": lambda n: pd.DateOffset(months=n),
+    "y": lambda n: pd.DateOffset(years=n),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    close REAL NOT NULL,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    symbol TEXT PRIMARY KEY,
+    covered_from TEXT,
+    fetched_at TEXT NOT NULL
+);
+"""
+
+
+def period_start(period: str, now: pd.Timestamp | None = None) -> pd.Timestamp | None:
+    today = (now if now is not None else pd.Timestamp.now()).normalize()
+
+    if period == "max":
+        return None
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+
+    match = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"unsupported period {period}")
+
+    return today - PERIOD_OFFSETS[match.group(2)](int(match.group(1)))
+
+
+class HistoryStore:
+    """Persistent store of adjusted daily closes, refreshed by appending deltas."""
+
+    def __init__(
+        self,
+        db_path: Path = HISTORY_DB_PATH,
+        refresh_interval: datetime.timedelta = REFRESH_INTERVAL,
+    ) -> None:
+        self._db_path = db_path
+        self._refresh_interval = refresh_interval
+        self._symbol_locks: defaultdict[str, threading.Lock] = defaultdict(
+            threading.Lock
+        )
+        self._locks_guard = threading.Lock()
+        self._initialized = False
+
+    @profiled("service")
+    def get_history(self, ticker: Ticker, period: str = "10y") -> pd.DataFrame:
+        symbol = ticker_symbol(ticker)
+        start = period_start(period)
+
+        with self._lock_for(symbol):
+            coverage = self._read_coverage(symbol)
+
+            if coverage is None or not self._covers(coverage[0], start):
+                self._fetch_full(ticker, symbol, start)
+            elif self._is_stale(coverage[1]):
+                self._fetch_delta(ticker, symbol, coverage[0])
+
+            return self._read_closes(symbol, start)
+
+    @profiled("service")
+    def prefetch(self, symbols: list[str], period: str = "10y") -> None:
+        start = period_start(period)
+        missing: list[str] = []
+        stale: dict[str, tuple[pd.Timestamp | None, pd.Timestamp]] = dict()
+
+        # the symbols stay unlocked during the downloads, get_history may
+        # refresh them meanwhile
+        for symbol in dict.fromkeys(symbols):
+            with self._lock_for(symbol):
+                coverage = self._read_coverage(symbol)
+                last = self.last_date(symbol)
+
+            if coverage is None or last is None or not self._covers(coverage[0], start):
+                missing.append(symbol)
+            elif self._is_stale(coverage[1]):
+                stale[symbol] = (coverage[0], last)
+
+        if stale:
+            deltas = get_histories(
+                list(stale),
+                start=min(last for _, last in stale.values()).strftime(DATE_FORMAT),
+            )
+
+            for symbol, (covered_from, last) in stale.items():
+                delta = self._column_slice(deltas, symbol)
+                with self._lock_for(symbol):
+                    appended = self._append(
+                        symbol, delta.loc[delta.index >= last], last, covered_from
+                    )
+
+                if not appended:
+                    missing.append(symbol)
+
+        if missing:
+            histories = get_histories(
+                missing,
+                period="max" if start is None else None,
+                start=start.strftime(DATE_FORMAT) if start is not None else None,
+            )
+
+            for symbol in missing:
+                with self._lock_for(symbol):
+                    self._replace(symbol, self._column_slice(histories, symbol), start)
+
+    def last_date(self, symbol: str) -> pd.Timestamp | None:
+        with closing(self._connect()) as connection:
+            (last,) = connection.execute(
+                "SELECT MAX(date) FROM history WHERE symbol = ?", (symbol,)
+            ).fetchone()
+
+        return pd.Timestamp.fromisoformat(last) if last else None
+
+    def _fetch_full(
+        self, ticker: Ticker, symbol: str, start: pd.Timestamp | None
+    ) -> None:
+        if start is None:
+            history = get_provider().history(ticker, period="max", auto_adjust=True)
+        else:
+            history = get_provider().history(
+                ticker, start=start.strftime(DATE_FORMAT), auto_adjust=True
+            )
+
+        self._replace(symbol, history, start)
+
+    def _fetch_delta(
+        self, ticker: Ticker, symbol: str, covered_from: pd.Timestamp | None
+    ) -> None:
+        last = self.last_date(symbol)
+        if last is None:
+            self._fetch_full(ticker, symbol, covered_from)
+            return
+
+        # the last stored day may have been an intraday value, so refetch it
+        delta = get_provider().history(
+            ticker, start=last.strftime(DATE_FORMAT), auto_adjust=True
+        )
+
+        if not self._append(symbol, delta, last, covered_from):
+            self._fetch_full(ticker, symbol, covered_from)
+
+    def _replace(
+        self, symbol: str, history: pd.DataFrame, covered_from: pd.Timestamp | None
+    ) -> None:
+        if history.empty or history["Close"].dropna().empty:
+            return
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM history WHERE symbol = ?", (symbol,))
+            self._write_closes(connection, symbol, history)
+            self._write_coverage(connection, symbol, covered_from)
+
+    def _append(
+        self,
+        symbol: str,
+        delta: pd.DataFrame,
+        last: pd.Timestamp,
+        covered_from: pd.Timestamp | None,
+    ) -> bool:
+        if delta.empty or delta["Close"].dropna().empty:
+            # the delta starts at the last stored day, so nothing came back;
+            # the symbol stays stale and is asked for again
+            return True
+
+        if self._has_corporate_actions(delta, after=last):
+            # dividends and splits rewrite the whole adjusted series
+            return False
+
+        with closing(self._connect()) as connection, connection:
+            self._write_closes(connection, symbol, delta)
+            self._write_coverage(connection, symbol, covered_from)
+
+        return True
+
+    def _is_stale(self, fetched_at: pd.Timestamp) -> bool:
+        return pd.Timestamp.now() - fetched_at >= self._refresh_interval
+
+    @classmethod
+    def _column_slice(cls, histories: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        if histories.empty or symbol not in histories.columns.get_level_values(1):
+            return pd.DataFrame(columns=pd.Index(["Close"]), index=pd.DatetimeIndex([]))
+
+        return histories.xs(symbol, axis=1, level=1)
+
+    @classmethod
+    def _has_corporate_actions(cls, history: pd.DataFrame, after: pd.Timestamp) -> bool:
+        if history.empty:
+            return False
+
+        dates = cls._naive_dates(history.index)
+        actions = [
+            col for col in ("Dividends", "Stock Splits") if col in history.columns
+        ]
+
+        return bool((history.loc[dates > after, actions].fillna(0) != 0).any().any())
+
+    @classmethod
+    def _covers(
+        cls, covered_from: pd.Timestamp | None, start: pd.Timestamp | None
+    ) -> bool:
+        if covered_from is None:
+            return True
+        return start is not None and covered_from <= start
+
+    @classmethod
+    def _naive_dates(cls, index: pd.Index) -> pd.DatetimeIndex:
+        dates = pd.DatetimeIndex(index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        return pd.DatetimeIndex(dates.to_numpy(dtype="datetime64[D]"))
+
+    def _read_coverage(
+        self, symbol: str
+    ) -> tuple[pd.Timestamp | None, pd.Timestamp] | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT covered_from, fetched_at FROM coverage WHERE symbol = ?",
+                (symbol,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        covered_from = pd.Timestamp.fromisoformat(row[0]) if row[0] else None
+        return covered_from, pd.Timestamp.fromisoformat(row[1])
+
+    def _read_closes(self, symbol: str, start: pd.Timestamp | None) -> pd.DataFrame:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT date, close FROM history WHERE symbol = ? AND date >= ? "
+                "ORDER BY date",
+                (symbol, start.strftime(DATE_FORMAT) if start is not None else ""),
+            ).fetchall()
+
+        return pd.DataFrame(
+            {"Close": [close for _, close in rows]},
+            index=pd.DatetimeIndex([date for date, _ in rows], name="Date"),
+            dtype=float,
+        )
+
+    def _write_closes(
+        self, connection: sqlite3.Connection, symbol: str, history: pd.DataFrame
+    ) -> None:
+        closes = history["Close"].dropna()
+        dates = self._naive_dates(closes.index).strftime(DATE_FORMAT)
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO history (symbol, date, close) VALUES (?, ?, ?)",
+            zip([symbol] * len(closes), dates, closes.astype(float), strict=True),
+        )
+
+    def _write_coverage(
+        self,
+        connection: sqlite3.Connection,
+        symbol: str,
+        covered_from: pd.Timestamp | None,
+    ) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO coverage (symbol, covered_from, fetched_at) "
+            "VALUES (?, ?, ?)",
+            (
+                symbol,
+                covered_from.strftime(DATE_FORMAT)
+                if covered_from is not None
+                else None,
+                pd.Timestamp.now().isoformat(),
+            ),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._locks_guard:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                with closing(sqlite3.connect(self._db_path)) as connection:
+                    connection.executescript(SCHEMA)
+                self._initialized = True
+
+        return sqlite3.connect(self._db_path, timeout=30)
+
+    def _lock_for(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._symbol_locks[symbol]
+
+
+@lru_cache(maxsize=1)
+def get_history_store() -> HistoryStore:
+    return HistoryStore()
@@ -1,13 +1,29 @@
+import json
+import threading
 import warnings
+from pathlib import Path
+from typing import cast
 
 import httpx
 import numpy as np
 import pandas as pd
+from cachetools import TTLCache
 
+from performance_tracker.services.market_data import get_provider
 from performance_tracker.utils.fill_df import fill_unit
+from performance_tracker.utils.paths import CACHE_DIR
+from performance_tracker.utils.profiling import profiled
 
 START_YEAR = 2014
 
+# the World Bank publishes the yearly CPI once a year
+CURVE_TTL = 60 * 60 * 24 * 30
+INFLATION_CACHE_DIR = CACHE_DIR / "inflation"
+INFLATION_PARAMS = {"format": "json", "per_page": 100}
+
+_curve_cache: TTLCache = TTLCache(maxsize=32, ttl=CURVE_TTL)
+_curve_cache_lock = threading.Lock()
+
 
 class InflationService:
     indicator = "FP.CPI.TOTL.ZG"
@@ -15,52 +31,114 @@ class InflationService:
     start_date = "2015-01-01"
     country_dict = {"DEU": "DE"}
 
+    def __init__(self, cache_dir: Path = INFLATION_CACHE_DIR) -> None:
+        self._cache_dir = cache_dir
+
+    @profiled("service")
     def get_inflation_rate(self, country_iso3: str) -> pd.DataFrame:
         if country_iso3 == "":
             return fill_unit("interpolated_inflation")
 
-        with httpx.Client() as client:
-            try:
-                result = client.get(
-                    self.base_url
-                    + "/country/"
-                    + self.country_dict.get(country_iso3, country_iso3)
-                    + "/indicator/"
-                    + self.indicator,
-                    params={"format": "json", "per_page": 100},
-                    timeout=20.0,
-                )
-            except httpx.ReadTimeout:
-                warnings.warn("ReadTimeout for inflation API", stacklevel=2)
-
-        result.raise_for_status()
-        raw_inflation = result.json()[1]
-
-        raw_df = pd.DataFrame(raw_inflation)
-        raw_df["date"] = raw_df["date"].astype(int)
-        raw_df["value"] = pd.to_numeric(raw_df["value"]) / 100
+        with _curve_cache_lock:
+            daily_df = _curve_cache.get((self._cache_dir, country_iso3))
+
+        if daily_df is not None:
+            return daily_df
+
+        raw_inflation = self._read_cached(country_iso3)
+        if raw_inflation is None:
+            raw_inflation = self._download(country_iso3)
+            if raw_inflation is None:
+                # not cached, the next report asks again
+                return fill_unit("interpolated_inflation")
+
+            self._write_cached(country_iso3, raw_inflation)
+
+        daily_df = self.build_curve(pd.DataFrame(raw_inflation))
+
+        with _curve_cache_lock:
+            _curve_cache[(self._cache_dir, country_iso3)] = daily_df
+
+        return daily_df
+
+    def _download(self, country_iso3: str) -> list[dict] | None:
+        try:
+            payload = get_provider().get_json(
+                self.url(country_iso3), params=INFLATION_PARAMS, timeout=20.0
+            )
+        except httpx.ReadTimeout:
+            warnings.warn("ReadTimeout for inflation API", stacklevel=3)
+            return None
+
+        # the World Bank answers with its paging metadata and the entries
+        entries = cast(list, payload)[1]
+
+        return [{"date": entry["date"], "value": entry["value"]} for entry in entries]
+
+    @classmethod
+    def url(cls, country_iso3: str) -> str:
+        return (
+            cls.base_url
+            + "/country/"
+            + cls.country_dict.get(country_iso3, country_iso3)
+            + "/indicator/"
+            + cls.indicator
+        )
+
+    def _read_cached(self, country_iso3: str) -> list[dict] | None:
+        cache_path = self._cache_dir / f"{country_iso3}.json"
+        if not cache_path.exists():
+            return None
+
+        try:
+            cached = json.loads(cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        age = pd.Timestamp.now() - pd.Timestamp(cached["fetched_at"])
+        if age.total_seconds() > CURVE_TTL:
+            return None
+
+        return cached["values"]
+
+    def _write_cached(self, country_iso3: str, raw_inflation: list[dict]) -> None:
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+
+        cache_path = self._cache_dir / f"{country_iso3}.json"
+        cache_path.write_text(
+            json.dumps(
+                {
+                    "fetched_at": pd.Timestamp.now().isoformat(),
+                    "values": raw_inflation,
+                }
+            ),
+            encoding="utf-8",
+        )
 
+    @classmethod
+    def build_curve(cls, raw_df: pd.DataFrame) -> pd.DataFrame:
+        raw_df = raw_df.assign(
+            date=raw_df["date"].astype(int),
+            value=pd.to_numeric(raw_df["value"]) / 100,
+        )
         raw_df = raw_df[raw_df["date"] > START_YEAR].sort_values("date")
 
         last_year = raw_df["date"].max()
         end_date = f"{last_year + 1}-01-01"
         daily_df = pd.DataFrame(
-            index=pd.date_range(start=self.start_date, end=end_date, freq="D")
+            index=pd.date_range(start=cls.start_date, end=end_date, freq="D")
         )
 
-        current_price_index = 1.0
-
-        mapping = {"2015-01-01": current_price_index}
-        for _, row in raw_df.iterrows():
-            current_price_index *= 1 + row["value"]
-            target_date = f"{row["date"] + 1}-01-01"
-            mapping[target_date] = current_price_index
-
-        daily_df["inflation"] = np.nan
-        for date_str, val in mapping.items():
-            if pd.Timestamp(date_str) in daily_df.index:
-                daily_df.loc[date_str, "inflation"] = val
+        # price index at the first of January after every reported year
+        price_index = pd.Series(
+            np.cumprod(np.concatenate([[1.0], 1 + raw_df["value"].to_numpy()])),
+            index=pd.to_datetime(
+                [cls.start_date]
+                + [f"{year + 1}-01-01" for year in raw_df["date"].to_numpy()]
+            ),
+        )
 
+        daily_df["inflation"] = price_index.reindex(daily_df.index)
         daily_df["inflation_log"] = np.log(daily_df["inflation"])
         daily_df["inflation_log"] = daily_df["inflation_log"].interpolate(
             method="linear"
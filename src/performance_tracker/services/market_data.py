@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import cast
+from urllib.parse import quote, unquote
+
+import httpx
+import pandas as pd
+import yfinance as yf
+from yfinance import Ticker
+
+from performance_tracker.utils.cache import clear_caches
+from performance_tracker.utils.paths import CACHE_DIR
+from performance_tracker.utils.ratelimit import get_rate_limiter
+
+MARKET_DATA_MODES = ("live", "record", "replay")
+
+MARKET_DATA_MODE = os.environ.get("PERFORMANCE_TRACKER_MARKET_DATA", "live")
+FIXTURE_DIR = Path(
+    os.environ.get("PERFORMANCE_TRACKER_FIXTURE_DIR", CACHE_DIR / "fixtures")
+)
+# seconds added to every replayed response
+REPLAY_LATENCY = float(os.environ.get("PERFORMANCE_TRACKER_REPLAY_LATENCY", "0"))
+
+_providers: dict[str, "MarketDataProvider"] = {}
+_provider_lock = threading.Lock()
+
+
+class MissingFixtureError(LookupError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class ReplayTicker:
+    """Stands in for a yf.Ticker, its data is read through the provider."""
+
+    ticker: str
+
+
+class MarketDataProvider:
+    """Yahoo Finance and World Bank responses, fetched live within their rate limits."""
+
+    def ticker(self, name: str) -> Ticker:
+        # tickers are fetched lazily, by their fields and histories
+        return yf.Ticker(ticker=name)
+
+    def history(self, ticker: Ticker, **kwargs) -> pd.DataFrame:
+        get_rate_limiter("yahoo").acquire()
+
+        return ticker.history(**kwargs)
+
+    def field(self, ticker: Ticker, field: str) -> object:
+        get_rate_limiter("yahoo").acquire()
+
+        return getattr(ticker, field)
+
+    def download(self, names: list[str], **kwargs) -> pd.DataFrame | None:
+        # one token per bulk call, charging every symbol up front would delay
+        # a large prefetch by minutes before its first request
+        get_rate_limiter("yahoo").acquire()
+
+        return yf.download(tickers=names, **kwargs)
+
+    def get_json(self, url: str, params: dict, timeout: float) -> object:
+        get_rate_limiter("worldbank").acquire()
+
+        with httpx.Client() as client:
+            result = client.get(url, params=params, timeout=timeout)
+
+        result.raise_for_status()
+
+        return result.json()
+
+
+class FixtureStore:
+    """Recorded responses, one file per symbol and kind of data."""
+
+    def __init__(self, root: Path = FIXTURE_DIR) -> None:
+        self._root = root
+        self._lock = threading.Lock()
+
+    def load(self, kind: str, *keys: str) -> object:
+        path = self.path(kind, *keys)
+        if not path.exists():
+            raise MissingFixtureError(f"no recorded {kind} for {'/'.join(keys)}")
+
+        return pickle.loads(path.read_bytes())
+
+    def save(self, kind: str, *keys: str, value: object) -> None:
+        path = self.path(kind, *keys)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # recording threads may save the same response
+        tmp_path = path.with_name(
+            f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp"
+        )
+        tmp_path.write_bytes(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        tmp_path.replace(path)
+
+    def merge_history(self, symbol: str, history: pd.DataFrame) -> None:
+        if history.empty:
+            return
+
+        history = history.copy()
+        history.index = pd.DatetimeIndex(history.index).tz_localize(None)
+
+        with self._lock:
+            try:
+                recorded = cast(pd.DataFrame, self.load("history", symbol))
+            except MissingFixtureError:
+                recorded = None
+
+            if recorded is not None:
+                # the latest response wins for days recorded twice
+                history = pd.concat(
+                    [recorded.loc[~recorded.index.isin(history.index)], history]
+                ).sort_index()
+
+            self.save("history", symbol, value=history)
+
+    def symbols(self) -> list[str]:
+        """Symbols with a recorded history."""
+        return sorted(
+            unquote(path.stem) for path in (self._root / "history").glob("*.pkl")
+        )
+
+    def path(self, kind: str, *keys: str) -> Path:
+        *dirs, name = (quote(key, safe="") for key in keys)
+
+        return self._root.joinpath(kind, *dirs, f"{name}.pkl")
+
+
+class RecordingProvider(MarketDataProvider):
+    """Fetches live and keeps every response in a fixture store."""
+
+    def __init__(self, store: FixtureStore) -> None:
+        self._store = store
+
+    def history(self, ticker: Ticker, **kwargs) -> pd.DataFrame:
+        history = super().history(ticker, **kwargs)
+        self._store.merge_history(ticker_symbol(ticker), history)
+
+        return history
+
+    def field(self, ticker: Ticker, field: str) -> object:
+        value = super().field(ticker, field)
+        self._store.save("fields", ticker_symbol(ticker), field, value=value)
+
+        return value
+
+    def download(self, names: list[str], **kwargs) -> pd.DataFrame | None:
+        histories = super().download(names, **kwargs)
+        if histories is None or histories.empty:
+            return histories
+
+        for symbol in histories.columns.get_level_values(1).unique():
+            self._store.merge_history(
+                symbol, histories.xs(symbol, axis=1, level=1).dropna(how="all")
+            )
+
+        return histories
+
+    def get_json(self, url: str, params: dict, timeout: float) -> object:
+        payload = super().get_json(url, params, timeout)
+        self._store.save("json", request_key(url, params), value=payload)
+
+        return payload
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serves recorded responses without network access."""
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0) -> None:
+        self._store = store
+        self._latency = latency
+
+    def ticker(self, name: str) -> ReplayTicker:
+        return ReplayTicker(name)
+
+    def history(self, ticker: Ticker, **kwargs) -> pd.DataFrame:
+        self._wait()
+
+        return self._history(ticker_symbol(ticker), kwargs.get("start"))
+
+    def field(self, ticker: Ticker, field: str) -> object:
+        self._wait()
+
+        return self._store.load("fields", ticker_symbol(ticker), field)
+
+    def download(self, names: list[str], **kwargs) -> pd.DataFrame | None:
+        self._wait()
+
+        histories = {
+            symbol: history
+            for symbol in names
+            if not (history := self._history(symbol, kwargs.get("start"))).empty
+        }
+        if not histories:
+            return pd.DataFrame()
+
+        return pd.concat(histories, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def get_json(self, url: str, params: dict, timeout: float) -> object:
+        self._wait()
+
+        return self._store.load("json", request_key(url, params))
+
+    def _history(
+        self, symbol: str, start: str | pd.Timestamp | None = None
+    ) -> pd.DataFrame:
+        try:
+            history = cast(pd.DataFrame, self._store.load("history", symbol))
+        except MissingFixtureError:
+            # yahoo answers unknown symbols with an empty frame as well
+            warnings.warn(f"No recorded history of {symbol}", stacklevel=3)
+            return pd.DataFrame(columns=pd.Index(["Close"]))
+
+        # periods are served with everything recorded
+        if start is not None:
+            history = history.loc[history.index >= pd.Timestamp(start)]
+
+        return history
+
+    def _wait(self) -> None:
+        if self._latency > 0:
+            time.sleep(self._latency)
+
+
+def ticker_symbol(ticker: Ticker) -> str:
+    # yfinance types the symbol optional, its constructor always sets one
+    return ticker.ticker or ""
+
+
+def request_key(url: str, params: dict) -> str:
+    request = json.dumps({"url": url, "params": params}, sort_keys=True)
+
+    return hashlib.sha1(request.encode("utf-8")).hexdigest()[:16]
+
+
+def create_provider(
+    mode: str = MARKET_DATA_MODE,
+    fixture_dir: Path = FIXTURE_DIR,
+    latency: float = REPLAY_LATENCY,
+) -> MarketDataProvider:
+    if mode == "record":
+        return RecordingProvider(FixtureStore(fixture_dir))
+    if mode == "replay":
+        return ReplayProvider(FixtureStore(fixture_dir), latency)
+    if mode == "live":
+        return MarketDataProvider()
+
+    raise ValueError(f"unknown market data mode {mode}, use one of {MARKET_DATA_MODES}")
+
+
+def get_provider() -> MarketDataProvider:
+    with _provider_lock:
+        if "current" not in _providers:
+            _providers["current"] = create_provider()
+
+        return _providers["current"]
+
+
+def set_provider(provider: MarketDataProvider) -> None:
+    """Switches the source of all market data, before the next fetch."""
+    with _provider_lock:
+        _providers["current"] = provider
+
+    # tickers and snapshots of the previous provider are not served again
+    clear_caches()
@@ -1,9 +1,93 @@
+import os
 import warnings
-from functools import lru_cache
+from collections.abc import Callable, Mapping
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any
 
 import httpx
-import yfinance as yf
+import pandas as pd
+from cachetools import TTLCache
+from cachetools.keys import hashkey
 from yfinance import Ticker
+from yfinance.data import YfData
+
+from performance_tracker.services.market_data import get_provider, ticker_symbol
+from performance_tracker.utils.cache import (
+    ByteBudgetCache,
+    SharedCache,
+    estimate_size,
+    shared_cached,
+)
+from performance_tracker.utils.profiling import profile, profiled
+
+SNAPSHOT_TTL = 15 * 60
+
+# tickers keep every frame they fetched, so they are bounded by their size
+TICKER_CACHE_BYTES = (
+    int(os.environ.get("PERFORMANCE_TRACKER_TICKER_CACHE_MB", "256")) * 1024 * 1024
+)
+TICKER_TTL = 60 * 60
+
+# lazy yfinance properties read by the sidebar and the factories
+SNAPSHOT_FIELDS: dict[str, Callable[[], object]] = {
+    "info": dict,
+    "dividends": lambda: pd.Series(dtype=float),
+    "recommendations": pd.DataFrame,
+    "analyst_price_targets": dict,
+    "growth_estimates": pd.DataFrame,
+    "cashflow": pd.DataFrame,
+}
+
+_ticker_cache = SharedCache(
+    "tickers",
+    ByteBudgetCache(
+        TICKER_CACHE_BYTES,
+        ttl=TICKER_TTL,
+        getsizeof=lambda ticker: estimate_size(ticker, skip=(YfData,)),
+    ),
+)
+_snapshot_cache = SharedCache("snapshots", TTLCache(maxsize=256, ttl=SNAPSHOT_TTL))
+
+
+@dataclass(frozen=True, slots=True)
+class TickerSnapshot:
+    """Data of one symbol as fetched once per report."""
+
+    symbol: str
+    info: Mapping[str, Any]
+    dividends: pd.Series
+    recommendations: pd.DataFrame
+    analyst_price_targets: Mapping[str, float]
+    growth_estimates: pd.DataFrame
+    cashflow: pd.DataFrame
+
+    @classmethod
+    def from_ticker(
+        cls, ticker: Ticker, fields: tuple[str, ...] = tuple(SNAPSHOT_FIELDS)
+    ) -> "TickerSnapshot":
+        values: dict[str, Any] = {
+            field: cls._fetch(ticker, field) if field in fields else default()
+            for field, default in SNAPSHOT_FIELDS.items()
+        }
+        values["info"] = MappingProxyType(dict(values["info"] or {}))
+        values["analyst_price_targets"] = MappingProxyType(
+            dict(values["analyst_price_targets"] or {})
+        )
+
+        return cls(symbol=ticker_symbol(ticker), **values)
+
+    @classmethod
+    def _fetch(cls, ticker: Ticker, field: str) -> object:
+        try:
+            with profile(f"ticker.{field}", "service"):
+                value = get_provider().field(ticker, field)
+        except Exception:
+            warnings.warn(f"Couldn't fetch {field} of {ticker.ticker}", stacklevel=3)
+            return SNAPSHOT_FIELDS[field]()
+
+        return SNAPSHOT_FIELDS[field]() if value is None else value
 
 
 def get_tickers(names: str | list[str]) -> list[Ticker]:
@@ -22,15 +106,67 @@ def get_tickers(names: str | list[str]) -> list[Ticker]:
     return tickers
 
 
-@lru_cache(maxsize=100)
+def get_snapshots(
+    names: str | list[str], fields: tuple[str, ...] = tuple(SNAPSHOT_FIELDS)
+) -> list[TickerSnapshot]:
+    return [get_snapshot(ticker, fields) for ticker in get_tickers(names) if ticker]
+
+
+@shared_cached(
+    _snapshot_cache,
+    key=lambda ticker, fields=tuple(SNAPSHOT_FIELDS): hashkey(ticker.ticker, fields),
+)
+def get_snapshot(
+    ticker: Ticker, fields: tuple[str, ...] = tuple(SNAPSHOT_FIELDS)
+) -> TickerSnapshot:
+    return TickerSnapshot.from_ticker(ticker, fields)
+
+
+def pin_snapshots() -> AbstractContextManager[None]:
+    """Keeps the snapshots loaded in the block, e.g. for the length of a batch."""
+    return _snapshot_cache.pin()
+
+
+@shared_cached(_ticker_cache)
 def _get_ticker(name: str) -> Ticker | None:
     try:
-        return yf.Ticker(ticker=name)
+        return get_provider().ticker(name)
     except Exception:
         warnings.warn(f"Couldn't fetch ticker {name}", stacklevel=2)
         return None
 
 
+@profiled("service")
+def get_histories(
+    names: list[str], period: str | None = None, start: str | None = None
+) -> pd.DataFrame:
+    if not names:
+        return pd.DataFrame()
+
+    try:
+        histories = get_provider().download(
+            names,
+            period=period,
+            start=start,
+            auto_adjust=True,
+            actions=True,
+            group_by="column",
+            threads=True,
+            progress=False,
+            multi_level_index=True,
+        )
+    except httpx.ReadTimeout:
+        warnings.warn(f"ReadTimeout for histories of {names}", stacklevel=2)
+        return pd.DataFrame()
+
+    if histories is None or histories.empty:
+        return pd.DataFrame()
+
+    histories.index = pd.DatetimeIndex(histories.index).tz_localize(None)
+
+    return histories
+
+
 # if __name__ == "__main__":
 #     import json
 #
@@ -1,14 +1,23 @@
-import time
 from datetime import date
 from pathlib import Path
 
 import pandas as pd
 import streamlit as st
+import streamlit.components.v1 as components
 
-from performance_tracker.core.worker import Worker
-from performance_tracker.utils.maps import COUNTRY_MAP, CURRENCY_MAP, PERIOD_MAP
+from performance_tracker.core.scheduler import Job, JobStatus, get_scheduler
+from performance_tracker.utils.maps import (
+    COUNTRY_MAP,
+    CURRENCY_MAP,
+    DEFAULT_COLUMN_VALUES,
+    OUTPUT_MAP,
+    PERIOD_MAP,
+)
 
 MAX_INPUTS = 30
+PREVIEW_HEIGHT = 900
+# previews take seconds, they do not wait behind typeset reports
+OUTPUT_PRIORITY = {"html": 1, "pdf": 0}
 
 COLUMN_CONFIG = {
     "Ticker": st.column_config.TextColumn(
@@ -58,14 +67,6 @@ COLUMN_CONFIG = {
         format="accounting",
     ),
 }
-DEFAULT_COLUMN_VALUES = {
-    "Ticker": "",
-    "Quantity": 0,
-    "Purchase Date": pd.NaT,
-    "Purchase Price": 0.0,
-    "Sell Date": pd.NaT,
-    "Sell Price": 0.0,
-}
 
 INTRO_TEXT = """Analyze the performance of different symbols against inflation and a local MSCI WORLD.
 All values are adjusted for dividends and stock splits, so they might differ from the historic stock values.
@@ -109,51 +110,61 @@ def handle_upload() -> None:
             st.error(f"Error reading uploaded CSV: {e}")
 
 
-def start_analysis(currency: str, country: str, period: str) -> None:
+def current_job() -> Job | None:
+    job_id = st.session_state.get("job_id", None)
+    if job_id is None:
+        return None
+
+    return get_scheduler().status(job_id)
+
+
+def start_analysis(
+    currency: str, country: str, period: str, output: str = "PDF"
+) -> None:
     if not st.session_state.input_df["Ticker"].notna().any():
         return
 
     if len(st.session_state.input_df["Ticker"].notna()) > MAX_INPUTS:
         return
 
-    if st.session_state.shared_data.get("is_running", False):
+    job = current_job()
+    if job is not None and not job.finished:
         return
 
-    if "is_running" in st.session_state and st.session_state.is_running:
-        return
-
-    output_dir = (
-        Path(__file__).parent.parent / "output" / f"{str(time.time()).replace(".", "")}"
-    )
+    output = OUTPUT_MAP.get(output, "pdf")
 
-    worker = Worker(
+    st.session_state.job_id = get_scheduler().submit(
         st.session_state.input_df,
         {
             "currency": CURRENCY_MAP.get(currency, "EUR"),
             "country": COUNTRY_MAP.get(country, "DEU"),
             "period": PERIOD_MAP.get(period, "1y"),
         },
-        output_dir,
-        st.session_state.shared_data,
+        output=output,
+        priority=OUTPUT_PRIORITY.get(output, 0),
     )
 
-    worker()
-
-    st.session_state.shared_data["done"] = False
-    st.session_state.shared_data["is_running"] = True
-    st.session_state.shared_data["progress_text"] = "starting..."
-    st.session_state.shared_data["progress_percentage"] = 0
-    st.session_state.shared_data["output_dir"] = output_dir
-
 
 @st.fragment(run_every="5s")
 def thread_status() -> None:
-    if st.session_state.shared_data.get(
-        "done", False
-    ) and not st.session_state.shared_data.get("reloaded", True):
-        print("reloading")
-        st.session_state.shared_data["reloaded"] = True
-        st.rerun()
+    job = current_job()
+    if job is None:
+        return
+
+    if job.finished:
+        if st.session_state.get("reloaded_job", None) != job.job_id:
+            print("reloading")
+            st.session_state.reloaded_job = job.job_id
+            st.rerun()
+        return
+
+    st.success("Analysis is being generated!")
+
+    position = get_scheduler().queue_position(job.job_id)
+    if position is not None:
+        st.progress(0, text=f"waiting for {position} reports ahead")
+    else:
+        st.progress(job.progress, text=job.progress_text)
 
 
 def render_main_page() -> None:
@@ -164,9 +175,6 @@ def render_main_page() -> None:
 
     right_col.subheader("Start analysis")
 
-    if "shared_data" not in st.session_state:
-        st.session_state.shared_data = dict()
-
     if "df" not in st.session_state:
         st.session_state.df = pd.DataFrame(
             {
@@ -205,38 +213,61 @@ def render_main_page() -> None:
         mime="text/csv",
     )
 
-    thread_status()
+    job = current_job()
 
     with right_col.form("Settings"):
         period = st.selectbox("Duration", ["2 years", "5 years", "10 years"])
         country = st.selectbox("Inflation of", ["Germany"])
         currency = st.selectbox("Currency", ["Euro"])
+        output = st.selectbox(
+            "Output",
+            list(OUTPUT_MAP),
+            help="The preview is ready in seconds, the PDF is typeset with LaTeX",
+        )
         submitted = st.form_submit_button(
             "Generate",
-            icon="spinner"
-            if st.session_state.shared_data.get("is_running", False)
-            else None,
+            icon="spinner" if job is not None and not job.finished else None,
         )
 
         if submitted:
-            start_analysis(currency, country, period)
+            start_analysis(currency, country, period, output)
             st.rerun()
 
-    if st.session_state.shared_data.get("is_running", False):
-        right_col.success("Analysis is being generated!")
-        progress_text = st.session_state.shared_data.get("progress_text", "")
-        right_col.progress(0, text=progress_text)
+    with right_col:
+        thread_status()
 
-    pdf_path = st.session_state.shared_data.get("output_dir", Path()) / "main.pdf"
-    if (
-        st.session_state.shared_data.get("done", False)
-        and pdf_path.exists()
-        and st.session_state.shared_data.get("done", False)
-    ):
-        with Path.open(pdf_path, "rb") as f:
+    if job is None or not job.finished:
+        return
+
+    if job.timings:
+        with right_col.expander(f"Generated in {job.elapsed:.1f}s"):
+            st.dataframe(
+                pd.Series(job.timings, name="seconds").round(2), width="stretch"
+            )
+
+    if job.status == JobStatus.FAILED:
+        right_col.error("The analysis failed")
+        return
+
+    if not job.result_path.exists():
+        right_col.info("The report was removed, generate it again")
+        return
+
+    if job.output == "pdf":
+        with Path.open(job.result_path, "rb") as f:
             right_col.download_button(
                 label="Download :dollar::dollar::dollar:",
                 data=f,
                 file_name="report.pdf",
                 mime="application/pdf",
             )
+        return
+
+    preview = job.result_path.read_text(encoding="utf-8")
+    right_col.download_button(
+        label="Download preview",
+        data=preview,
+        file_name="report.html",
+        mime="text/html",
+    )
+    components.html(preview, height=PREVIEW_HEIGHT, scrolling=True)
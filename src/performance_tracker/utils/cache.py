@@ -0,0 +1,380 @@
+import contextlib
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator, Mapping, MutableMapping
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Any, ParamSpec, TypeVar
+
+import numpy as np
+import pandas as pd
+from cachetools.keys import hashkey
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# referenced by values but not owned by them
+UNSIZED_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+ATOMIC_TYPES = (str, bytes, bytearray, int, float, complex, bool)
+
+# seconds between estimating the sizes of byte budget entries again
+RESIZE_INTERVAL = 5 * 60
+
+_registry: dict[str, "SharedCache"] = {}
+_registry_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class CacheStats:
+    hits: int
+    misses: int
+    coalesced: int
+    size: int
+    # only tracked by byte budget caches
+    bytes: int | None = None
+    max_bytes: int | None = None
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / requests if requests else 0.0
+
+    @property
+    def occupancy(self) -> float | None:
+        if self.bytes is None or not self.max_bytes:
+            return None
+
+        return self.bytes / self.max_bytes
+
+
+@dataclass(slots=True)
+class _BudgetEntry:
+    value: object
+    size: int
+    expires: float
+
+
+class ByteBudgetCache(MutableMapping):
+    """LRU cache with a time to live, bounded by the estimated bytes of its values.
+
+    Sizes are estimated on insert and again by periodic resize sweeps, since
+    values like yf.Ticker keep growing after they were cached.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        getsizeof: Callable[[object], int] | None = None,
+        timer: Callable[[], float] = time.monotonic,
+        resize_interval: float = RESIZE_INTERVAL,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.getsizeof = getsizeof or estimate_size
+        self._timer = timer
+        self._resize_interval = resize_interval
+        self._next_resize = timer() + resize_interval
+        self._entries: OrderedDict[Hashable, _BudgetEntry] = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __getitem__(self, key: Hashable) -> object:
+        entry = self._entries[key]
+        if entry.expires <= self._timer():
+            self._remove(key)
+            self.expirations += 1
+            raise KeyError(key)
+
+        self._entries.move_to_end(key)
+
+        return entry.value
+
+    def __setitem__(self, key: Hashable, value: object) -> None:
+        size = self.getsizeof(value)
+        if size > self.max_bytes:
+            raise ValueError("value too large")
+
+        if key in self._entries:
+            self._remove(key)
+        self.expire()
+        self._evict(self.max_bytes - size)
+
+        self._entries[key] = _BudgetEntry(value, size, self._timer() + self.ttl)
+        self._bytes += size
+
+    def __delitem__(self, key: Hashable) -> None:
+        self._remove(key)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+        self.evictions = self.expirations = 0
+
+    def expire(self) -> None:
+        now = self._timer()
+        for key in [key for key, e in self._entries.items() if e.expires <= now]:
+            self._remove(key)
+            self.expirations += 1
+
+    def resize_due(self) -> bool:
+        """Claims the next resize sweep once its interval has passed."""
+        now = self._timer()
+        if now < self._next_resize:
+            return False
+
+        self._next_resize = now + self._resize_interval
+        return True
+
+    def snapshot(self) -> list[tuple[Hashable, object]]:
+        return [(key, entry.value) for key, entry in self._entries.items()]
+
+    def resize(self, sizes: dict[Hashable, tuple[object, int]]) -> None:
+        """Applies sizes estimated from a snapshot, evicting over the budget."""
+        for key, (value, size) in sizes.items():
+            entry = self._entries.get(key)
+            # entries replaced since the snapshot were sized on insert
+            if entry is None or entry.value is not value:
+                continue
+
+            self._bytes += size - entry.size
+            entry.size = size
+
+        self.expire()
+        self._evict(self.max_bytes)
+
+    def _evict(self, max_bytes: int) -> None:
+        while self._entries and self._bytes > max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+
+class SharedCache:
+    """Process-wide cache where concurrent misses for one key share one load."""
+
+    def __init__(self, name: str, cache: MutableMapping) -> None:
+        self.name = name
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+        # values kept beyond the bounds of the cache while it is pinned
+        self._pinned: dict[Hashable, Any] = {}
+        self._pins = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+
+        with _registry_lock:
+            _registry[name] = self
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], T]) -> T:
+        self._resize()
+
+        with self._lock:
+            if key in self._pinned:
+                self._hits += 1
+                return self._pinned[key]
+
+            try:
+                value = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                self._hits += 1
+                if self._pins:
+                    self._pinned[key] = value
+                return value
+
+            future = self._in_flight.get(key)
+            loading = future is None
+            if loading:
+                future = self._in_flight[key] = Future()
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not loading:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # a value larger than the whole cache is handed out without keeping it
+            with contextlib.suppress(ValueError):
+                self._cache[key] = value
+            if self._pins:
+                self._pinned[key] = value
+            del self._in_flight[key]
+        future.set_result(value)
+
+        return value
+
+    @contextlib.contextmanager
+    def pin(self) -> Iterator[None]:
+        """Keeps the values used in the block, regardless of size and expiry."""
+        with self._lock:
+            self._pins += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pins -= 1
+                if not self._pins:
+                    self._pinned.clear()
+
+    def _resize(self) -> None:
+        cache = self._cache
+        if not isinstance(cache, ByteBudgetCache):
+            return
+
+        with self._lock:
+            if not cache.resize_due():
+                return
+            entries = cache.snapshot()
+
+        # walking the values takes long, other lookups go on meanwhile
+        sizes = {key: (value, cache.getsizeof(value)) for key, value in entries}
+
+        with self._lock:
+            cache.resize(sizes)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            if not isinstance(self._cache, ByteBudgetCache):
+                return CacheStats(
+                    hits=self._hits,
+                    misses=self._misses,
+                    coalesced=self._coalesced,
+                    size=len(self._cache),
+                )
+
+            self._cache.expire()
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                coalesced=self._coalesced,
+                size=len(self._cache),
+                bytes=self._cache.bytes,
+                max_bytes=self._cache.max_bytes,
+                evictions=self._cache.evictions,
+                expirations=self._cache.expirations,
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._pinned.clear()
+            self._hits = self._misses = self._coalesced = 0
+
+
+def shared_cached(
+    cache: SharedCache, key: Callable[..., Hashable] = hashkey
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
+    def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            return cache.get_or_load(
+                key(*args, **kwargs), lambda: func(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> dict[str, CacheStats]:
+    with _registry_lock:
+        caches = list(_registry.values())
+
+    return {cache.name: cache.stats() for cache in caches}
+
+
+def cache_table() -> str:
+    table = pd.DataFrame.from_dict(
+        {
+            name: {**asdict(stats), "hit_rate": stats.hit_rate}
+            for name, stats in cache_stats().items()
+        },
+        orient="index",
+    )
+
+    return table.to_string()
+
+
+def clear_caches() -> None:
+    with _registry_lock:
+        caches = list(_registry.values())
+
+    for cache in caches:
+        cache.clear()
+
+
+def estimate_size(value: object, skip: tuple[type, ...] = ()) -> int:
+    """Bytes of a value and of everything it references, except shared skip types."""
+    unsized = UNSIZED_TYPES + skip
+    seen: set[int] = set()
+    pending = [value]
+    size = 0
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, unsized):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, pd.DataFrame):
+            size += int(obj.memory_usage(index=True, deep=True).sum())
+            continue
+        if isinstance(obj, pd.Series | pd.Index):
+            size += int(obj.memory_usage(deep=True))
+            continue
+        if isinstance(obj, np.ndarray):
+            size += obj.nbytes
+            continue
+
+        size += sys.getsizeof(obj)
+        if isinstance(obj, ATOMIC_TYPES):
+            continue
+
+        if isinstance(obj, Mapping):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, list | tuple | set | frozenset):
+            pending.extend(obj)
+
+        if hasattr(obj, "__dict__"):
+            pending.append(obj.__dict__)
+        for cls in type(obj).__mro__:
+            slots = getattr(cls, "__slots__", ())
+            for name in (slots,) if isinstance(slots, str) else slots:
+                if hasattr(obj, name):
+                    pending.append(getattr(obj, name))
+
+    return size
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+# first, last and at least one bucket in between
+MIN_LTTB_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets, always keeping the first and last point."""
+    n = len(y)
+    if max_points >= n or max_points < MIN_LTTB_POINTS:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (max_points - 2)
+    bounds = (np.arange(max_points - 1) * bucket_size).astype(int) + 1
+    bounds[-1] = n - 1
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+
+    for bucket in range(max_points - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        next_end = bounds[bucket + 2] if bucket + 2 < len(bounds) else n
+
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def downsample_positions(
+    series: pd.Series, max_points: int | None, keep: pd.Index | None = None
+) -> np.ndarray:
+    """Row positions of series to plot, with every date in keep left in place."""
+    positions = np.flatnonzero(series.notna().to_numpy())
+
+    if max_points is None or len(positions) <= max_points:
+        return positions
+
+    values = series.to_numpy(dtype=float)[positions]
+    selected = positions[lttb_indices(positions.astype(float), values, max_points)]
+
+    if keep is not None and len(keep):
+        kept = positions[series.index.take(positions).isin(keep)]
+        selected = np.union1d(selected, kept)
+
+    return selected
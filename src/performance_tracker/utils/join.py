@@ -1,66 +1,103 @@
+from dataclasses import dataclass
+
 import pandas as pd
 from yfinance import Ticker
 
 from performance_tracker.services.exchange_rate import ExchangeRateService
+from performance_tracker.services.history_store import (
+    HistoryStore,
+    get_history_store,
+)
 from performance_tracker.services.inflation import InflationService
 from performance_tracker.utils.fill_df import fill_missing_dates
+from performance_tracker.utils.profiling import profiled
 
 
-def join_all_df(
+@dataclass(frozen=True, slots=True)
+class BenchmarkContext:
+    """Comparison and inflation curves of one report, on the daily calendar."""
+
+    comparison_df: pd.DataFrame
+    inflation: pd.Series
+
+
+@profiled("join")
+def build_benchmark_context(
     comp_ticker_currency: str,
     comparison_ticker: Ticker,
     configdict: dict | None,
-    currency: str,
     exchanger: ExchangeRateService,
     inflation_service: InflationService,
-    ticker: Ticker,
     to_currency: str,
-) -> pd.DataFrame:
-    # basic raw information
-    history_df = fill_missing_dates(
-        ticker.history(period=configdict.get("period", "10y"), auto_adjust=True),
-        val_col="Close",
-        until="today",
-    )
+    history_store: HistoryStore | None = None,
+) -> BenchmarkContext:
+    history_store = history_store or get_history_store()
 
     comparison_history_df = fill_missing_dates(
-        comparison_ticker.history(
-            period=configdict.get("period", "10y"), auto_adjust=True
+        history_store.get_history(
+            comparison_ticker, period=configdict.get("period", "10y")
         ),
         val_col="Close",
         until="today",
     )
-
-    exchange_rates_df = exchanger.get_exchange_rate(currency, to_currency)
     exchange_rates_comp_df = exchanger.get_exchange_rate(
         comp_ticker_currency, to_currency
     )
     inflation_df = inflation_service.get_inflation_rate(configdict.get("country", ""))
 
+    comparison_df = comparison_history_df.loc[:, ["Close"]].rename(
+        columns={"Close": "Close_Comparison"}
+    )
+    comparison_df.index = pd.DatetimeIndex(comparison_df.index).tz_localize(None)
+    comparison_df.insert(
+        0,
+        "Close_Comparison_Exchange",
+        exchange_rates_comp_df.loc[:, "Close"].reindex(comparison_df.index),
+    )
+    comparison_df["Close_Comparison_Converted"] = (
+        comparison_df["Close_Comparison"] * comparison_df["Close_Comparison_Exchange"]
+    )
+
+    inflation = inflation_df.loc[:, "interpolated_inflation"].copy()
+    inflation.index = pd.DatetimeIndex(inflation.index).tz_localize(None)
+
+    return BenchmarkContext(comparison_df=comparison_df, inflation=inflation)
+
+
+@profiled("join")
+def join_all_df(
+    benchmark: BenchmarkContext,
+    configdict: dict | None,
+    currency: str,
+    exchanger: ExchangeRateService,
+    ticker: Ticker,
+    to_currency: str,
+    history_store: HistoryStore | None = None,
+) -> pd.DataFrame:
+    history_store = history_store or get_history_store()
+
+    # basic raw information
+    history_df = fill_missing_dates(
+        history_store.get_history(ticker, period=configdict.get("period", "10y")),
+        val_col="Close",
+        until="today",
+    )
+    exchange_rates_df = exchanger.get_exchange_rate(currency, to_currency)
+
     # remove timezones
     history_df.index = pd.DatetimeIndex(history_df.index).tz_localize(None)
-    comparison_history_df.index = pd.DatetimeIndex(
-        comparison_history_df.index
-    ).tz_localize(None)
-    exchange_rates_df.index = pd.DatetimeIndex(exchange_rates_df.index).tz_localize(
-        None
+    # the rates are shared by the positions joined concurrently, keep them as is
+    exchange_rates_df = exchange_rates_df.set_axis(
+        pd.DatetimeIndex(exchange_rates_df.index).tz_localize(None)
     )
-    exchange_rates_comp_df.index = pd.DatetimeIndex(
-        exchange_rates_comp_df.index
-    ).tz_localize(None)
-    inflation_df.index = pd.DatetimeIndex(inflation_df.index).tz_localize(None)
 
     # graph calculation
     history_currency_df = history_df.join(
         exchange_rates_df[["Close"]], how="left", rsuffix="_Exchange"
     )
     history_currency_df = history_currency_df.join(
-        exchange_rates_comp_df[["Close"]],
+        benchmark.comparison_df[["Close_Comparison_Exchange", "Close_Comparison"]],
         how="left",
-        rsuffix="_Comparison_Exchange",
-    )
-    history_currency_df = history_currency_df.join(
-        comparison_history_df[["Close"]], how="left", rsuffix="_Comparison"
     )
     history_currency_df["Close_Exchange"].ffill()
     history_currency_df["Close_Adjusted"] = (
@@ -72,24 +109,20 @@ def join_all_df(
         / history_currency_df["Close_Adjusted"].iloc[0]
     )
 
+    comparison = benchmark.comparison_df["Close_Comparison_Converted"].reindex(
+        history_currency_df.index
+    )
     history_currency_df["Close_Comparison_Adjusted"] = (
-        history_currency_df["Close_Comparison"]
-        * history_currency_df["Close_Comparison_Exchange"]
+        comparison * 100 / comparison.iloc[0]
     )
 
     starting_date = history_currency_df.index[0].replace(tzinfo=None)
-    starting_inflation = inflation_df["interpolated_inflation"].asof(starting_date)
+    starting_inflation = benchmark.inflation.asof(starting_date)
 
-    inflation_df["interpolated_inflation_adjusted"] = (
-        inflation_df["interpolated_inflation"] * 100 / starting_inflation
-    )
-    combined_df = history_currency_df.join(
-        inflation_df[["interpolated_inflation_adjusted"]], how="left"
-    )
-    combined_df["Close_Comparison_Adjusted"] = (
-        combined_df["Close_Comparison_Adjusted"]
+    history_currency_df["interpolated_inflation_adjusted"] = (
+        benchmark.inflation.reindex(history_currency_df.index)
         * 100
-        / combined_df["Close_Comparison_Adjusted"].iloc[0]
+        / starting_inflation
     )
 
-    return combined_df
+    return history_currency_df
@@ -1,3 +1,5 @@
+import pandas as pd
+
 PERIOD_MAP = {
     "1 year": "1y",
     "2 years": "2y",
@@ -8,5 +10,18 @@ PERIOD_MAP = {
 COUNTRY_MAP = {"Germany": "DEU"}
 
 CURRENCY_MAP = {"Euro": "EUR", "US Dollar": "USD"}
+
+OUTPUT_MAP = {"Preview": "html", "PDF": "pdf"}
 currency_to_latex_symbol = {"USD": r"\$", "EUR": r"\euro" "\\"}
 currency_to_latex_symbol_table = {"USD": r"\$", "EUR": r"\euro"}
+currency_to_symbol = {"USD": "$", "EUR": "€"}
+
+# columns of a portfolio CSV and the values of empty cells
+DEFAULT_COLUMN_VALUES = {
+    "Ticker": "",
+    "Quantity": 0,
+    "Purchase Date": pd.NaT,
+    "Purchase Price": 0.0,
+    "Sell Date": pd.NaT,
+    "Sell Price": 0.0,
+}
@@ -0,0 +1,199 @@
+import linecache
+import threading
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import ClassVar
+
+import pandas as pd
+
+# frames kept per allocation, sites are reported by the innermost one
+TRACE_FRAMES = 1
+TOP_SITES = 10
+MIB = 1024 * 1024
+
+MEMORY_COLUMNS = ["calls", "peak_mib", "retained_mib"]
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryUsage:
+    stage: str
+    position: str | None
+    # bytes above the traced memory at the start of the stage
+    peak: int
+    retained: int
+
+
+@dataclass(frozen=True, slots=True)
+class AllocationSite:
+    filename: str
+    lineno: int
+    size: int
+    count: int
+
+    @property
+    def line(self) -> str:
+        return linecache.getline(self.filename, self.lineno).strip()
+
+
+class _OpenStage:
+    __slots__ = ("peak", "start")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.peak = start
+
+
+class MemoryProfiler:
+    """Peak and retained memory of stages, traced by tracemalloc while active.
+
+    Memory is traced for the whole process, stages running at the same time
+    share their peak.
+    """
+
+    _active: ClassVar["MemoryProfiler | None"] = None
+
+    def __init__(self, top_sites: int = TOP_SITES) -> None:
+        self._top_sites = top_sites
+        self._lock = threading.Lock()
+        self._open: set[_OpenStage] = set()
+        self._usages: list[MemoryUsage] = list()
+        self._sites: list[AllocationSite] = list()
+
+    @classmethod
+    def active(cls) -> "MemoryProfiler | None":
+        return cls._active
+
+    @contextmanager
+    def activate(self) -> Iterator["MemoryProfiler"]:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(TRACE_FRAMES)
+        baseline = tracemalloc.take_snapshot()
+
+        previous = MemoryProfiler._active
+        MemoryProfiler._active = self
+        try:
+            yield self
+        finally:
+            MemoryProfiler._active = previous
+            self._sites = self._retained_sites(baseline)
+            if started:
+                tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str, position: str | None = None) -> Iterator[None]:
+        with self._lock:
+            self._update_peaks()
+            stage = _OpenStage(tracemalloc.get_traced_memory()[0])
+            self._open.add(stage)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._update_peaks()
+                self._open.discard(stage)
+                current = tracemalloc.get_traced_memory()[0]
+                self._usages.append(
+                    MemoryUsage(
+                        stage=name,
+                        position=position,
+                        peak=stage.peak - stage.start,
+                        retained=current - stage.start,
+                    )
+                )
+
+    @property
+    def usages(self) -> list[MemoryUsage]:
+        with self._lock:
+            return list(self._usages)
+
+    @property
+    def sites(self) -> list[AllocationSite]:
+        """Allocations still alive when the profiler was deactivated."""
+        return list(self._sites)
+
+    def summary(self) -> pd.DataFrame:
+        return self._summarize(self.usages, "stage")
+
+    def positions(self) -> pd.DataFrame:
+        usages = [usage for usage in self.usages if usage.position is not None]
+
+        return self._summarize(usages, "position")
+
+    def report(self) -> str:
+        sites = "\n".join(
+            f"{site.size / MIB:8.2f} MiB {site.count:8d} blocks  "
+            f"{site.filename}:{site.lineno}  {site.line}"
+            for site in self._sites
+        )
+
+        return "\n\n".join(
+            [
+                self.summary().round(2).to_string(),
+                self.positions().round(2).to_string(),
+                f"retained allocations\n{sites}",
+            ]
+        )
+
+    def _update_peaks(self) -> None:
+        # the traced peak is reset per stage, open stages keep their own
+        peak = tracemalloc.get_traced_memory()[1]
+        for stage in self._open:
+            stage.peak = max(stage.peak, peak)
+        tracemalloc.reset_peak()
+
+    def _retained_sites(self, baseline: tracemalloc.Snapshot) -> list[AllocationSite]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        growth = [
+            stat
+            for stat in snapshot.compare_to(baseline, "lineno")
+            if stat.size_diff > 0
+        ]
+
+        return [
+            AllocationSite(
+                filename=stat.traceback[0].filename,
+                lineno=stat.traceback[0].lineno,
+                size=stat.size_diff,
+                count=stat.count_diff,
+            )
+            for stat in growth[: self._top_sites]
+        ]
+
+    @staticmethod
+    def _summarize(usages: list[MemoryUsage], by: str) -> pd.DataFrame:
+        if not usages:
+            return pd.DataFrame(
+                columns=pd.Index(MEMORY_COLUMNS), index=pd.Index([], name=by)
+            )
+
+        df = pd.DataFrame(
+            {
+                by: [getattr(usage, by) for usage in usages],
+                "peak_mib": [usage.peak / MIB for usage in usages],
+                "retained_mib": [usage.retained / MIB for usage in usages],
+            }
+        )
+        grouped = df.groupby(by, sort=False)
+
+        return pd.DataFrame(
+            {
+                "calls": grouped.size(),
+                "peak_mib": grouped["peak_mib"].max(),
+                "retained_mib": grouped["retained_mib"].sum(),
+            }
+        )
+
+
+def track_memory(
+    name: str, position: str | None = None
+) -> AbstractContextManager[None]:
+    profiler = MemoryProfiler.active()
+    if profiler is None:
+        return nullcontext()
+
+    return profiler.stage(name, position)
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+
+PACKAGE_PATH = Path(__file__).parent.parent
+
+# the package directory may not be writable once installed
+USER_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+    / "performance-tracker"
+)
+
+CACHE_DIR = Path(os.environ.get("PERFORMANCE_TRACKER_CACHE_DIR", USER_CACHE_DIR))
@@ -0,0 +1,223 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar, ParamSpec, TypeVar
+
+import pandas as pd
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+SUMMARY_COLUMNS = ["calls", "wall_s", "mean_ms", "max_ms", "cpu_s", "errors", "bytes"]
+
+
+@dataclass(frozen=True, slots=True)
+class Span:
+    name: str
+    category: str
+    # seconds since the profiler was created
+    start: float
+    wall: float
+    cpu: float
+    thread_id: int
+    thread_name: str
+    error: str | None = None
+    output_bytes: int | None = None
+
+
+class SpanDetails:
+    """Filled in by the profiled code while its span is open."""
+
+    __slots__ = ("output_bytes",)
+
+    def __init__(self) -> None:
+        self.output_bytes: int | None = None
+
+
+# handed out while no profiler is active, whatever is set on it is dropped
+_DISABLED = contextlib.nullcontext(SpanDetails())
+
+
+class Profiler:
+    """Records spans of every thread while it is active."""
+
+    _active: ClassVar["Profiler | None"] = None
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.perf_counter,
+        cpu_clock: Callable[[], float] = time.thread_time,
+    ) -> None:
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self._spans: list[Span] = list()
+
+    @classmethod
+    def active(cls) -> "Profiler | None":
+        return cls._active
+
+    @contextmanager
+    def activate(self) -> Iterator["Profiler"]:
+        previous = Profiler._active
+        Profiler._active = self
+        try:
+            yield self
+        finally:
+            Profiler._active = previous
+
+    @contextmanager
+    def span(self, name: str, category: str = "") -> Iterator[SpanDetails]:
+        details = SpanDetails()
+        error = None
+        start = self._clock()
+        cpu_start = self._cpu_clock()
+        try:
+            yield details
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            cpu = self._cpu_clock() - cpu_start
+            wall = self._clock() - start
+            thread = threading.current_thread()
+            span = Span(
+                name=name,
+                category=category,
+                start=start - self._started,
+                wall=wall,
+                cpu=cpu,
+                thread_id=thread.ident or 0,
+                thread_name=thread.name,
+                error=error,
+                output_bytes=details.output_bytes,
+            )
+            with self._lock:
+                self._spans.append(span)
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def chrome_trace(self) -> dict:
+        """Trace-event format, opened by chrome://tracing and Perfetto."""
+        pid = os.getpid()
+        spans = self.spans
+
+        events: list[dict] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            }
+            for thread_id, thread_name in dict(
+                (span.thread_id, span.thread_name) for span in spans
+            ).items()
+        ]
+        for span in spans:
+            args: dict[str, object] = {"cpu_ms": round(span.cpu * 1000, 3)}
+            if span.error is not None:
+                args["error"] = span.error
+            if span.output_bytes is not None:
+                args["bytes"] = span.output_bytes
+
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6, 1),
+                    "dur": round(span.wall * 1e6, 1),
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+    def summary(self) -> pd.DataFrame:
+        spans = self.spans
+        if not spans:
+            return pd.DataFrame(
+                columns=pd.Index(SUMMARY_COLUMNS),
+                index=pd.MultiIndex.from_tuples([], names=["category", "name"]),
+            )
+
+        df = pd.DataFrame(
+            {
+                "category": [span.category for span in spans],
+                "name": [span.name for span in spans],
+                "wall": [span.wall for span in spans],
+                "wall_ms": [span.wall * 1000 for span in spans],
+                "cpu": [span.cpu for span in spans],
+                "error": [span.error is not None for span in spans],
+                "bytes": [span.output_bytes or 0 for span in spans],
+            }
+        )
+        grouped = df.groupby(["category", "name"])
+
+        summary = pd.DataFrame(
+            {
+                "calls": grouped.size(),
+                "wall_s": grouped["wall"].sum(),
+                "mean_ms": grouped["wall_ms"].mean(),
+                "max_ms": grouped["wall_ms"].max(),
+                "cpu_s": grouped["cpu"].sum(),
+                "errors": grouped["error"].sum(),
+                "bytes": grouped["bytes"].sum(),
+            }
+        )
+
+        return summary.sort_values("wall_s", ascending=False)
+
+    def summary_table(self) -> str:
+        return self.summary().round(3).to_string()
+
+
+def profile(name: str, category: str = "") -> AbstractContextManager[SpanDetails]:
+    profiler = Profiler.active()
+    if profiler is None:
+        return _DISABLED
+
+    return profiler.span(name, category)
+
+
+def profiled(
+    category: str, name: str | None = None
+) -> Callable[[Callable[P, T]], Callable[P, T]]:
+    """Records a span per call while a profiler is active, text results in bytes."""
+
+    def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            profiler = Profiler.active()
+            if profiler is None:
+                return func(*args, **kwargs)
+
+            with profiler.span(span_name, category) as details:
+                result = func(*args, **kwargs)
+                if isinstance(result, str):
+                    details.output_bytes = len(result.encode("utf-8"))
+                return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class ProgressEvent:
+    stage: str
+    completed: int
+    total: int
+    # of the whole run, weighted by stage
+    progress: float
+    elapsed: float
+    eta: float | None
+    message: str
+    timings: dict[str, float]
+
+    @property
+    def text(self) -> str:
+        text = f"{self.stage} {self.completed}/{self.total}"
+        if self.message:
+            text += f": {self.message}"
+        if self.eta is not None:
+            text += f" (about {self.eta:.0f}s left)"
+        return text
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class ProgressTracker:
+    """Times the stages of a run and reports weighted progress to a callback."""
+
+    def __init__(
+        self,
+        stages: Mapping[str, float],
+        callback: ProgressCallback | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        total_weight = sum(stages.values())
+        self._weights = {stage: w / total_weight for stage, w in stages.items()}
+        self._callback = callback
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._completed = dict.fromkeys(stages, 0)
+        self._totals = dict.fromkeys(stages, 1)
+        self._timings: dict[str, float] = dict()
+
+    @contextmanager
+    def stage(self, name: str, total: int = 1) -> Iterator[None]:
+        with self._lock:
+            self._totals[name] = max(total, 1)
+            self._completed[name] = 0
+        self._emit(name, "started")
+
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, self._clock() - start)
+            with self._lock:
+                self._completed[name] = self._totals[name]
+            self._emit(name, "done")
+
+    def advance(self, name: str, message: str = "", steps: int = 1) -> None:
+        with self._lock:
+            self._completed[name] = min(
+                self._completed[name] + steps, self._totals[name]
+            )
+        self._emit(name, message)
+
+    def set_total(self, name: str, total: int) -> None:
+        with self._lock:
+            self._totals[name] = max(total, 1)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._timings[name] = self._timings.get(name, 0.0) + seconds
+
+    @property
+    def timings(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._timings)
+
+    def _emit(self, name: str, message: str) -> None:
+        if self._callback is None:
+            return
+
+        with self._lock:
+            progress = sum(
+                weight * self._completed[stage] / self._totals[stage]
+                for stage, weight in self._weights.items()
+            )
+            elapsed = self._clock() - self._started
+            eta = elapsed / progress * (1 - progress) if progress > 0 else None
+            event = ProgressEvent(
+                stage=name,
+                completed=self._completed[name],
+                total=self._totals[name],
+                progress=min(progress, 1.0),
+                elapsed=elapsed,
+                eta=eta,
+                message=message,
+                timings=dict(self._timings),
+            )
+
+        self._callback(event)
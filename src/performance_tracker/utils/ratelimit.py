@@ -1,36 +1,114 @@
 import asyncio
+import inspect
+import threading
 import time
 from collections.abc import Callable
 from functools import wraps
-from typing import ParamSpec, TypeVar
+from typing import ParamSpec, TypeVar, cast
+
+from performance_tracker.utils.profiling import profile
 
 SECONDS_PER_MINUTE = 60
 
+# requests per minute and burst of the outbound apis
+RATE_LIMITS: dict[str, tuple[float, int]] = {
+    "yahoo": (360, 30),
+    "worldbank": (60, 5),
+}
+
 P = ParamSpec("P")
 R = TypeVar("R")
 
+_limiters: dict[str, "RateLimiter"] = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Token bucket shared by threads and event loops, O(1) per call.
+
+    Calls beyond the burst reserve their tokens ahead and wait until they are
+    refilled, so waiting callers are served in the order they arrived. Without
+    rpm nothing is limited.
+    """
+
+    def __init__(
+        self,
+        rpm: float | None = 60,
+        burst: int = 1,
+        name: str = "",
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.name = name
+        self._rate = None if rpm is None else rpm / SECONDS_PER_MINUTE
+        self._capacity = float(max(1, burst))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self._capacity
+        self._updated = clock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Takes tokens and returns the seconds to wait until they are refilled."""
+        if self._rate is None:
+            return 0.0
+
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._capacity, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+
+            return max(0.0, -self._tokens / self._rate)
 
-class AsyncRateLimiter:
-    def __init__(self, rpm: int = 60) -> None:
-        self._rpm = rpm
-        self._calls_at = []
+    def acquire(self, tokens: float = 1) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            with profile(f"ratelimit.{self.name}", "ratelimit"):
+                self._sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1) -> None:
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
 
     def __call__(self, func: Callable[P, R]) -> Callable[P, R]:
-        @wraps(func)
-        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
-            while True:
-                now = time.time()
-                self._calls_at = [
-                    c for c in self._calls_at if c > now - SECONDS_PER_MINUTE
-                ]
+        if inspect.iscoroutinefunction(func):
 
-                if len(self._calls_at) < self._rpm:
-                    break
+            @wraps(func)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+                await self.acquire_async()
+                return await func(*args, **kwargs)
 
-                wait_time = self._calls_at[0] + SECONDS_PER_MINUTE - now
-                await asyncio.sleep(wait_time)
+            # the coroutine function keeps its signature
+            return cast(Callable[P, R], async_wrapper)
 
-            self._calls_at.append(time.time())
+        @wraps(func)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            self.acquire()
             return func(*args, **kwargs)
 
         return wrapper
+
+
+def get_rate_limiter(name: str) -> RateLimiter:
+    """The process-wide budget of one api, see RATE_LIMITS."""
+    with _limiters_lock:
+        if name not in _limiters:
+            if name not in RATE_LIMITS:
+                raise ValueError(
+                    f"no rate limit for {name}, use one of {tuple(RATE_LIMITS)}"
+                )
+
+            rpm, burst = RATE_LIMITS[name]
+            _limiters[name] = RateLimiter(rpm, burst, name)
+
+        return _limiters[name]
+
+
+def set_rate_limit(name: str, rpm: float | None, burst: int = 1) -> None:
+    """Replaces the budget of one api, None lifts it."""
+    with _limiters_lock:
+        _limiters[name] = RateLimiter(rpm, burst, name)
@@ -0,0 +1,232 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.core.batch import (
+    BatchResult,
+    find_portfolios,
+    main,
+    prefetch_market_data,
+    read_portfolio,
+    run_batch,
+    summarize,
+)
+from performance_tracker.core.worker import RESULT_FILES
+
+PORTFOLIO_CSV = """Ticker,Quantity,Purchase Date,Purchase Price,Sell Date,Sell Price
+SAP.DE,15,,0.0,,0.0
+NVDA,4,2023-01-02,0.0,,0.0
+"""
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.input_dir = self.root / "portfolios"
+        self.input_dir.mkdir()
+        self.calls: list[tuple[pd.DataFrame, dict, Path, str]] = []
+
+        for name in ("a.csv", "b.csv"):
+            (self.input_dir / name).write_text(PORTFOLIO_CSV, encoding="utf-8")
+        (self.input_dir / "notes.txt").write_text("", encoding="utf-8")
+
+        prefetch = patch(
+            "performance_tracker.core.batch.prefetch_market_data", return_value=2
+        )
+        self.prefetch = prefetch.start()
+        self.addCleanup(prefetch.stop)
+
+    def _run(
+        self, df: pd.DataFrame, config_dict: dict, output_dir: Path, output: str
+    ) -> None:
+        self.calls.append((df, config_dict, output_dir, output))
+        if "NVDA" not in df["Ticker"].tolist():
+            return
+
+        output_dir.mkdir(parents=True)
+        (output_dir / RESULT_FILES[output]).write_bytes(b"%")
+
+    def test_find_portfolios_of_directories_and_patterns(self) -> None:
+        with self.assertWarnsRegex(UserWarning, "missing/"):
+            paths = find_portfolios(
+                [str(self.input_dir), str(self.input_dir / "*.csv"), "missing/*.csv"]
+            )
+
+        self.assertEqual(paths, [self.input_dir / "a.csv", self.input_dir / "b.csv"])
+
+    def test_read_portfolio_fills_empty_cells(self) -> None:
+        df = read_portfolio(self.input_dir / "a.csv")
+
+        self.assertEqual(df["Ticker"].tolist(), ["SAP.DE", "NVDA"])
+        self.assertTrue(pd.isna(df["Purchase Date"].iloc[0]))
+        self.assertEqual(df["Purchase Date"].iloc[1], pd.Timestamp("2023-01-02"))
+
+    def test_read_portfolio_without_columns(self) -> None:
+        path = self.input_dir / "broken.csv"
+        path.write_text("Ticker\nSAP.DE\n", encoding="utf-8")
+
+        with self.assertRaisesRegex(ValueError, "Quantity"):
+            read_portfolio(path)
+
+    def test_run_batch_shares_market_data(self) -> None:
+        paths = find_portfolios([str(self.input_dir)])
+
+        results = run_batch(
+            paths,
+            {"currency": "EUR", "period": "1y"},
+            output_root=self.root / "output",
+            output="html",
+            max_workers=2,
+            runner=self._run,
+        )
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(
+            [result.output_dir for result in results],
+            [self.root / "output" / "a", self.root / "output" / "b"],
+        )
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual({call[3] for call in self.calls}, {"html"})
+
+        self.prefetch.assert_called_once()
+        portfolios, config_dict = self.prefetch.call_args.args
+        self.assertEqual(len(portfolios), 2)
+        self.assertEqual(config_dict["period"], "1y")
+
+    @patch("performance_tracker.core.batch.pin_snapshots")
+    def test_run_batch_keeps_the_snapshots(self, pin_snapshots: MagicMock) -> None:
+        events = []
+        pin_snapshots.return_value.__enter__.side_effect = lambda: events.append("pin")
+        pin_snapshots.return_value.__exit__.side_effect = lambda *_: events.append(
+            "unpin"
+        )
+        self.prefetch.side_effect = lambda *_: events.append("prefetch")
+
+        run_batch(
+            find_portfolios([str(self.input_dir)]),
+            {},
+            output_root=self.root / "output",
+            runner=lambda *args: events.append("report"),
+        )
+
+        self.assertEqual(events, ["pin", "prefetch", "report", "report", "unpin"])
+
+    def test_run_batch_reports_failures(self) -> None:
+        broken = self.input_dir / "broken.csv"
+        broken.write_text("Ticker\nSAP.DE\n", encoding="utf-8")
+        (self.input_dir / "c.csv").write_text(
+            "Ticker,Quantity,Purchase Date,Purchase Price,Sell Date,Sell Price\n"
+            "SAP.DE,1,,,,\n",
+            encoding="utf-8",
+        )
+
+        results = run_batch(
+            find_portfolios([str(self.input_dir)]),
+            {},
+            output_root=self.root / "output",
+            runner=self._run,
+        )
+
+        failed = {result.portfolio.name: result.error for result in results}
+        self.assertIn("Missing columns", failed.pop("broken.csv"))
+        self.assertEqual(failed.pop("c.csv"), "the report was not created")
+        self.assertEqual(set(failed.values()), {None})
+        # broken portfolios are not generated
+        self.assertEqual(len(self.calls), 3)
+
+    def test_run_batch_without_prefetched_data(self) -> None:
+        self.prefetch.side_effect = ConnectionError("offline")
+
+        with self.assertWarnsRegex(UserWarning, "offline"):
+            results = run_batch(
+                find_portfolios([str(self.input_dir)]),
+                {},
+                output_root=self.root / "output",
+                runner=self._run,
+            )
+
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_summarize(self) -> None:
+        summary = summarize(
+            [
+                BatchResult(Path("a.csv"), Path("a"), 2.0),
+                BatchResult(Path("b.csv"), Path("b"), 4.0),
+                BatchResult(Path("c.csv"), Path("c"), 1.0, "offline"),
+            ],
+            6.0,
+        )
+
+        self.assertIn("2 of 3 reports in 6.0s (20.0 reports/min)", summary)
+        self.assertIn("median 3.0s", summary)
+        self.assertIn("failed c.csv: offline", summary)
+
+    def test_main_exit_code(self) -> None:
+        with (
+            patch(
+                "performance_tracker.core.batch.run_report", side_effect=self._run
+            ) as run_report,
+            contextlib.redirect_stdout(io.StringIO()) as stdout,
+        ):
+            exit_code = main(
+                [
+                    str(self.input_dir / "*.csv"),
+                    "--output",
+                    "html",
+                    "--period",
+                    "5y",
+                    "--output-dir",
+                    str(self.root / "output"),
+                ]
+            )
+
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(run_report.call_count, 2)
+        self.assertEqual(self.calls[0][1]["period"], "5y")
+        self.assertIn("2 of 2 reports", stdout.getvalue())
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(main([str(self.root / "missing")]), 1)
+
+
+class TestPrefetchMarketData(unittest.TestCase):
+    def test_every_symbol_is_fetched_once(self) -> None:
+        portfolios = [
+            pd.DataFrame({"Ticker": ["SAP.DE", "NVDA"]}),
+            pd.DataFrame({"Ticker": ["NVDA", "", "SAP.DE"]}),
+        ]
+
+        with (
+            patch("performance_tracker.core.batch.get_tickers") as get_tickers,
+            patch("performance_tracker.core.batch.get_snapshot") as get_snapshot,
+            patch("performance_tracker.core.batch.get_history_store") as store,
+            patch("performance_tracker.core.batch.ExchangeRateService") as exchanger,
+            patch("performance_tracker.core.batch.InflationService") as inflation,
+        ):
+            get_tickers.side_effect = lambda symbol: [symbol]
+            get_snapshot.return_value.info = {"currency": "USD"}
+
+            count = prefetch_market_data(
+                portfolios, {"currency": "EUR", "country": "DEU", "period": "5y"}
+            )
+
+        self.assertEqual(count, 2)
+        self.assertEqual(
+            sorted(call.args[0] for call in get_tickers.call_args_list),
+            ["EUNL.DE", "NVDA", "SAP.DE"],
+        )
+        store.return_value.prefetch.assert_called_once_with(
+            ["SAP.DE", "NVDA", "EUNL.DE"], period="5y"
+        )
+        exchanger.return_value.prefetch.assert_called_once_with(
+            ["USD", "USD", "USD", "EUR"]
+        )
+        inflation.return_value.get_inflation_rate.assert_called_once_with("DEU")
@@ -0,0 +1,136 @@
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from performance_tracker.core.benchmark import (
+    COMPARISON_SYMBOL,
+    BenchmarkSuite,
+    Measurement,
+    compare,
+    load_results,
+    main,
+    save_results,
+    synthetic_symbols,
+    write_synthetic_fixtures,
+)
+from performance_tracker.services.market_data import (
+    FixtureStore,
+    MarketDataProvider,
+    ReplayProvider,
+    ReplayTicker,
+    get_provider,
+    set_provider,
+)
+from performance_tracker.utils.memory import MemoryProfiler
+
+
+class TestBenchmark(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = Path(self._tmp.name)
+        self.addCleanup(set_provider, MarketDataProvider())
+
+    def test_synthetic_fixtures_are_replayable(self) -> None:
+        store = FixtureStore(self.root / "fixtures")
+        symbols = synthetic_symbols(2)
+
+        write_synthetic_fixtures(store, symbols, now=pd.Timestamp("2024-06-28"))
+
+        self.assertEqual(
+            store.symbols(), sorted([*symbols, COMPARISON_SYMBOL, "EUR=X"])
+        )
+        replay = ReplayProvider(store)
+        history = replay.history(ReplayTicker(symbols[0]), period="1y")
+        self.assertEqual(history.index[-1], pd.Timestamp("2024-06-28"))
+        self.assertTrue((history["Close"] > 0).all())
+        self.assertIn("currency", replay.field(ReplayTicker(symbols[1]), "info"))
+
+    def test_run_restores_the_provider(self) -> None:
+        previous = get_provider()
+        suite = BenchmarkSuite(self.root, repeat=1)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            measurements = suite.run(
+                sizes=(1, 2),
+                periods=("1y",),
+                stages=("fill_missing_dates", "join_all_df", "get_datapoints"),
+            )
+
+        self.assertIs(get_provider(), previous)
+        self.assertEqual(
+            [measurement.key for measurement in measurements],
+            [
+                "fill_missing_dates/1/1y",
+                "join_all_df/1/1y",
+                "get_datapoints/1/1y",
+                "fill_missing_dates/2/1y",
+                "join_all_df/2/1y",
+                "get_datapoints/2/1y",
+            ],
+        )
+        self.assertTrue(all(m.best <= m.seconds for m in measurements))
+
+    def test_memory_is_traced_per_stage(self) -> None:
+        memory = MemoryProfiler()
+        suite = BenchmarkSuite(self.root, repeat=1, memory=memory)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            suite.run(sizes=(2,), periods=("1y",), stages=("join_all_df",))
+
+        self.assertEqual([usage.stage for usage in memory.usages], ["join_all_df/2/1y"])
+        self.assertGreater(memory.usages[0].peak, 0)
+
+    def test_compare_flags_slowdowns(self) -> None:
+        measurements = [
+            Measurement("join_all_df", 10, "1y", 0.5, 0.4),
+            Measurement("sidebar", 10, "1y", 0.003, 0.002),
+            Measurement("generate", 10, "1y", 1.1, 1.0),
+            Measurement("compile", 10, "1y", 2.0, 1.9),
+        ]
+        baseline = {
+            "join_all_df/10/1y": 0.3,
+            # too fast to tell apart from noise
+            "sidebar/10/1y": 0.001,
+            "generate/10/1y": 1.0,
+        }
+
+        regressions = compare(measurements, baseline, threshold=0.2)
+
+        self.assertEqual([r.key for r in regressions], ["join_all_df/10/1y"])
+        self.assertAlmostEqual(regressions[0].change, 2 / 3)
+
+    def test_results_round_trip(self) -> None:
+        path = self.root / "baselines" / "main.json"
+        measurements = [Measurement("sidebar", 1, "5y", 0.25, 0.2)]
+
+        save_results(path, measurements, repeat=3)
+
+        self.assertEqual(load_results(path), {"sidebar/1/5y": 0.25})
+
+    def test_main_fails_on_regressions(self) -> None:
+        path = self.root / "baseline.json"
+        save_results(path, [Measurement("join_all_df", 1, "1y", 1e-6, 1e-6)], 1)
+        argv = [
+            "--sizes", "1",
+            "--periods", "1y",
+            "--stages", "join_all_df",
+            "--repeat", "1",
+            "--compare", str(path),
+            "--threshold", "0",
+        ]  # fmt: skip
+
+        output = io.StringIO()
+        with (
+            patch("performance_tracker.core.benchmark.MIN_REGRESSION_SECONDS", 0),
+            contextlib.redirect_stdout(output),
+        ):
+            exit_code = main(argv)
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("regression join_all_df/1/1y", output.getvalue())
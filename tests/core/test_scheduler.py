@@ -0,0 +1,238 @@
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import closing
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+
+from performance_tracker.core.scheduler import JobScheduler, JobStatus
+from performance_tracker.core.worker import RESULT_FILES
+from performance_tracker.utils.progress import ProgressCallback, ProgressTracker
+
+
+class TestJobScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.db_path = Path(self._tmp.name) / "jobs.sqlite"
+        self.calls: list[tuple[pd.DataFrame, dict, Path, str]] = []
+        self.release = threading.Event()
+        self.release.set()
+
+        self.df = pd.DataFrame(
+            {
+                "Ticker": ["SAP.DE", "NVDA"],
+                "Quantity": [15, 4],
+                "Purchase Date": pd.to_datetime(["2023-01-01", None]),
+            }
+        )
+
+    def tearDown(self) -> None:
+        self.release.set()
+
+    def _scheduler(
+        self, max_workers: int = 2, max_result_bytes: int = 10_000
+    ) -> JobScheduler:
+        scheduler = JobScheduler(
+            self.db_path,
+            Path(self._tmp.name) / "output",
+            max_workers=max_workers,
+            runner=self._run,
+            max_result_bytes=max_result_bytes,
+        )
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def _run(
+        self,
+        df: pd.DataFrame,
+        config_dict: dict,
+        output_dir: Path,
+        output: str,
+        progress: ProgressCallback,
+    ) -> None:
+        self.release.wait(timeout=5)
+        self.calls.append((df, config_dict, output_dir, output))
+        if config_dict.get("fail"):
+            raise RuntimeError("offline")
+
+        tracker = ProgressTracker({"fetch": 1, "compile": 1}, progress)
+        with tracker.stage("fetch", total=2):
+            tracker.advance("fetch", "SAP.DE")
+
+        if not config_dict.get("no_result"):
+            output_dir.mkdir(parents=True)
+            (output_dir / RESULT_FILES[output]).write_bytes(b"%" * 1000)
+
+    def _wait(self, scheduler: JobScheduler, job_id: str) -> None:
+        deadline = time.monotonic() + 5
+        while not scheduler.status(job_id).finished and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_job_runs_with_its_input(self) -> None:
+        scheduler = self._scheduler()
+        job_id = scheduler.submit(self.df, {"currency": "EUR"}, output="html")
+        self.assertEqual(scheduler.status(job_id).status, JobStatus.QUEUED)
+
+        scheduler.start()
+        self._wait(scheduler, job_id)
+
+        job = scheduler.status(job_id)
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(job.output_dir, Path(self._tmp.name) / "output" / job_id)
+
+        df, config_dict, output_dir, output = self.calls[0]
+        pd.testing.assert_frame_equal(df, self.df)
+        self.assertEqual(
+            (config_dict, output_dir, output),
+            ({"currency": "EUR"}, job.output_dir, "html"),
+        )
+
+    def test_progress_and_timings_are_stored(self) -> None:
+        scheduler = self._scheduler()
+        job_id = scheduler.submit(self.df, {})
+        scheduler.start()
+        self._wait(scheduler, job_id)
+
+        job = scheduler.status(job_id)
+        self.assertTrue(job.progress_text.startswith("fetch 2/2: done"))
+        self.assertIn("fetch", job.timings)
+        self.assertIsNone(job.eta)
+        self.assertGreaterEqual(job.elapsed, 0)
+
+    def test_identical_pending_jobs_are_shared(self) -> None:
+        scheduler = self._scheduler()
+
+        first = scheduler.submit(self.df, {"currency": "EUR"})
+        self.assertEqual(scheduler.submit(self.df, {"currency": "EUR"}), first)
+        self.assertNotEqual(scheduler.submit(self.df, {"currency": "USD"}), first)
+        self.assertNotEqual(
+            scheduler.submit(self.df, {"currency": "EUR"}, "html"), first
+        )
+
+    def test_finished_result_is_reused_on_the_same_day(self) -> None:
+        scheduler = self._scheduler()
+        scheduler.start()
+        job_id = scheduler.submit(self.df, {"currency": "EUR"})
+        self._wait(scheduler, job_id)
+
+        self.assertEqual(scheduler.submit(self.df, {"currency": "EUR"}), job_id)
+        self.assertEqual(len(self.calls), 1)
+
+        tomorrow = pd.Timestamp.now() + pd.Timedelta(days=1)
+        with patch("pandas.Timestamp.now", return_value=tomorrow):
+            self.assertNotEqual(scheduler.submit(self.df, {"currency": "EUR"}), job_id)
+
+    def test_removed_result_is_generated_again(self) -> None:
+        scheduler = self._scheduler()
+        scheduler.start()
+        job_id = scheduler.submit(self.df, {})
+        self._wait(scheduler, job_id)
+
+        scheduler.status(job_id).result_path.unlink()
+
+        self.assertNotEqual(scheduler.submit(self.df, {}), job_id)
+
+    def test_job_without_result_failed(self) -> None:
+        scheduler = self._scheduler()
+        scheduler.start()
+        job_id = scheduler.submit(self.df, {"no_result": True})
+        self._wait(scheduler, job_id)
+
+        self.assertEqual(scheduler.status(job_id).status, JobStatus.FAILED)
+
+    def test_least_recently_used_results_are_evicted(self) -> None:
+        scheduler = self._scheduler(max_workers=1, max_result_bytes=2500)
+        scheduler.start()
+
+        job_ids = list()
+        for n in range(3):
+            job_ids.append(scheduler.submit(self.df, {"n": n}))
+            self._wait(scheduler, job_ids[-1])
+            if n == 1:
+                # the first result is requested again and stays
+                self.assertEqual(scheduler.submit(self.df, {"n": 0}), job_ids[0])
+        # jobs evict after they finish, make sure the last one has
+        scheduler.evict_results()
+
+        statuses = [scheduler.status(job_id).status for job_id in job_ids]
+        self.assertEqual(statuses, [JobStatus.DONE, JobStatus.EVICTED, JobStatus.DONE])
+        self.assertFalse(scheduler.status(job_ids[1]).output_dir.exists())
+        self.assertTrue(scheduler.status(job_ids[0]).result_path.exists())
+
+    def test_higher_priority_runs_first(self) -> None:
+        scheduler = self._scheduler(max_workers=1)
+        low = scheduler.submit(self.df, {"name": "low"})
+        high = scheduler.submit(self.df, {"name": "high"}, priority=1)
+        self.assertEqual(scheduler.queue_position(low), 1)
+        self.assertEqual(scheduler.queue_position(high), 0)
+
+        scheduler.start()
+        self._wait(scheduler, low)
+
+        self.assertEqual([call[1]["name"] for call in self.calls], ["high", "low"])
+
+    def test_pool_is_bounded(self) -> None:
+        self.release.clear()
+        scheduler = self._scheduler(max_workers=2)
+        job_ids = [scheduler.submit(self.df, {"n": n}) for n in range(3)]
+        scheduler.start()
+
+        time.sleep(0.2)
+        statuses = [scheduler.status(job_id).status for job_id in job_ids]
+        self.assertEqual(statuses.count(JobStatus.RUNNING), 2)
+        self.assertEqual(statuses.count(JobStatus.QUEUED), 1)
+
+        self.release.set()
+        for job_id in job_ids:
+            self._wait(scheduler, job_id)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_failed_job_keeps_the_error(self) -> None:
+        scheduler = self._scheduler()
+        job_id = scheduler.submit(self.df, {"fail": True})
+        scheduler.start()
+        self._wait(scheduler, job_id)
+
+        job = scheduler.status(job_id)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn("offline", job.error)
+
+    def test_results_are_sized_in_their_stored_directory(self) -> None:
+        job_id = self._scheduler().submit(self.df, {})
+        # run by a scheduler with another output root
+        scheduler = JobScheduler(
+            self.db_path, Path(self._tmp.name) / "other", runner=self._run
+        )
+        self.addCleanup(scheduler.stop)
+        scheduler.start()
+        self._wait(scheduler, job_id)
+
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            (output_bytes,) = connection.execute(
+                "SELECT output_bytes FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+
+        self.assertEqual(scheduler.status(job_id).status, JobStatus.DONE)
+        self.assertEqual(output_bytes, 1000)
+
+    def test_interrupted_jobs_run_after_restart(self) -> None:
+        job_id = self._scheduler().submit(self.df, {})
+        # claimed by a process that was stopped before it finished
+        self._scheduler()._claim()
+
+        restarted = self._scheduler()
+        restarted.start()
+        self._wait(restarted, job_id)
+
+        self.assertEqual(restarted.status(job_id).status, JobStatus.DONE)
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
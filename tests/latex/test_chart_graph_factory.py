@@ -1,5 +1,7 @@
+import tempfile
 import unittest
 from datetime import datetime
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pandas as pd
@@ -84,6 +86,68 @@ class TestChartGraphFactory(unittest.TestCase):
         points = self.factory.get_datapoints(self.mock_df, "Close_Adjusted")
         self.assertIn("(2023-01-01, 100.0)", points)
 
+    def test_generate_downsamples_long_series(self) -> None:
+        dates = pd.date_range(start="2016-01-01", periods=3650, freq="D")
+        long_df = pd.DataFrame({
+            "Close_Adjusted": [100.0 + i % 37 for i in range(3650)],
+            "interpolated_inflation_adjusted": [100.0 + i / 100 for i in range(3650)],
+            "Close_Comparison_Adjusted": [100.0 + i % 11 for i in range(3650)]
+        }, index=dates)
+        self.mock_ticker.dividends = pd.Series(
+            [0.5], index=pd.to_datetime(["2019-05-17"]).tz_localize("America/New_York")
+        )
+
+        result = ChartGraphFactory(max_points=200).generate(
+            {}, long_df, self.mock_ticker,
+            self.mock_comp_ticker, self.mock_inf, self.mock_exc, {"period": "10y"}
+        )
+
+        self.assertLessEqual(result.count("(20"), 3 * 201)
+        self.assertIn("(2016-01-01, 100.00)", result)
+        self.assertIn(f"(2025-12-28, {long_df['Close_Adjusted'].iloc[-1]:.2f})", result)
+        self.assertIn("(2019-05-17, ", result)
+
+    def test_generate_rounds_values(self) -> None:
+        self.mock_df.loc[self.mock_df.index[1], "Close_Adjusted"] = 105.123456
+
+        result = ChartGraphFactory(precision=1).generate(
+            {}, self.mock_df, self.mock_ticker,
+            self.mock_comp_ticker, self.mock_inf, self.mock_exc, {"period": "1y"}
+        )
+
+        self.assertIn("(2023-01-02, 105.1)", result)
+        self.assertNotIn("105.12", result)
+
+    def test_generate_writes_data_table(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            factory = ChartGraphFactory(data_dir=Path(tmp))
+            result = factory.generate(
+                {}, self.mock_df, self.mock_ticker,
+                self.mock_comp_ticker, self.mock_inf, self.mock_exc, {"period": "1y"}
+            )
+            tables = list(Path(tmp).glob("chart-*.dat"))
+
+            self.assertEqual(len(tables), 1)
+            lines = tables[0].read_text(encoding="utf-8").splitlines()
+
+        self.assertIn(f"table[x=date, y=close] {{{tables[0].name}}}", result)
+        self.assertNotIn("coordinates {", result)
+        self.assertEqual(lines[0], "date inflation comparison close")
+        self.assertEqual(lines[1], "2023-01-01 100.00 100.00 100.00")
+        self.assertEqual(len(lines), 6)
+
+    def test_get_iso_dates(self) -> None:
+        daily = pd.date_range("2023-01-30", periods=3, freq="D")
+        sparse = pd.DatetimeIndex(["2023-01-01", "2023-03-01"])
+
+        self.assertEqual(
+            list(self.factory.get_iso_dates(daily)),
+            ["2023-01-30", "2023-01-31", "2023-02-01"]
+        )
+        self.assertEqual(
+            list(self.factory.get_iso_dates(sparse)), ["2023-01-01", "2023-03-01"]
+        )
+
 
 class TestChartGraphFactoryExtraTicks(unittest.TestCase):
     def setUp(self) -> None:
@@ -0,0 +1,340 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.latex.compose import LaTeXComposer, PrefetchedPosition
+from performance_tracker.utils.cache import clear_caches
+from performance_tracker.utils.profiling import Profiler
+from performance_tracker.utils.ratelimit import RateLimiter
+
+
+class TestLaTeXComposerPrefetch(unittest.TestCase):
+    def setUp(self) -> None:
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        clear_caches()
+        self.composer = LaTeXComposer([], max_workers=4)
+        self.composer._prefetch_histories = MagicMock()
+        self.composer._build_benchmark = MagicMock()
+        self.df = pd.DataFrame(
+            {
+                "Ticker": ["SAP.DE", "", "NVDA", "AIR.PA"],
+                "Quantity": [15, 0, 4, 2],
+                "Purchase Date": [pd.NaT] * 4,
+                "Purchase Price": [0.0] * 4,
+                "Sell Date": [pd.NaT] * 4,
+                "Sell Price": [0.0] * 4,
+            }
+        )
+
+    @staticmethod
+    def _tickers(names: str | list[str]) -> list[MagicMock]:
+        tickers = []
+        for name in [names] if isinstance(names, str) else names:
+            ticker = MagicMock()
+            ticker.ticker = name
+            ticker.info = {"symbol": name, "currency": "EUR"}
+            tickers.append(ticker)
+        return tickers
+
+    @staticmethod
+    def _slow_join(*args: object) -> pd.DataFrame:
+        ticker = args[4]
+        # finish the first positions last to make ordering observable
+        time.sleep({"SAP.DE": 0.06, "NVDA": 0.03}.get(ticker.info["symbol"], 0.0))
+        return pd.DataFrame({"symbol": [ticker.info["symbol"]]})
+
+    def test_prefetch_keeps_portfolio_order(self) -> None:
+        with (
+            patch(
+                "performance_tracker.latex.compose.get_tickers",
+                side_effect=self._tickers,
+            ),
+            patch(
+                "performance_tracker.latex.compose.join_all_df",
+                side_effect=self._slow_join,
+            ),
+        ):
+            positions = self.composer._prefetch(self.df, {"currency": "EUR"})
+
+        self.assertEqual(len(positions), 4)
+        self.assertIsNone(positions[1])
+        self.assertEqual(
+            [p.ticker_info["symbol"] for p in positions if p is not None],
+            ["SAP.DE", "NVDA", "AIR.PA"],
+        )
+        self.assertEqual(positions[2].combined_df["symbol"].iloc[0], "NVDA")
+        self.assertEqual(positions[0].comparison.info["symbol"], "EUNL.DE")
+        self.assertEqual(positions[3].snapshot.info["symbol"], "AIR.PA")
+        self.assertIs(positions[0].comparison, positions[3].comparison)
+
+        prefetched = self.composer._prefetch_histories.call_args[0][0]
+        self.assertEqual(len(prefetched), 3)
+
+    def test_prefetch_runs_concurrently(self) -> None:
+        def join(*args: object) -> pd.DataFrame:
+            time.sleep(0.1)
+            return pd.DataFrame()
+
+        with (
+            patch(
+                "performance_tracker.latex.compose.get_tickers",
+                side_effect=self._tickers,
+            ),
+            patch("performance_tracker.latex.compose.join_all_df", side_effect=join),
+        ):
+            start = time.perf_counter()
+            self.composer._prefetch(self.df, {})
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.25)
+
+
+class TestLaTeXComposerIncremental(unittest.TestCase):
+    def setUp(self) -> None:
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.build_dir = Path(self._tmp.name) / "build"
+        self.output_dir = Path(self._tmp.name) / "output"
+
+        self.factory = MagicMock(return_value="page content")
+        self.factory.cache_key.return_value = "Factory:1"
+        self.composer = LaTeXComposer([self.factory], build_dir=self.build_dir)
+        self.composer._prefetch = MagicMock(side_effect=self._positions)
+        self.composer.render_latex = MagicMock(side_effect=self._render)
+
+        self.df = pd.DataFrame({"Ticker": ["SAP.DE", "NVDA"], "Quantity": [15, 4]})
+
+        patcher = patch("performance_tracker.latex.compose.Sidebar")
+        patcher.start().return_value.side_effect = lambda i: f"sidebar {i}"
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _positions(
+        self, df: pd.DataFrame, config_dict: dict, pending: set[int]
+    ) -> list[PrefetchedPosition]:
+        return [
+            PrefetchedPosition(
+                {"symbol": symbol}, MagicMock(), MagicMock(), MagicMock(), MagicMock()
+            )
+            for symbol in df["Ticker"]
+        ]
+
+    def _render(self, output_dir: Path) -> bool:
+        (output_dir / "main.pdf").write_bytes(b"%PDF")
+        return True
+
+    def _main_tex_inputs(self) -> list[str]:
+        main_tex = (self.output_dir / "main.tex").read_text(encoding="utf-8")
+        return [line.strip() for line in main_tex.splitlines() if "input" in line]
+
+    def test_unchanged_report_is_reused(self) -> None:
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+        first_inputs = self._main_tex_inputs()
+
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertEqual(self.composer._prefetch.call_args.args[2], {0, 1})
+        self.assertEqual(len(first_inputs), 4)
+        self.assertTrue(first_inputs[0].startswith(r"\input{sidebar-"))
+        self.assertTrue(first_inputs[1].startswith(r"\input{page-"))
+
+        self.output_dir = Path(self._tmp.name) / "second"
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertEqual(self.composer._prefetch.call_args.args[2], set())
+        self.assertEqual(self._main_tex_inputs(), first_inputs)
+        self.assertEqual(self.composer.render_latex.call_count, 1)
+        self.assertTrue((self.output_dir / "main.pdf").exists())
+
+    def test_only_changed_pages_are_generated(self) -> None:
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.df.loc[1, "Quantity"] = 5
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 3)
+        self.assertEqual(self.composer._prefetch.call_args.args[2], {1})
+        self.assertEqual(self.composer.render_latex.call_count, 2)
+
+    def test_pages_with_failed_factories_are_generated_again(self) -> None:
+        self.factory.side_effect = [ValueError(), "page content", "page content"]
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 3)
+        self.assertEqual(self.composer._prefetch.call_args.args[2], {0})
+
+    def test_reused_pages_keep_their_chart_tables(self) -> None:
+        self.factory.return_value = r"\addplot table {chart-0123abcd.dat};"
+        self.build_dir.mkdir(parents=True)
+        table_path = self.build_dir / "chart-0123abcd.dat"
+        table_path.write_text("date close\n", encoding="utf-8")
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        an_hour_ago = time.time() - 60 * 60
+        os.utime(table_path, (an_hour_ago, an_hour_ago))
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertGreater(table_path.stat().st_mtime, an_hour_ago)
+
+        # pages of pruned tables are generated again
+        table_path.unlink()
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 4)
+
+    def test_page_name_depends_on_factory_version(self) -> None:
+        row = self.df.iloc[0]
+        name = self.composer.page_name(row, {"currency": "EUR"}, "2026-01-02")
+
+        self.assertEqual(
+            name, self.composer.page_name(row, {"currency": "EUR"}, "2026-01-02")
+        )
+        self.assertNotEqual(
+            name, self.composer.page_name(row, {"currency": "EUR"}, "2026-01-03")
+        )
+
+        self.factory.cache_key.return_value = "Factory:2"
+        self.assertNotEqual(
+            name, self.composer.page_name(row, {"currency": "EUR"}, "2026-01-02")
+        )
+
+    def test_factories_are_profiled(self) -> None:
+        self.factory.side_effect = ["page content", ValueError()]
+        profiler = Profiler()
+
+        with profiler.activate():
+            self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        spans = [span for span in profiler.spans if span.category == "factory"]
+        self.assertEqual([span.output_bytes for span in spans], [12, None])
+        self.assertEqual([span.error for span in spans], [None, "ValueError"])
+
+
+class TestLaTeXComposerParallelPages(TestLaTeXComposerIncremental):
+    def setUp(self) -> None:
+        super().setUp()
+        self.composer = LaTeXComposer(
+            [self.factory], build_dir=self.build_dir, parallel_pages=True
+        )
+        self.composer._prefetch = MagicMock(side_effect=self._positions)
+        self.composer._engine.compile = MagicMock(side_effect=self._compile)
+        self.composer.render_latex = MagicMock()
+        self.part_pages = 1
+
+    def _compile(self, tex_name: str, cwd: Path, **kwargs: object) -> bool:
+        job = Path(tex_name).stem
+        (cwd / f"{job}.pdf").write_bytes(b"%PDF")
+        (cwd / f"{job}.log").write_text(
+            f"Output written on {job}.pdf ({self.part_pages} page, 42 bytes).",
+            encoding="latin-1",
+        )
+        return True
+
+    def _compiled(self) -> list[str]:
+        return [call.args[0] for call in self.composer._engine.compile.call_args_list]
+
+    def test_progress_of_every_stage(self) -> None:
+        events = []
+        self.composer._progress = events.append
+
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(
+            list(dict.fromkeys(event.stage for event in events)),
+            ["fetch", "generate", "compile"],
+        )
+        self.assertIn(
+            "generate 2/2: NVDA", [event.text.split(" (")[0] for event in events]
+        )
+        self.assertIn("compile 2/3", events[-2].text)
+        self.assertAlmostEqual(events[-1].progress, 1.0)
+        self.assertEqual(
+            {"fetch", "generate", "compile", "generate MagicMock"},
+            set(events[-1].timings),
+        )
+
+    def test_pages_are_compiled_separately_and_merged(self) -> None:
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        compiled = self._compiled()
+        self.assertEqual(len(compiled), 3)
+        self.assertEqual(compiled[-1], "main.tex")
+        self.composer.render_latex.assert_not_called()
+
+        parts = [name.removesuffix(".tex") for name in compiled[:2]]
+        main_tex = (self.output_dir / "main.tex").read_text(encoding="utf-8")
+        self.assertLess(main_tex.index(parts[0]), main_tex.index(parts[1]))
+        self.assertTrue((self.build_dir / f"{parts[0]}.pdf").exists())
+
+        part_tex = (self.output_dir / "parts" / f"{parts[1]}.tex").read_text(
+            encoding="utf-8"
+        )
+        self.assertIn(r"\setpagetotal{2}", part_tex)
+        self.assertIn(r"\setcounter{page}{2}", part_tex)
+
+    def test_parts_depend_on_class_and_engine(self) -> None:
+        pages = [["sidebar-a.tex", "page-a.tex"]]
+        parts = self.composer.create_part_texs(pages, self.output_dir)
+
+        with patch.object(
+            self.composer._engine, "format_id", return_value="perftracker-new"
+        ):
+            updated = self.composer.create_part_texs(pages, self.output_dir)
+
+        self.assertNotEqual(parts, updated)
+
+    def test_overflowing_pages_fall_back_to_one_document(self) -> None:
+        self.part_pages = 2
+        self.composer.render_latex.side_effect = self._render
+
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.composer.render_latex.assert_called_once_with(self.output_dir)
+        self.assertEqual(len(self._compiled()), 2)
+        self.assertEqual(len(self._main_tex_inputs()), 4)
+        self.assertEqual(list(self.build_dir.glob("part-*.pdf")), [])
+        self.assertTrue((self.output_dir / "main.pdf").exists())
+
+    def test_unchanged_report_is_reused(self) -> None:
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+        self.output_dir = Path(self._tmp.name) / "second"
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 2)
+        self.assertEqual(len(self._compiled()), 3)
+        self.assertTrue((self.output_dir / "main.pdf").exists())
+
+    def test_only_changed_pages_are_generated(self) -> None:
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+        self.composer._engine.compile.reset_mock()
+
+        self.df.loc[1, "Ticker"] = "AIR.PA"
+        self.composer(self.df, {"currency": "EUR"}, self.output_dir)
+
+        self.assertEqual(self.factory.call_count, 3)
+        self.assertEqual(self.composer._prefetch.call_args.args[2], {1})
+        self.assertEqual(len(self._compiled()), 2)
@@ -0,0 +1,179 @@
+import subprocess
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from performance_tracker.latex.engine import LaTeXEngine, name_figures
+
+
+class TestLaTeXEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.build_dir = Path(self._tmp.name) / "build"
+        self.work_dir = Path(self._tmp.name) / "work"
+        self.work_dir.mkdir()
+        self.engine = LaTeXEngine(self.build_dir)
+
+        self.aux_versions = [b"first", b"second", b"second"]
+        self.log_text = ""
+        self.figures: list[str] = []
+
+        patcher = patch(
+            "performance_tracker.latex.engine.subprocess.run", side_effect=self._run
+        )
+        self.mock_run = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _run(self, command: list[str], cwd: str = ".", **kwargs: object) -> MagicMock:
+        cwd = Path(cwd)
+        job_names = [c.split("=")[1] for c in command if c.startswith("-jobname=")]
+        if "-ini" in command:
+            (cwd / f"{job_names[0]}.fmt").write_bytes(b"format")
+        elif job_names:
+            (cwd / f"{job_names[0]}.pdf").write_bytes(b"%PDF")
+        elif "--version" not in command:
+            job = Path(command[-1]).stem
+            (cwd / f"{job}.aux").write_bytes(self.aux_versions.pop(0))
+            (cwd / f"{job}.log").write_text(self.log_text, encoding="latin-1")
+            (cwd / f"{job}.figlist").write_text("\n".join(self.figures))
+
+        return MagicMock(stdout="", returncode=0)
+
+    def _compile_commands(self) -> list[list[str]]:
+        return [
+            call.args[0]
+            for call in self.mock_run.call_args_list
+            if not any(
+                c.startswith(("-ini", "--version", "-jobname")) for c in call.args[0]
+            )
+        ]
+
+    def test_format_is_built_once_and_used(self) -> None:
+        self.engine.compile("main.tex", self.work_dir)
+        self.aux_versions = [b"same", b"same"]
+        LaTeXEngine(self.build_dir).compile("other.tex", self.work_dir)
+
+        ini_calls = [c for c in self.mock_run.call_args_list if "-ini" in c.args[0]]
+        self.assertEqual(len(ini_calls), 1)
+        self.assertEqual(len(list(self.build_dir.glob("perftracker-*.fmt"))), 1)
+
+        format_name = self.engine.format_name()
+        for command in self._compile_commands():
+            self.assertIn(f"-fmt={format_name}", command)
+
+    def test_stops_once_aux_is_stable(self) -> None:
+        self.assertTrue(self.engine.compile("main.tex", self.work_dir))
+        self.assertEqual(len(self._compile_commands()), 3)
+
+        self.mock_run.reset_mock()
+        self.aux_versions = [b"second"]
+        self.assertTrue(self.engine.compile("main.tex", self.work_dir))
+        self.assertEqual(len(self._compile_commands()), 1)
+
+    def test_rerun_hint_in_log(self) -> None:
+        self.aux_versions = [b"same", b"same"]
+        (self.work_dir / "main.aux").write_bytes(b"same")
+        self.log_text = "LaTeX Warning: Label(s) may have changed. Rerun to get ..."
+
+        self.engine.compile("main.tex", self.work_dir, max_passes=2)
+
+        self.assertEqual(len(self._compile_commands()), 2)
+
+    def test_without_format(self) -> None:
+        self.aux_versions = [b"same"]
+        (self.work_dir / "main.aux").write_bytes(b"same")
+
+        self.engine.compile("main.tex", self.work_dir, use_format=False)
+
+        self.assertFalse(self.build_dir.exists())
+        self.assertFalse(any("-fmt" in c for c in self._compile_commands()[0]))
+
+    def test_failed_runs_warn(self) -> None:
+        self.mock_run.side_effect = subprocess.CalledProcessError(1, "pdflatex")
+
+        with self.assertWarnsRegex(UserWarning, "Failed to render main.tex"):
+            self.assertFalse(
+                self.engine.compile("main.tex", self.work_dir, use_format=False)
+            )
+
+    def test_page_count_from_log(self) -> None:
+        log_path = self.work_dir / "main.log"
+        self.assertIsNone(LaTeXEngine.page_count(log_path))
+
+        log_path.write_text(
+            "Output written on main.pdf\n (2 pages, 51234 bytes).", encoding="latin-1"
+        )
+        self.assertEqual(LaTeXEngine.page_count(log_path), 2)
+
+    def test_missing_figures_are_built_and_cached(self) -> None:
+        self.figures = ["fig-cached", "fig-new"]
+        self.aux_versions = [b"same", b"same", b"same"]
+        (self.work_dir / "main.aux").write_bytes(b"same")
+        self.build_dir.mkdir()
+        (self.build_dir / "fig-cached.pdf").write_bytes(b"%PDF")
+
+        self.assertTrue(self.engine.compile("main.tex", self.work_dir))
+
+        figure_builds = [
+            call.args[0]
+            for call in self.mock_run.call_args_list
+            if "-jobname=fig-new" in call.args[0]
+        ]
+        self.assertEqual(len(figure_builds), 1)
+        self.assertEqual(
+            figure_builds[0][-1], r"\def\tikzexternalrealjob{main}\input{main}"
+        )
+        self.assertFalse(
+            any("-jobname=fig-cached" in c for c in self.mock_run.call_args_list)
+        )
+        self.assertTrue((self.build_dir / "fig-new.pdf").exists())
+        self.assertEqual(len(self._compile_commands()), 2)
+
+        self.mock_run.reset_mock()
+        self.aux_versions = [b"same"]
+        self.engine.compile("main.tex", self.work_dir)
+        self.assertEqual(len(self.mock_run.call_args_list), 1)
+
+    def test_figure_builds_are_bounded(self) -> None:
+        self.figures = [f"fig-{i}" for i in range(5)]
+        self.aux_versions = [b"same", b"same"]
+        (self.work_dir / "main.aux").write_bytes(b"same")
+
+        with (
+            patch("performance_tracker.latex.engine.MAX_LATEX_PROCESSES", 2),
+            patch(
+                "performance_tracker.latex.engine.ThreadPoolExecutor",
+                wraps=ThreadPoolExecutor,
+            ) as executor,
+        ):
+            self.engine.compile("main.tex", self.work_dir, use_format=False)
+
+        self.assertEqual(executor.call_args.kwargs["max_workers"], 2)
+        self.assertEqual(len(list(self.build_dir.glob("fig-*.pdf"))), 5)
+
+    def test_name_figures(self) -> None:
+        latex = "\n".join(
+            [
+                r"\begin{tikzpicture}\draw (0,0) -- (1,1);\end{tikzpicture}",
+                r"\begin{tikzpicture}\draw (0,0) -- (2,2);\end{tikzpicture}",
+                r"\begin{tikzpicture}\draw (0,0) -- (1,1);\end{tikzpicture}",
+            ]
+        )
+
+        named = name_figures(latex).splitlines()
+        names = [line for line in named if line.startswith(r"\tikzsetnextfilename")]
+
+        self.assertEqual(len(named), 6)
+        self.assertEqual(len(names), 3)
+        self.assertNotEqual(names[0], names[1])
+        self.assertEqual(names[0], names[2])
+        self.assertEqual(named[1], latex.splitlines()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
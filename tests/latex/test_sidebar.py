@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.latex.sidebar import Sidebar
+
+
+class TestSidebar(unittest.TestCase):
+    def setUp(self) -> None:
+        self.exchange_rate_service = MagicMock()
+        self.exchange_rate_service.get_latest_exchange_rate.return_value = 1.0
+
+        self.snapshot = MagicMock()
+        self.snapshot.info = {
+            "symbol": "SAP.DE",
+            "longName": "SAP SE",
+            "currency": "EUR",
+            "previousClose": 200.0,
+        }
+
+    @patch("performance_tracker.latex.sidebar.get_snapshots", return_value=[])
+    def test_unresolved_symbols_are_skipped(self, get_snapshots: MagicMock) -> None:
+        df = pd.DataFrame({"Ticker": ["SAP.DE", "MISSING"], "Quantity": [2, 3]})
+
+        sidebar = Sidebar(
+            df,
+            self.exchange_rate_service,
+            {"currency": "EUR"},
+            {"SAP.DE": self.snapshot},
+        )
+
+        self.assertEqual(sidebar.overview(), [(0, "SAP.DE", 1.0, 400.0)])
+        self.assertEqual(sidebar.total_value, 400.0)
+        self.assertEqual(sidebar.details(1)["name"], "")
+        get_snapshots.assert_called_once_with("MISSING", fields=("info",))
+
+    @patch("performance_tracker.latex.sidebar.get_snapshots", return_value=[])
+    def test_without_resolved_symbols(self, get_snapshots: MagicMock) -> None:
+        df = pd.DataFrame({"Ticker": ["MISSING", ""], "Quantity": [3, 0]})
+
+        sidebar = Sidebar(df, self.exchange_rate_service, {"currency": "EUR"})
+
+        self.assertEqual(sidebar.overview(), [])
+        self.assertEqual(sidebar.total_value, 0)
+
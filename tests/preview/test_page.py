@@ -0,0 +1,167 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from performance_tracker.latex.compose import PrefetchedPosition
+from performance_tracker.preview.compose import PREVIEW_FILE_NAME, PreviewComposer
+from performance_tracker.preview.page import HTMLPage
+
+
+def make_snapshot(symbol: str) -> MagicMock:
+    snapshot = MagicMock()
+    snapshot.info = {
+        "symbol": symbol,
+        "longName": f"{symbol} & Co",
+        "currency": "EUR",
+        "previousClose": 150.0,
+        "operatingCashflow": 6000000,
+        "enterpriseValue": 100000000,
+        "fullTimeEmployees": 500,
+        "overallRisk": 3,
+        "fiveYearAvgDividendYield": 2.5,
+        "beta": 1.1234,
+    }
+    snapshot.recommendations = pd.DataFrame(
+        [{"strongBuy": 5, "buy": 10, "hold": 2, "sell": 1, "strongSell": 0}]
+    )
+    snapshot.cashflow = pd.DataFrame(
+        {"2023-12-31": [5000000]}, index=["Free Cash Flow"]
+    )
+    snapshot.growth_estimates = pd.DataFrame({"stockTrend": [0.15]}, index=["+1y"])
+    snapshot.analyst_price_targets = {
+        "high": 200.0,
+        "low": 100.0,
+        "mean": 160.0,
+        "median": 155.0,
+    }
+    snapshot.dividends = pd.Series(
+        [1.0], index=pd.DatetimeIndex(["2022-06-01"], tz="Europe/Berlin")
+    )
+    return snapshot
+
+
+def make_position(symbol: str, days: int = 1000) -> PrefetchedPosition:
+    index = pd.date_range("2021-01-01", periods=days, freq="D")
+    trend = np.linspace(100, 130, days)
+    combined_df = pd.DataFrame(
+        {
+            "Close_Adjusted": trend,
+            "Close_Comparison_Adjusted": trend - 5,
+            "interpolated_inflation_adjusted": np.linspace(100, 110, days),
+        },
+        index=index,
+    )
+    comparison = MagicMock()
+    comparison.info = {"symbol": "EUNL.DE"}
+
+    return PrefetchedPosition(
+        {"symbol": symbol},
+        MagicMock(),
+        make_snapshot(symbol),
+        MagicMock(),
+        comparison,
+        combined_df,
+    )
+
+
+def make_sidebar() -> MagicMock:
+    sidebar = MagicMock()
+    sidebar.details.return_value = {
+        "name": "SAP & Co",
+        "position_type": "EQUITY",
+        "country": "Germany",
+        "symbol": "SAP.DE",
+        "sector": "Technology",
+        "currency": "EUR",
+        "quantity": 15,
+        "close": 150.0,
+        "dividend_yield": 1.2,
+        "dividend": 2.2,
+    }
+    sidebar.overview.return_value = [
+        (0, "SAP.DE", 0.75, 2250.0),
+        (2, "NVDA", 0.25, 750.0),
+    ]
+    sidebar.total_value = 3000.0
+    return sidebar
+
+
+class TestHTMLPage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.page = HTMLPage(max_points=100)
+        self.position = make_position("SAP.DE")
+
+    def test_page_contains_every_section(self) -> None:
+        result = self.page(self.position, make_sidebar(), 0, {"currency": "EUR"})
+
+        self.assertIn("<h2>SAP.DE &amp; Co</h2>", result)
+        self.assertEqual(result.count("<polyline"), 3)
+        self.assertIn("Recommendations (18)", result)
+        self.assertIn("Currently: 150.00 €", result)
+        self.assertIn('<tr class="current"><td>SAP.DE</td>', result)
+        self.assertIn("3.00k €", result)
+
+    def test_chart_is_downsampled(self) -> None:
+        chart = self.page.get_chart(
+            self.position.combined_df, self.position.snapshot, "EUNL.DE"
+        )
+
+        for points in chart.split('points="')[1:]:
+            # the dividend date is kept on top of the downsampled points
+            self.assertLessEqual(len(points.split('"')[0].split()), 101)
+        self.assertIn("+30.00%", chart)
+        self.assertIn("Jan 2022", chart)
+
+    def test_data_table(self) -> None:
+        result = self.page.get_data_table(
+            self.position.snapshot, self.position.combined_df, "EUR"
+        )
+
+        self.assertIn("15.0%", result)
+        self.assertIn("5.00M €", result)
+        self.assertIn("1.123", result)
+        self.assertIn("100.0%", result)
+
+    def test_empty_recommendations(self) -> None:
+        result = self.page.get_recommendations_bar(pd.DataFrame())
+
+        self.assertIn("No recommendations available", result)
+
+    def test_failing_section_is_left_out(self) -> None:
+        self.position.snapshot.info["previousClose"] = None
+
+        result = self.page(self.position, make_sidebar(), 0, {"currency": "EUR"})
+
+        self.assertEqual(result.count("<polyline"), 0)
+        self.assertIn("Recommendations (18)", result)
+
+
+class TestPreviewComposer(unittest.TestCase):
+    def test_writes_one_html_file(self) -> None:
+        composer = PreviewComposer(max_points=50)
+        composer._prefetch = MagicMock(
+            return_value=[make_position("SAP.DE"), None, make_position("NVDA")]
+        )
+        df = pd.DataFrame({"Ticker": ["SAP.DE", "", "NVDA"], "Quantity": [15, 0, 4]})
+
+        with (
+            tempfile.TemporaryDirectory() as tmp,
+            patch("performance_tracker.preview.compose.Sidebar") as sidebar,
+        ):
+            sidebar.return_value = make_sidebar()
+            composer(df, {"currency": "EUR"}, Path(tmp))
+
+            preview = (Path(tmp) / PREVIEW_FILE_NAME).read_text(encoding="utf-8")
+
+        self.assertTrue(preview.startswith("<!DOCTYPE html>"))
+        self.assertEqual(preview.count('<section class="page">'), 2)
+        self.assertIn("NVDA &amp; Co", preview)
+        self.assertIn("generate get_chart", composer._tracker.timings)
+
+
+if __name__ == "__main__":
+    unittest.main()
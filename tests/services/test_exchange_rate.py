@@ -0,0 +1,83 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.services.exchange_rate import ExchangeRateService
+
+# units per USD
+BASE_RATES = {"EUR=X": 0.9, "GBP=X": 0.8, "JPY=X": 150.0}
+
+
+def make_ticker(name: str) -> MagicMock:
+    ticker = MagicMock()
+    ticker.ticker = name
+    return ticker
+
+
+class TestExchangeRateService(unittest.TestCase):
+    def setUp(self) -> None:
+        today = pd.Timestamp.now().normalize()
+        self.index = pd.DatetimeIndex(
+            [today - pd.Timedelta(days=d) for d in (4, 3, 2)], name="Date"
+        )
+
+        self.store = MagicMock()
+        self.store.get_history.side_effect = lambda ticker, period: pd.DataFrame(
+            {"Close": [BASE_RATES[ticker.ticker]] * len(self.index)}, index=self.index
+        )
+        self.service = ExchangeRateService(self.store)
+
+        patcher = patch(
+            "performance_tracker.services.exchange_rate.get_tickers",
+            side_effect=lambda name: [make_ticker(name)],
+        )
+        self.mock_get_tickers = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cross_rate_is_triangulated(self) -> None:
+        rates = self.service.get_exchange_rate("GBP", "EUR")
+
+        self.assertAlmostEqual(rates["Close"].iloc[0], 0.9 / 0.8)
+        self.assertEqual(rates.index[-1], pd.Timestamp.now().normalize())
+        self.assertEqual(
+            sorted(call.args[0] for call in self.mock_get_tickers.call_args_list),
+            ["EUR=X", "GBP=X"],
+        )
+
+    def test_base_rates_are_shared_between_pairs(self) -> None:
+        self.service.get_exchange_rate("GBP", "EUR")
+        self.service.get_exchange_rate("JPY", "EUR")
+        self.service.get_exchange_rate("USD", "EUR")
+
+        self.assertEqual(self.store.get_history.call_count, 3)
+        self.assertAlmostEqual(self.service.get_latest_exchange_rate("USD", "EUR"), 0.9)
+
+    def test_services_share_the_cache_per_store(self) -> None:
+        first = self.service.get_exchange_rate("GBP", "EUR")
+        second = ExchangeRateService(self.store).get_exchange_rate("GBP", "EUR")
+
+        self.assertIs(first, second)
+        self.assertEqual(self.store.get_history.call_count, 2)
+
+    def test_subunits_are_scaled(self) -> None:
+        self.assertAlmostEqual(
+            self.service.get_latest_exchange_rate("GBp", "EUR"), 0.9 / 80
+        )
+
+    def test_conversion_matrix(self) -> None:
+        matrix = self.service.get_conversion_matrix(["USD", "EUR", "JPY"])
+
+        self.assertEqual(list(matrix.index), ["USD", "EUR", "JPY"])
+        self.assertAlmostEqual(matrix.loc["EUR", "JPY"], 150.0 / 0.9)
+        self.assertAlmostEqual(matrix.loc["JPY", "USD"], 1 / 150.0)
+        self.assertAlmostEqual(matrix.loc["EUR", "EUR"], 1.0)
+
+    def test_prefetch_loads_one_symbol_per_currency(self) -> None:
+        self.service.prefetch(["EUR", "GBP", "GBp", "USD", None, "EUR"])
+
+        self.store.prefetch.assert_called_once_with(["EUR=X", "GBP=X"], period="10y")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.services.history_store import HistoryStore, period_start
+from performance_tracker.utils.ratelimit import RateLimiter
+
+
+def make_history(
+    dates: list[str], closes: list[float], dividends: list[float] | None = None
+) -> pd.DataFrame:
+    index = pd.DatetimeIndex(dates).tz_localize("Europe/Berlin")
+    return pd.DataFrame(
+        {
+            "Close": closes,
+            "Dividends": dividends or [0.0] * len(dates),
+            "Stock Splits": [0.0] * len(dates),
+        },
+        index=index,
+    )
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self) -> None:
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / "history.sqlite"
+        self.store = HistoryStore(self.db_path, refresh_interval=pd.Timedelta(0))
+
+        today = pd.Timestamp.now().normalize()
+        self.dates = [(today - pd.Timedelta(days=d)).strftime("%Y-%m-%d") for d in (3, 2, 1)]
+
+        self.ticker = MagicMock()
+        self.ticker.ticker = "SAP.DE"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_full_fetch_then_delta(self) -> None:
+        self.ticker.history.side_effect = [
+            make_history(self.dates[:2], [1.0, 2.0]),
+            make_history(self.dates[1:], [2.5, 3.0]),
+        ]
+
+        first = self.store.get_history(self.ticker, "1y")
+        self.assertEqual(first["Close"].tolist(), [1.0, 2.0])
+        self.assertIsNone(first.index.tz)
+
+        second = self.store.get_history(self.ticker, "1y")
+        self.assertEqual(second["Close"].tolist(), [1.0, 2.5, 3.0])
+
+        delta_kwargs = self.ticker.history.call_args_list[1].kwargs
+        self.assertEqual(delta_kwargs["start"], self.dates[1])
+
+    def test_persists_across_instances(self) -> None:
+        self.ticker.history.return_value = make_history(self.dates, [1.0, 2.0, 3.0])
+        self.store.get_history(self.ticker, "1y")
+
+        reopened = HistoryStore(self.db_path, refresh_interval=pd.Timedelta(days=1))
+        result = reopened.get_history(self.ticker, "1y")
+
+        self.assertEqual(self.ticker.history.call_count, 1)
+        self.assertEqual(result["Close"].tolist(), [1.0, 2.0, 3.0])
+
+    def test_dividend_in_delta_triggers_full_refresh(self) -> None:
+        self.ticker.history.side_effect = [
+            make_history(self.dates[:2], [1.0, 2.0]),
+            make_history(self.dates[1:], [2.0, 3.0], dividends=[0.0, 0.5]),
+            make_history(self.dates, [0.9, 1.8, 3.0]),
+        ]
+
+        self.store.get_history(self.ticker, "1y")
+        result = self.store.get_history(self.ticker, "1y")
+
+        self.assertEqual(self.ticker.history.call_count, 3)
+        self.assertEqual(result["Close"].tolist(), [0.9, 1.8, 3.0])
+
+    def test_longer_period_refetches(self) -> None:
+        self.ticker.history.return_value = make_history(self.dates, [1.0, 2.0, 3.0])
+
+        self.store.get_history(self.ticker, "1y")
+        self.store.get_history(self.ticker, "1mo")
+        self.assertEqual(self.ticker.history.call_count, 2)
+
+        self.store.get_history(self.ticker, "5y")
+        self.assertEqual(self.ticker.history.call_count, 3)
+        self.assertIn("start", self.ticker.history.call_args.kwargs)
+
+    @patch("performance_tracker.services.history_store.get_histories")
+    def test_prefetch_batches_missing_and_stale(self, mock_histories: MagicMock) -> None:
+        self.ticker.history.return_value = make_history(self.dates[:2], [1.0, 2.0])
+        self.store.get_history(self.ticker, "1y")
+
+        bulk = pd.concat(
+            {
+                "SAP.DE": make_history(self.dates[1:], [2.5, 3.0]),
+                "NVDA": make_history(self.dates[1:], [10.0, 11.0]),
+            },
+            axis=1,
+        ).swaplevel(axis=1)
+        bulk.index = bulk.index.tz_localize(None)
+        mock_histories.return_value = bulk
+
+        self.store.prefetch(["SAP.DE", "NVDA", "SAP.DE"], "1y")
+
+        self.assertEqual(mock_histories.call_count, 2)
+        self.assertEqual(mock_histories.call_args_list[0].args[0], ["SAP.DE"])
+        self.assertEqual(mock_histories.call_args_list[0].kwargs["start"], self.dates[1])
+        self.assertEqual(mock_histories.call_args_list[1].args[0], ["NVDA"])
+
+        self.store._refresh_interval = pd.Timedelta(days=1)
+        nvda = MagicMock()
+        nvda.ticker = "NVDA"
+
+        self.assertEqual(
+            self.store.get_history(self.ticker, "1y")["Close"].tolist(), [1.0, 2.5, 3.0]
+        )
+        self.assertEqual(self.store.get_history(nvda, "1y")["Close"].tolist(), [10.0, 11.0])
+        nvda.history.assert_not_called()
+
+    @patch("performance_tracker.services.history_store.get_histories")
+    def test_prefetch_waits_for_the_symbol(self, mock_histories: MagicMock) -> None:
+        bulk = pd.concat(
+            {"NVDA": make_history(self.dates[1:], [10.0, 11.0])}, axis=1
+        ).swaplevel(axis=1)
+        bulk.index = bulk.index.tz_localize(None)
+        mock_histories.return_value = bulk
+
+        with self.store._lock_for("NVDA"):
+            prefetch = threading.Thread(target=self.store.prefetch, args=(["NVDA"], "1y"))
+            prefetch.start()
+            prefetch.join(timeout=0.1)
+
+            self.assertTrue(prefetch.is_alive())
+            self.assertIsNone(self.store.last_date("NVDA"))
+
+        prefetch.join(timeout=5)
+        self.assertEqual(self.store.last_date("NVDA"), pd.Timestamp(self.dates[2]))
+
+    @patch("performance_tracker.services.history_store.get_histories")
+    def test_empty_deltas_keep_the_symbol_stale(self, mock_histories: MagicMock) -> None:
+        self.ticker.history.side_effect = [
+            make_history(self.dates[:2], [1.0, 2.0]),
+            make_history([], []),
+        ]
+        self.store.get_history(self.ticker, "1y")
+        fetched_at = self.store._read_coverage("SAP.DE")[1]
+
+        self.store.get_history(self.ticker, "1y")
+        # the symbol is missing from the bulk download
+        mock_histories.return_value = pd.DataFrame()
+        self.store.prefetch(["SAP.DE"], "1y")
+
+        self.assertEqual(self.store._read_coverage("SAP.DE")[1], fetched_at)
+        self.assertEqual(self.store.last_date("SAP.DE"), pd.Timestamp(self.dates[1]))
+
+    def test_period_start(self) -> None:
+        now = pd.Timestamp("2026-03-15 12:00")
+
+        self.assertEqual(period_start("10y", now), pd.Timestamp("2016-03-15"))
+        self.assertEqual(period_start("6mo", now), pd.Timestamp("2025-09-15"))
+        self.assertEqual(period_start("ytd", now), pd.Timestamp("2026-01-01"))
+        self.assertIsNone(period_start("max", now))
+
+        with self.assertRaises(ValueError):
+            period_start("forever", now)
@@ -1,15 +1,29 @@
+import json
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import httpx
 import pandas as pd
 
 from performance_tracker.services.inflation import InflationService
+from performance_tracker.utils.ratelimit import RateLimiter
 
 
 class TestInflationService(unittest.TestCase):
     def setUp(self) -> None:
-        self.service = InflationService()
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self._tmp.name)
+        self.service = InflationService(cache_dir=self.cache_dir)
         self.mock_api_response = [
             {"page": 1, "pages": 1, "per_page": 100, "total": 2},
             [
@@ -34,6 +48,59 @@ class TestInflationService(unittest.TestCase):
 
         self.assertAlmostEqual(df.loc["2016-01-01", "interpolated_inflation"], 1.02)
 
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _mock_response(self) -> MagicMock:
+        mock_response = MagicMock()
+        mock_response.json.return_value = self.mock_api_response
+        mock_response.raise_for_status = MagicMock()
+        return mock_response
+
+    @patch("httpx.Client.get")
+    def test_curve_is_memoized_in_memory_and_on_disk(self, mock_get: MagicMock) -> None:
+        mock_get.return_value = self._mock_response()
+
+        first = self.service.get_inflation_rate("DEU")
+        second = self.service.get_inflation_rate("DEU")
+
+        self.assertIs(first, second)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertTrue((self.cache_dir / "DEU.json").exists())
+
+        with patch("performance_tracker.services.inflation._curve_cache", {}):
+            from_disk = InflationService(cache_dir=self.cache_dir).get_inflation_rate(
+                "DEU"
+            )
+
+        self.assertEqual(mock_get.call_count, 1)
+        pd.testing.assert_frame_equal(first, from_disk)
+
+    @patch("httpx.Client.get")
+    def test_expired_disk_cache_is_refetched(self, mock_get: MagicMock) -> None:
+        mock_get.return_value = self._mock_response()
+        (self.cache_dir / "DEU.json").write_text(
+            json.dumps({"fetched_at": "2000-01-01T00:00:00", "values": []})
+        )
+
+        df = self.service.get_inflation_rate("DEU")
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertAlmostEqual(df.loc["2017-01-01", "interpolated_inflation"], 1.0353)
+
+    def test_build_curve_interpolates_logarithmically(self) -> None:
+        raw_df = pd.DataFrame({"date": ["2016", "2015"], "value": [10.0, 10.0]})
+
+        df = InflationService.build_curve(raw_df)
+
+        self.assertEqual(df.index[0], pd.Timestamp("2015-01-01"))
+        self.assertEqual(df.index[-1], pd.Timestamp("2017-01-01"))
+        self.assertAlmostEqual(df.loc["2016-01-01", "interpolated_inflation"], 1.1)
+        self.assertAlmostEqual(df.loc["2017-01-01", "interpolated_inflation"], 1.21)
+
+        midpoint = df.loc["2016-07-02", "interpolated_inflation"]
+        self.assertAlmostEqual(midpoint, 1.1 * 1.1 ** (183 / 366), places=6)
+
     @patch("performance_tracker.services.inflation.fill_unit")
     def test_get_inflation_empty_country(self, mock_fill: MagicMock) -> None:
         mock_fill.return_value = pd.DataFrame()
@@ -44,5 +111,8 @@ class TestInflationService(unittest.TestCase):
     def test_get_inflation_timeout(self, mock_get: MagicMock) -> None:
         mock_get.side_effect = httpx.ReadTimeout("Timeout")
 
-        with self.assertWarns(UserWarning), self.assertRaises(UnboundLocalError):
-                self.service.get_inflation_rate("DEU")
+        with self.assertWarns(UserWarning):
+            df = self.service.get_inflation_rate("DEU")
+
+        self.assertTrue((df["interpolated_inflation"] == 1.0).all())
+        self.assertFalse((self.cache_dir / "DEU.json").exists())
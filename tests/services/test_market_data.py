@@ -0,0 +1,146 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from performance_tracker.services.history_store import HistoryStore
+from performance_tracker.services.market_data import (
+    FixtureStore,
+    MarketDataProvider,
+    MissingFixtureError,
+    RecordingProvider,
+    ReplayProvider,
+    ReplayTicker,
+    create_provider,
+    set_provider,
+)
+from performance_tracker.services.ticker import get_histories, get_snapshot, get_tickers
+from performance_tracker.utils.ratelimit import RateLimiter
+
+
+def make_history(dates: list[str], closes: list[float]) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"Close": closes, "Dividends": [0.0] * len(dates)},
+        index=pd.DatetimeIndex(dates).tz_localize("America/New_York"),
+    )
+
+
+class TestMarketData(unittest.TestCase):
+    def setUp(self) -> None:
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.store = FixtureStore(Path(self._tmp.name) / "fixtures")
+        self.addCleanup(set_provider, MarketDataProvider())
+
+        self.ticker = MagicMock()
+        self.ticker.ticker = "SAP.DE"
+        self.ticker.history.side_effect = [
+            make_history(["2024-01-02", "2024-01-03"], [1.0, 2.0]),
+            make_history(["2024-01-03", "2024-01-04"], [2.5, 3.0]),
+        ]
+        self.ticker.info = {"currency": "EUR", "longName": "SAP SE"}
+
+    def test_fixture_names_keep_the_symbol(self) -> None:
+        self.store.save("fields", "EUR=X", "info", value={"currency": "EUR"})
+
+        self.assertEqual(self.store.path("history", "SAP.DE").name, "SAP.DE.pkl")
+        self.assertEqual(
+            self.store.load("fields", "EUR=X", "info"), {"currency": "EUR"}
+        )
+        with self.assertRaises(MissingFixtureError):
+            self.store.load("fields", "EUR=X", "cashflow")
+
+    def test_recorded_histories_are_merged(self) -> None:
+        recorder = RecordingProvider(self.store)
+
+        recorder.history(self.ticker, period="max", auto_adjust=True)
+        recorder.history(self.ticker, start="2024-01-03", auto_adjust=True)
+
+        history = self.store.load("history", "SAP.DE")
+        self.assertEqual(history["Close"].tolist(), [1.0, 2.5, 3.0])
+        self.assertIsNone(history.index.tz)
+
+    def test_replay_serves_recorded_responses(self) -> None:
+        recorder = RecordingProvider(self.store)
+        recorder.history(self.ticker, period="max")
+        recorder.field(self.ticker, "info")
+        with patch("httpx.Client.get") as mock_get:
+            mock_get.return_value.json.return_value = [{}, [{"date": "2020"}]]
+            recorder.get_json("https://example.org/cpi", {"format": "json"}, 1.0)
+
+        replay = ReplayProvider(self.store)
+        ticker = replay.ticker("SAP.DE")
+
+        self.assertEqual(ticker, ReplayTicker("SAP.DE"))
+        self.assertEqual(
+            replay.history(ticker, start="2024-01-03")["Close"].tolist(), [2.0]
+        )
+        self.assertEqual(replay.field(ticker, "info")["longName"], "SAP SE")
+        self.assertEqual(
+            replay.get_json("https://example.org/cpi", {"format": "json"}, 20.0),
+            [{}, [{"date": "2020"}]],
+        )
+        with self.assertRaises(MissingFixtureError):
+            replay.field(ticker, "cashflow")
+        with self.assertWarns(UserWarning):
+            self.assertTrue(replay.history(ReplayTicker("NVDA")).empty)
+
+    def test_replayed_downloads_are_split_by_symbol(self) -> None:
+        columns = pd.MultiIndex.from_product(
+            [["Close", "Dividends"], ["NVDA", "SAP.DE"]]
+        )
+        downloaded = pd.DataFrame(
+            [[1.0, 10.0, 0.0, 0.0], [2.0, None, 0.0, None]],
+            index=pd.DatetimeIndex(["2024-01-02", "2024-01-03"]),
+            columns=columns,
+        )
+
+        with patch("yfinance.download", return_value=downloaded):
+            RecordingProvider(self.store).download(["NVDA", "SAP.DE"], period="max")
+
+        set_provider(ReplayProvider(self.store))
+        histories = get_histories(["NVDA", "SAP.DE", "AIR.PA"], period="max")
+
+        self.assertEqual(histories[("Close", "NVDA")].tolist(), [1.0, 2.0])
+        self.assertEqual(histories[("Close", "SAP.DE")].dropna().tolist(), [10.0])
+        self.assertNotIn("AIR.PA", histories.columns.get_level_values(1))
+
+    def test_reports_read_replayed_data(self) -> None:
+        recorder = RecordingProvider(self.store)
+        recorder.history(self.ticker, period="max")
+        recorder.field(self.ticker, "info")
+
+        set_provider(ReplayProvider(self.store))
+        ticker = get_tickers("SAP.DE")[0]
+        history = HistoryStore(Path(self._tmp.name) / "history.sqlite").get_history(
+            ticker, period="max"
+        )
+
+        self.assertEqual(history["Close"].tolist(), [1.0, 2.0])
+        with self.assertWarns(UserWarning):
+            snapshot = get_snapshot(ticker, ("info", "cashflow"))
+        self.assertEqual(snapshot.info["currency"], "EUR")
+        self.assertTrue(snapshot.cashflow.empty)
+
+    @patch("performance_tracker.services.market_data.time.sleep")
+    def test_replay_latency(self, sleep: MagicMock) -> None:
+        RecordingProvider(self.store).field(self.ticker, "info")
+        replay = create_provider("replay", Path(self._tmp.name) / "fixtures", 0.25)
+
+        replay.field(ReplayTicker("SAP.DE"), "info")
+
+        sleep.assert_called_once_with(0.25)
+
+    def test_unknown_mode(self) -> None:
+        with self.assertRaisesRegex(ValueError, "offline"):
+            create_provider("offline")
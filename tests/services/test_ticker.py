@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pandas as pd
+
+from performance_tracker.services.ticker import TickerSnapshot
+from performance_tracker.utils.ratelimit import RateLimiter
+
+
+class TestTickerSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        # the apis are mocked, their calls are not throttled
+        unlimited = patch(
+            "performance_tracker.services.market_data.get_rate_limiter",
+            return_value=RateLimiter(rpm=None),
+        )
+        unlimited.start()
+        self.addCleanup(unlimited.stop)
+
+        self.ticker = MagicMock()
+        self.ticker.ticker = "SAP.DE"
+        self.ticker.info = {"currency": "EUR", "previousClose": 200.0}
+        self.ticker.recommendations = pd.DataFrame([{"buy": 3}])
+        self.ticker.analyst_price_targets = {"high": 250.0}
+        self.ticker.growth_estimates = pd.DataFrame()
+        self.ticker.cashflow = pd.DataFrame()
+        self.ticker.dividends = pd.Series([1.0])
+
+    def test_from_ticker_reads_every_field_once(self) -> None:
+        info = PropertyMock(return_value={"currency": "EUR"})
+        type(self.ticker).info = info
+
+        snapshot = TickerSnapshot.from_ticker(self.ticker)
+
+        info.assert_called_once()
+        self.assertEqual(snapshot.symbol, "SAP.DE")
+        self.assertEqual(snapshot.info["currency"], "EUR")
+        self.assertEqual(snapshot.analyst_price_targets["high"], 250.0)
+        self.assertEqual(snapshot.recommendations.iloc[0]["buy"], 3)
+
+    def test_snapshot_is_immutable(self) -> None:
+        snapshot = TickerSnapshot.from_ticker(self.ticker)
+
+        with self.assertRaises(AttributeError):
+            snapshot.info = {}
+        with self.assertRaises(TypeError):
+            snapshot.info["currency"] = "USD"
+        self.assertFalse(hasattr(snapshot, "__dict__"))
+
+    def test_failed_fields_fall_back_to_empty(self) -> None:
+        type(self.ticker).recommendations = PropertyMock(side_effect=ValueError)
+        self.ticker.analyst_price_targets = None
+
+        with self.assertWarns(UserWarning):
+            snapshot = TickerSnapshot.from_ticker(self.ticker)
+
+        self.assertTrue(snapshot.recommendations.empty)
+        self.assertEqual(dict(snapshot.analyst_price_targets), {})
+
+    def test_unrequested_fields_are_not_fetched(self) -> None:
+        cashflow = PropertyMock(return_value=pd.DataFrame())
+        type(self.ticker).cashflow = cashflow
+
+        snapshot = TickerSnapshot.from_ticker(self.ticker, fields=("info",))
+
+        cashflow.assert_not_called()
+        self.assertTrue(snapshot.cashflow.empty)
+        self.assertEqual(snapshot.info["previousClose"], 200.0)
@@ -23,7 +23,6 @@ class TestStreamlitApp(unittest.TestCase):
             "Ticker", "Quantity", "Purchase Date",
             "Purchase Price", "Sell Date", "Sell Price"
         ])
-        self.state.shared_data = {}
         self.state.input_df = pd.DataFrame()
         self.state.csv_uploader = None
 
@@ -49,8 +48,6 @@ class TestStreamlitApp(unittest.TestCase):
 
     def test_start_analysis_logic(self) -> None:
         local_state = MockSessionState()
-        local_state.shared_data = {"is_running": False}
-        local_state.is_running = False
 
         local_state.input_df = pd.DataFrame({
             "Ticker": ["AAPL"],
@@ -61,15 +58,32 @@ class TestStreamlitApp(unittest.TestCase):
             "Sell Price": [0.0]
         })
 
-        with patch("performance_tracker.ui.main_page.Worker") as mock_worker, \
+        with patch("performance_tracker.ui.main_page.get_scheduler") as mock_scheduler, \
                 patch("streamlit.session_state", new=local_state):
-            mock_worker.return_value = MagicMock()
+            scheduler = mock_scheduler.return_value
+            scheduler.submit.return_value = "job-1"
 
             app.start_analysis("Euro", "Germany", "10 years")
 
-            mock_worker.assert_called_once()
+            scheduler.submit.assert_called_once()
 
-            args = mock_worker.call_args[0]
+            args = scheduler.submit.call_args[0]
             config = args[1]
             self.assertEqual(config["period"], "10y")
             self.assertEqual(config["currency"], "EUR")
+            self.assertEqual(scheduler.submit.call_args.kwargs["output"], "pdf")
+            self.assertEqual(local_state.job_id, "job-1")
+
+    def test_start_analysis_waits_for_running_job(self) -> None:
+        local_state = MockSessionState()
+        local_state.job_id = "job-1"
+        local_state.input_df = pd.DataFrame({"Ticker": ["AAPL"]})
+
+        with patch("performance_tracker.ui.main_page.get_scheduler") as mock_scheduler, \
+                patch("streamlit.session_state", new=local_state):
+            scheduler = mock_scheduler.return_value
+            scheduler.status.return_value.finished = False
+
+            app.start_analysis("Euro", "Germany", "10 years", "Preview")
+
+            scheduler.submit.assert_not_called()
@@ -0,0 +1,193 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pandas as pd
+from cachetools import LRUCache
+
+from performance_tracker.utils.cache import (
+    RESIZE_INTERVAL,
+    ByteBudgetCache,
+    SharedCache,
+    cache_stats,
+    cache_table,
+    estimate_size,
+    shared_cached,
+)
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Holder:
+    def __init__(self, *values: object) -> None:
+        self.values = list(values)
+
+
+class TestSharedCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = SharedCache("test", LRUCache(maxsize=2))
+
+    def test_hits_and_misses(self) -> None:
+        calls = []
+
+        @shared_cached(self.cache)
+        def square(x: int) -> int:
+            calls.append(x)
+            return x * x
+
+        self.assertEqual([square(2), square(2), square(3)], [4, 4, 9])
+        self.assertEqual(calls, [2, 3])
+
+        stats = self.cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 2, 2))
+        self.assertIs(cache_stats()["test"].hits, 1)
+
+    def test_pinned_values_outlive_the_bounds(self) -> None:
+        calls = []
+
+        @shared_cached(self.cache)
+        def square(x: int) -> int:
+            calls.append(x)
+            return x * x
+
+        with self.cache.pin():
+            self.assertEqual([square(x) for x in (1, 2, 3, 1, 2, 3)], [1, 4, 9] * 2)
+
+        self.assertEqual(calls, [1, 2, 3])
+        square(1)
+        self.assertEqual(calls, [1, 2, 3, 1])
+
+    def test_concurrent_misses_share_one_load(self) -> None:
+        calls = []
+        release = threading.Event()
+
+        def load() -> str:
+            calls.append(1)
+            release.wait(timeout=1)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [
+                executor.submit(self.cache.get_or_load, "key", load) for _ in range(8)
+            ]
+            time.sleep(0.05)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results, ["value"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.cache.stats().misses, 1)
+        self.assertEqual(self.cache.stats().coalesced, 7)
+
+    def test_failed_load_is_not_cached(self) -> None:
+        def fail() -> None:
+            raise RuntimeError("offline")
+
+        with self.assertRaises(RuntimeError):
+            self.cache.get_or_load("key", fail)
+
+        self.assertEqual(self.cache.get_or_load("key", lambda: "value"), "value")
+        self.assertEqual(self.cache.stats().misses, 2)
+
+
+class TestByteBudgetCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.timer = FakeTimer()
+        self.cache = ByteBudgetCache(
+            max_bytes=10, ttl=RESIZE_INTERVAL * 2, getsizeof=len, timer=self.timer
+        )
+
+    def test_least_recently_used_are_evicted_over_budget(self) -> None:
+        self.cache["a"] = "aaaa"
+        self.cache["b"] = "bbbb"
+        self.assertEqual(self.cache["a"], "aaaa")
+
+        self.cache["c"] = "cccc"
+
+        self.assertEqual(sorted(self.cache), ["a", "c"])
+        self.assertEqual((self.cache.bytes, self.cache.evictions), (8, 1))
+        with self.assertRaises(ValueError):
+            self.cache["d"] = "d" * 11
+
+    def test_entries_expire(self) -> None:
+        self.cache["a"] = "aaaa"
+        self.timer.now = RESIZE_INTERVAL
+        self.cache["b"] = "bbbb"
+        self.timer.now = RESIZE_INTERVAL * 2
+
+        with self.assertRaises(KeyError):
+            self.cache["a"]
+        self.assertEqual(self.cache["b"], "bbbb")
+        self.assertEqual((self.cache.bytes, self.cache.expirations), (4, 1))
+
+    def test_reads_do_not_resize(self) -> None:
+        getsizeof = MagicMock(side_effect=len)
+        cache = ByteBudgetCache(10, ttl=60, getsizeof=getsizeof, timer=self.timer)
+        cache["a"] = "aaaa"
+
+        for _ in range(3):
+            cache["a"]
+
+        getsizeof.assert_called_once_with("aaaa")
+
+    def test_grown_entries_are_resized_by_sweeps(self) -> None:
+        grown = ["x"]
+        cache = SharedCache("sweep", self.cache)
+        cache.get_or_load("a", lambda: "aaaa")
+        cache.get_or_load("b", lambda: grown)
+        grown.extend("x" * 8)
+
+        cache.get_or_load("b", lambda: None)
+        self.assertEqual(self.cache.bytes, 5)
+
+        self.timer.now = RESIZE_INTERVAL
+        self.assertIs(cache.get_or_load("b", lambda: None), grown)
+
+        self.assertEqual(list(self.cache), ["b"])
+        self.assertEqual((self.cache.bytes, self.cache.evictions), (9, 1))
+
+    def test_stats_of_shared_caches(self) -> None:
+        cache = SharedCache("budget", self.cache)
+        for key in ("a", "b", "c", "a"):
+            cache.get_or_load(key, lambda key=key: key * 4)
+        self.timer.now = RESIZE_INTERVAL * 2
+
+        stats = cache_stats()["budget"]
+
+        self.assertEqual((stats.hits, stats.misses), (0, 4))
+        self.assertEqual((stats.size, stats.bytes, stats.max_bytes), (0, 0, 10))
+        self.assertEqual((stats.evictions, stats.expirations), (2, 2))
+        self.assertEqual(stats.occupancy, 0.0)
+        self.assertIsNone(SharedCache("count", LRUCache(maxsize=2)).stats().occupancy)
+        self.assertIn("budget", cache_table())
+
+
+class TestEstimateSize(unittest.TestCase):
+    def test_frames_are_counted_deep(self) -> None:
+        df = pd.DataFrame({"Close": range(1000)}, dtype=float)
+
+        self.assertGreaterEqual(estimate_size(Holder(df)), 8000)
+        self.assertGreater(estimate_size({"info": "x" * 1000}), 1000)
+
+    def test_shared_references_are_counted_once(self) -> None:
+        text = "x" * 1000
+
+        self.assertLess(estimate_size(Holder(text, text)), 2000)
+
+    def test_skipped_types(self) -> None:
+        shared = Holder("x" * 1000)
+
+        self.assertGreater(estimate_size([shared]), 1000)
+        self.assertLess(estimate_size([shared], skip=(Holder,)), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from performance_tracker.utils.downsample import downsample_positions, lttb_indices
+
+
+class TestDownsample(unittest.TestCase):
+    def setUp(self) -> None:
+        index = pd.date_range("2016-01-01", periods=3650, freq="D")
+        values = 100 + np.cumsum(np.random.default_rng(7).normal(size=len(index)))
+        self.series = pd.Series(values, index=index)
+
+    def test_lttb_keeps_ends_and_count(self) -> None:
+        x = np.arange(1000, dtype=float)
+        y = np.sin(x / 50)
+
+        selected = lttb_indices(x, y, 100)
+
+        self.assertEqual(len(selected), 100)
+        self.assertEqual((selected[0], selected[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(selected) > 0))
+
+    def test_lttb_keeps_spikes(self) -> None:
+        y = np.zeros(1000)
+        y[437] = 50.0
+
+        self.assertIn(437, lttb_indices(np.arange(1000, dtype=float), y, 50))
+
+    def test_short_series_is_untouched(self) -> None:
+        positions = downsample_positions(self.series.iloc[:10], 400)
+        np.testing.assert_array_equal(positions, np.arange(10))
+
+    def test_keep_dates_and_missing_values(self) -> None:
+        self.series.iloc[:30] = np.nan
+        keep = pd.DatetimeIndex(["2018-06-15", "2020-03-02"])
+
+        positions = downsample_positions(self.series, 400, keep)
+        kept = self.series.iloc[positions]
+
+        self.assertLessEqual(len(kept), 402)
+        self.assertEqual(kept.index[0], self.series.index[30])
+        self.assertEqual(kept.index[-1], self.series.index[-1])
+        self.assertTrue(keep.isin(kept.index).all())
+        self.assertFalse(kept.isna().any())
+
+    def test_disabled(self) -> None:
+        self.assertEqual(len(downsample_positions(self.series, None)), 3650)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from performance_tracker.utils.join import build_benchmark_context, join_all_df
+
+
+class JoinTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        today = pd.Timestamp.now().normalize()
+        self.dates = pd.date_range(end=today, periods=4, freq="D")
+
+        self.comparison_ticker = MagicMock()
+        self.comparison_ticker.ticker = "EUNL.DE"
+        self.ticker = MagicMock()
+        self.ticker.ticker = "NVDA"
+
+        self.history_store = MagicMock()
+        self.history_store.get_history.side_effect = lambda ticker, period: {
+            "EUNL.DE": pd.DataFrame({"Close": [50.0, 55.0, 60.0, 66.0]}, index=self.dates),
+            "NVDA": pd.DataFrame({"Close": [10.0, 12.0, 15.0]}, index=self.dates[1:]),
+        }[ticker.ticker].copy()
+
+        self.exchanger = MagicMock()
+        self.exchanger.get_exchange_rate.side_effect = lambda from_symbol, to_symbol: (
+            pd.DataFrame({"Close": [1.0, 1.0, 0.5, 0.5]}, index=self.dates)
+            if from_symbol != to_symbol
+            else pd.DataFrame({"Close": [1.0] * 4}, index=self.dates)
+        )
+
+        self.inflation_service = MagicMock()
+        self.inflation_service.get_inflation_rate.return_value = pd.DataFrame(
+            {"interpolated_inflation": [1.0, 1.1, 1.21, 1.331]}, index=self.dates
+        )
+
+    def test_benchmark_is_built_once_and_rebased_per_position(self) -> None:
+        config = {"period": "1y", "country": "DEU"}
+        benchmark = build_benchmark_context(
+            "EUR",
+            self.comparison_ticker,
+            config,
+            self.exchanger,
+            self.inflation_service,
+            "EUR",
+            self.history_store,
+        )
+
+        combined_df = join_all_df(
+            benchmark, config, "USD", self.exchanger, self.ticker, "EUR", self.history_store
+        )
+
+        self.assertEqual(self.inflation_service.get_inflation_rate.call_count, 1)
+        self.assertEqual(list(combined_df.index), list(self.dates[1:]))
+        self.assertEqual(combined_df["Close_Adjusted"].tolist(), [100.0, 60.0, 75.0])
+        self.assertAlmostEqual(combined_df["Close_Comparison_Adjusted"].iloc[0], 100.0)
+        self.assertAlmostEqual(combined_df["Close_Comparison_Adjusted"].iloc[-1], 120.0)
+        self.assertAlmostEqual(
+            combined_df["interpolated_inflation_adjusted"].iloc[-1], 121.0
+        )
+        self.assertEqual(benchmark.comparison_df["Close_Comparison"].iloc[0], 50.0)
+
+    def test_shared_exchange_rates_are_not_modified(self) -> None:
+        config = {"period": "1y", "country": "DEU"}
+        benchmark = build_benchmark_context(
+            "EUR",
+            self.comparison_ticker,
+            config,
+            self.exchanger,
+            self.inflation_service,
+            "EUR",
+            self.history_store,
+        )
+        rates = pd.DataFrame(
+            {"Close": [1.0, 1.0, 0.5, 0.5]}, index=self.dates.tz_localize("UTC")
+        )
+        self.exchanger.get_exchange_rate.side_effect = None
+        self.exchanger.get_exchange_rate.return_value = rates
+
+        join_all_df(
+            benchmark, config, "USD", self.exchanger, self.ticker, "EUR", self.history_store
+        )
+
+        self.assertEqual(str(rates.index.tz), "UTC")
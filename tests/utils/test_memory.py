@@ -0,0 +1,84 @@
+import tracemalloc
+import unittest
+
+from performance_tracker.utils.memory import MIB, MemoryProfiler, track_memory
+
+_retained: list[bytearray] = list()
+
+
+def allocate(size: int, keep: bool = False) -> None:
+    block = bytearray(size)
+    if keep:
+        _retained.append(block)
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.addCleanup(_retained.clear)
+        self.profiler = MemoryProfiler()
+
+    def test_disabled_hooks_trace_nothing(self) -> None:
+        with track_memory("join", "SAP.DE"):
+            allocate(MIB)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(self.profiler.usages, [])
+
+    def test_peak_and_retained_memory_of_stages(self) -> None:
+        with self.profiler.activate():
+            with track_memory("join", "SAP.DE"):
+                allocate(4 * MIB)
+                allocate(MIB, keep=True)
+            with track_memory("page", "SAP.DE"):
+                allocate(MIB)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        join, page = self.profiler.usages
+
+        self.assertEqual((join.stage, join.position), ("join", "SAP.DE"))
+        self.assertGreaterEqual(join.peak, 4 * MIB)
+        self.assertLess(join.peak, 6 * MIB)
+        self.assertGreaterEqual(join.retained, MIB)
+        self.assertLess(join.retained, 2 * MIB)
+        self.assertGreaterEqual(page.peak, MIB)
+        self.assertLess(page.peak, 2 * MIB)
+        self.assertLess(page.retained, MIB)
+
+    def test_nested_stages_keep_their_peak(self) -> None:
+        with self.profiler.activate(), track_memory("generate"):
+            allocate(4 * MIB)
+            with track_memory("page", "NVDA"):
+                allocate(MIB)
+
+        page, generate = self.profiler.usages
+
+        self.assertLess(page.peak, 2 * MIB)
+        self.assertGreaterEqual(generate.peak, 4 * MIB)
+
+    def test_summaries(self) -> None:
+        with self.profiler.activate():
+            for symbol in ("SAP.DE", "NVDA"):
+                with track_memory("join", symbol):
+                    allocate(MIB, keep=True)
+            with track_memory("compile"):
+                pass
+
+        summary = self.profiler.summary()
+        self.assertEqual(summary.loc["join", "calls"], 2)
+        self.assertGreaterEqual(summary.loc["join", "retained_mib"], 2)
+        self.assertEqual(summary.loc["compile", "calls"], 1)
+        self.assertEqual(self.profiler.positions().index.tolist(), ["SAP.DE", "NVDA"])
+        self.assertIn("retained allocations", self.profiler.report())
+
+    def test_retained_allocation_sites(self) -> None:
+        with self.profiler.activate():
+            allocate(2 * MIB, keep=True)
+
+        site = self.profiler.sites[0]
+        self.assertTrue(site.filename.endswith("test_memory.py"))
+        self.assertGreaterEqual(site.size, 2 * MIB)
+        self.assertEqual(site.line, "block = bytearray(size)")
+
+    def test_empty_summary(self) -> None:
+        self.assertTrue(self.profiler.summary().empty)
+        self.assertTrue(self.profiler.positions().empty)
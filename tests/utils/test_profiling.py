@@ -0,0 +1,124 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from performance_tracker.utils.profiling import Profiler, profile, profiled
+
+
+class FakeClock:
+    def __init__(self, step: float) -> None:
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+@profiled("factory")
+def render(text: str) -> str:
+    return text
+
+
+@profiled("service", name="fetch")
+def fetch() -> None:
+    raise TimeoutError
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.profiler = Profiler(clock=FakeClock(0.5), cpu_clock=FakeClock(0.25))
+
+    def test_disabled_hooks_record_nothing(self) -> None:
+        self.assertIsNone(Profiler.active())
+
+        self.assertEqual(render("abc"), "abc")
+        with profile("Sidebar") as span:
+            span.output_bytes = 3
+
+        self.assertEqual(self.profiler.spans, [])
+
+    def test_spans_of_profiled_calls(self) -> None:
+        with self.profiler.activate():
+            render("äb")
+            with self.assertRaises(TimeoutError):
+                fetch()
+            with profile("Sidebar", "sidebar") as span:
+                span.output_bytes = 7
+
+        self.assertIsNone(Profiler.active())
+        rendered, fetched, sidebar = self.profiler.spans
+
+        self.assertEqual(rendered.name, "render")
+        self.assertEqual(rendered.category, "factory")
+        self.assertEqual(rendered.output_bytes, 3)
+        self.assertEqual(rendered.wall, 0.5)
+        self.assertEqual(rendered.cpu, 0.25)
+        self.assertIsNone(rendered.error)
+
+        self.assertEqual(fetched.name, "fetch")
+        self.assertEqual(fetched.error, "TimeoutError")
+        self.assertEqual(sidebar.output_bytes, 7)
+
+    def test_spans_of_every_thread(self) -> None:
+        profiler = Profiler()
+
+        with profiler.activate():
+            threads = [
+                threading.Thread(target=render, args=("a",), name=f"worker-{i}")
+                for i in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(
+            sorted(span.thread_name for span in profiler.spans),
+            ["worker-0", "worker-1", "worker-2"],
+        )
+
+    def test_chrome_trace(self) -> None:
+        with self.profiler.activate():
+            render("abc")
+            with self.assertRaises(TimeoutError):
+                fetch()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trace" / "batch.json"
+            self.profiler.write_chrome_trace(path)
+            trace = json.loads(path.read_text(encoding="utf-8"))
+
+        metadata, *events = trace["traceEvents"]
+        self.assertEqual(metadata["ph"], "M")
+        self.assertEqual(metadata["args"]["name"], threading.current_thread().name)
+
+        rendered, fetched = events
+        self.assertEqual(rendered["ph"], "X")
+        self.assertEqual(rendered["cat"], "factory")
+        self.assertEqual(rendered["dur"], 0.5e6)
+        self.assertEqual(rendered["args"], {"cpu_ms": 250.0, "bytes": 3})
+        self.assertEqual(fetched["args"]["error"], "TimeoutError")
+        self.assertGreater(fetched["ts"], rendered["ts"])
+
+    def test_summary(self) -> None:
+        with self.profiler.activate():
+            render("abc")
+            render("abcdef")
+            with self.assertRaises(TimeoutError):
+                fetch()
+
+        summary = self.profiler.summary()
+
+        rendered = summary.loc[("factory", "render")]
+        self.assertEqual(rendered["calls"], 2)
+        self.assertEqual(rendered["wall_s"], 1.0)
+        self.assertEqual(rendered["max_ms"], 500.0)
+        self.assertEqual(rendered["bytes"], 9)
+        self.assertEqual(summary.loc[("service", "fetch"), "errors"], 1)
+        self.assertIn("render", self.profiler.summary_table())
+
+    def test_empty_summary(self) -> None:
+        self.assertTrue(self.profiler.summary().empty)
@@ -0,0 +1,55 @@
+import unittest
+
+from performance_tracker.utils.progress import ProgressEvent, ProgressTracker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestProgressTracker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.events: list[ProgressEvent] = []
+        self.tracker = ProgressTracker(
+            {"fetch": 1, "compile": 3}, self.events.append, clock=self.clock
+        )
+
+    def test_progress_is_weighted_by_stage(self) -> None:
+        with self.tracker.stage("fetch", total=4):
+            self.clock.now = 2.0
+            self.tracker.advance("fetch", "SAP.DE", steps=2)
+
+        self.assertEqual(self.events[0].text, "fetch 0/4: started")
+        self.assertAlmostEqual(self.events[1].progress, 0.125)
+        self.assertEqual(self.events[1].text, "fetch 2/4: SAP.DE (about 14s left)")
+        self.assertAlmostEqual(self.events[-1].progress, 0.25)
+        self.assertAlmostEqual(self.events[-1].eta, 6.0)
+
+    def test_timings_per_stage(self) -> None:
+        with self.tracker.stage("fetch"):
+            self.clock.now = 1.5
+        with self.tracker.stage("compile"):
+            self.tracker.record("compile part", 0.5)
+            self.clock.now = 4.0
+
+        self.assertEqual(
+            self.tracker.timings, {"fetch": 1.5, "compile part": 0.5, "compile": 2.5}
+        )
+        self.assertAlmostEqual(self.events[-1].progress, 1.0)
+        self.assertEqual(self.events[-1].eta, 0.0)
+
+    def test_failed_stage_is_timed(self) -> None:
+        with self.assertRaises(RuntimeError), self.tracker.stage("fetch"):
+            self.clock.now = 1.0
+            raise RuntimeError("offline")
+
+        self.assertEqual(self.tracker.timings, {"fetch": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from performance_tracker.services.market_data import MarketDataProvider
+from performance_tracker.utils.ratelimit import (
+    RATE_LIMITS,
+    RateLimiter,
+    get_rate_limiter,
+    set_rate_limit,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = list()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        # one token per second
+        self.limiter = RateLimiter(
+            rpm=60, burst=2, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_burst_then_waits(self) -> None:
+        self.assertEqual([self.limiter.reserve() for _ in range(4)], [0, 0, 1, 2])
+
+    def test_tokens_are_refilled_up_to_the_burst(self) -> None:
+        self.limiter.reserve(2)
+        self.clock.now = 60
+
+        self.assertEqual([self.limiter.reserve() for _ in range(3)], [0, 0, 1])
+
+    def test_large_requests_wait_for_their_tokens(self) -> None:
+        self.assertEqual(self.limiter.reserve(5), 3)
+        self.assertEqual(self.limiter.reserve(), 4)
+
+    def test_sync_calls_sleep(self) -> None:
+        calls = list()
+
+        @self.limiter
+        def fetch(symbol: str) -> str:
+            calls.append(self.clock.now)
+            return symbol
+
+        self.assertEqual([fetch(s) for s in ("A", "B", "C")], ["A", "B", "C"])
+        self.assertEqual(calls, [0, 0, 1])
+        self.assertEqual(self.clock.sleeps, [1])
+
+    def test_async_calls_are_awaited(self) -> None:
+        limiter = RateLimiter(rpm=6000, burst=1)
+
+        @limiter
+        async def fetch(symbol: str) -> str:
+            await asyncio.sleep(0)
+            return symbol
+
+        async def fetch_all() -> list[str]:
+            return await asyncio.gather(*(fetch(s) for s in ("A", "B", "C")))
+
+        with patch("asyncio.sleep", wraps=asyncio.sleep) as sleep:
+            self.assertEqual(asyncio.run(fetch_all()), ["A", "B", "C"])
+
+        waits = [call.args[0] for call in sleep.call_args_list if call.args[0]]
+        self.assertEqual(len(waits), 2)
+        self.assertAlmostEqual(max(waits), 0.02, delta=0.005)
+
+    def test_threads_share_the_budget(self) -> None:
+        waits = list()
+        lock = threading.Lock()
+
+        def reserve() -> None:
+            wait = self.limiter.reserve()
+            with lock:
+                waits.append(wait)
+
+        threads = [threading.Thread(target=reserve) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(waits), [0, 0, 1, 2, 3, 4, 5, 6, 7, 8])
+
+    def test_named_budgets(self) -> None:
+        self.addCleanup(set_rate_limit, "yahoo", *RATE_LIMITS["yahoo"])
+        self.assertIs(get_rate_limiter("yahoo"), get_rate_limiter("yahoo"))
+        self.assertEqual(get_rate_limiter("worldbank").name, "worldbank")
+        with self.assertRaisesRegex(ValueError, "yahoo"):
+            get_rate_limiter("twitter")
+
+        set_rate_limit("yahoo", 60, burst=1)
+
+        self.assertEqual(get_rate_limiter("yahoo").reserve(), 0)
+        self.assertGreater(get_rate_limiter("yahoo").reserve(), 0)
+
+    def test_without_limit(self) -> None:
+        limiter = RateLimiter(rpm=None, clock=self.clock)
+
+        self.assertEqual([limiter.reserve(100) for _ in range(3)], [0, 0, 0])
+
+    @patch("performance_tracker.services.market_data.get_rate_limiter")
+    def test_live_requests_take_tokens(self, get_limiter: MagicMock) -> None:
+        provider = MarketDataProvider()
+        ticker = MagicMock()
+
+        with (
+            patch("yfinance.download"),
+            patch("httpx.Client.get") as mock_get,
+        ):
+            mock_get.return_value.json.return_value = []
+            provider.history(ticker, period="max")
+            provider.field(ticker, "info")
+            provider.download(["SAP.DE", "NVDA"], period="max")
+            provider.get_json("https://example.org/cpi", {}, 1.0)
+
+        self.assertEqual(
+            [call.args for call in get_limiter.call_args_list],
+            [("yahoo",), ("yahoo",), ("yahoo",), ("worldbank",)],
+        )
+        self.assertEqual(
+            [call.args for call in get_limiter.return_value.acquire.call_args_list],
+            [(), (), (), ()],
+        )